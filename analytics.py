@@ -0,0 +1,321 @@
+"""
+Incremental per-minute / per-hour / per-day rollups of inspection results
+and sensor readings.
+
+Every published detection state and every sensor sample is folded into an
+in-memory per-minute accumulator (a few additions, no I/O). A background
+thread periodically adds those deltas onto the minute, hour and day rows in
+SQLite, so chart queries read at most a few hundred pre-aggregated rows
+whatever the span, instead of scanning raw events. Minute and hour rows are
+deleted once older than their ``RETENTION``; day rows are kept.
+
+Two kinds of counts are kept per camera:
+  - ``frames`` / ``pass_frames`` / ``fail_frames``: processed frames and their
+    verdicts, so they scale with the capture rate (time spent passing/failing)
+  - ``inspections`` / ``passes`` / ``fails``: verdict changes, i.e. the
+    overall status turning PASS or FAIL, one per inspection of a flow cell;
+    failure reasons are counted on the changes to FAIL
+"""
+import math
+import sqlite3
+import threading
+import time
+
+from event_store import COMPONENTS, DEFAULT_PATH, connect
+
+# Rollup resolution -> bucket size in seconds (buckets are aligned to UTC)
+RESOLUTIONS = {
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+# Rollup resolution -> seconds its rows are kept, None to keep them forever
+RETENTION = {
+    "minute": 7 * 86400,
+    "hour": 400 * 86400,
+    "day": None,
+}
+
+# Sensors summarized as min / mean / max; motion is 0 or 1, so its mean is
+# the fraction of samples that detected motion
+SENSORS = ("temperature", "pressure", "ultrasonic", "motion")
+
+_TOTALS = ["frames", "pass_frames", "fail_frames", "inspections", "passes", "fails"]
+_COUNTS = _TOTALS + [f"fail_{f}" for f in COMPONENTS]
+_SENSOR_COLUMNS = ["n", "sum", "min", "max"]
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS camera_rollups (resolution TEXT NOT NULL, camera TEXT NOT NULL, "
+    "bucket INTEGER NOT NULL, "
+    + ", ".join(f"{c} INTEGER NOT NULL DEFAULT 0" for c in _COUNTS)
+    + ", PRIMARY KEY (resolution, camera, bucket)) WITHOUT ROWID;"
+    "CREATE INDEX IF NOT EXISTS camera_rollups_resolution_bucket ON camera_rollups (resolution, bucket);"
+    "CREATE TABLE IF NOT EXISTS sensor_rollups (resolution TEXT NOT NULL, sensor TEXT NOT NULL, "
+    "bucket INTEGER NOT NULL, n INTEGER NOT NULL DEFAULT 0, sum REAL NOT NULL DEFAULT 0, min REAL, max REAL, "
+    "PRIMARY KEY (resolution, sensor, bucket)) WITHOUT ROWID;"
+    "CREATE INDEX IF NOT EXISTS sensor_rollups_resolution_bucket ON sensor_rollups (resolution, bucket);"
+)
+
+
+def _merge_sql(column):
+    # Deltas add onto the stored row; min / max keep the extreme (NULL means no samples yet)
+    if column == "min":
+        return "min = MIN(COALESCE(min, excluded.min), COALESCE(excluded.min, min))"
+    if column == "max":
+        return "max = MAX(COALESCE(max, excluded.max), COALESCE(excluded.max, max))"
+    return f"{column} = {column} + excluded.{column}"
+
+
+def _upsert(table, key, columns):
+    return (f"INSERT INTO {table} (resolution, {key}, bucket, {', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * (len(columns) + 3))}) "
+            f"ON CONFLICT (resolution, {key}, bucket) DO UPDATE SET "
+            + ", ".join(_merge_sql(c) for c in columns))
+
+
+_CAMERA_UPSERT = _upsert("camera_rollups", "camera", _COUNTS)
+_SENSOR_UPSERT = _upsert("sensor_rollups", "sensor", _SENSOR_COLUMNS)
+
+# Seconds between deletions of expired rows
+_PRUNE_INTERVAL = 3600.0
+
+
+def _new_counts():
+    return dict.fromkeys(_COUNTS, 0)
+
+
+def _new_sensor():
+    return [0, 0.0, math.inf, -math.inf]
+
+
+def _merge_counts(into, other):
+    for column in _COUNTS:
+        into[column] += other[column]
+
+
+def _merge_sensor(a, b):
+    a[0] += b[0]
+    a[1] += b[1]
+    a[2] = min(a[2], b[2])
+    a[3] = max(a[3], b[3])
+
+
+class AnalyticsRollups:
+    """
+    Frame and inspection counts and failure reasons per camera, and sensor
+    statistics, rolled up by minute, hour and day.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, flush_interval=5.0, retention=None):
+        """
+        Args:
+            path (str): SQLite database file (may be shared with the event store)
+            flush_interval (float): Seconds between writes of the pending deltas;
+                queries do not see the newest results until they are written
+            retention (dict): Resolution -> seconds its rows are kept, RETENTION by default
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.retention = dict(RETENTION, **(retention or {}))
+        # (camera, minute bucket) -> counts not yet written
+        self._pending = {}
+        # (sensor, minute bucket) -> [n, sum, min, max] not yet written
+        self._pending_sensors = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Create the schema and start the flush thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            conn = connect(self.path)
+            conn.executescript(_SCHEMA)
+            conn.close()
+            self._thread = threading.Thread(target=self._flush_loop, name="analytics-rollups", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Write the pending deltas and stop the flush thread"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def add(self, camera, timestamp, status, previous=None):
+        """
+        Fold one processed frame's status into the current minute; a verdict
+        different from the ``previous`` status counts as an inspection.
+        """
+        key = (camera, int(timestamp // 60) * 60)
+        overall = status.get("overall")
+        changed = previous is None or previous.get("overall") != overall
+        with self._lock:
+            acc = self._pending.get(key)
+            if acc is None:
+                acc = self._pending[key] = _new_counts()
+            acc["frames"] += 1
+            if overall == "PASS":
+                acc["pass_frames"] += 1
+                if changed:
+                    acc["inspections"] += 1
+                    acc["passes"] += 1
+            elif overall == "FAIL":
+                acc["fail_frames"] += 1
+                if changed:
+                    acc["inspections"] += 1
+                    acc["fails"] += 1
+                    for field, (_, passing) in COMPONENTS.items():
+                        if status.get(field) != passing:
+                            acc[f"fail_{field}"] += 1
+
+    def add_sample(self, sensor, timestamp, value):
+        """Fold one sensor sample into the current minute (a SensorService ``on_sample`` hook)"""
+        if sensor not in SENSORS:
+            return
+        key = (sensor, int(timestamp // 60) * 60)
+        with self._lock:
+            stats = self._pending_sensors.get(key)
+            if stats is None:
+                stats = self._pending_sensors[key] = _new_sensor()
+            stats[0] += 1
+            stats[1] += value
+            stats[2] = min(stats[2], value)
+            stats[3] = max(stats[3], value)
+
+    def _flush_loop(self):
+        conn = connect(self.path)
+        next_prune = 0.0
+        try:
+            while not self._stop.wait(self.flush_interval):
+                self._flush(conn)
+                if time.monotonic() >= next_prune:
+                    self._prune(conn, time.time())
+                    next_prune = time.monotonic() + _PRUNE_INTERVAL
+            self._flush(conn)
+        finally:
+            conn.close()
+
+    def _flush(self, conn):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            pending_sensors, self._pending_sensors = self._pending_sensors, {}
+        if not pending and not pending_sensors:
+            return
+
+        # One row per (resolution, camera or sensor, bucket) touched by these minutes
+        rows = {}
+        for (camera, minute), acc in pending.items():
+            for resolution, size in RESOLUTIONS.items():
+                key = (resolution, camera, minute // size * size)
+                _merge_counts(rows.setdefault(key, _new_counts()), acc)
+        sensor_rows = {}
+        for (sensor, minute), stats in pending_sensors.items():
+            for resolution, size in RESOLUTIONS.items():
+                key = (resolution, sensor, minute // size * size)
+                _merge_sensor(sensor_rows.setdefault(key, _new_sensor()), stats)
+
+        with conn:
+            conn.executemany(_CAMERA_UPSERT, [list(key) + [acc[c] for c in _COUNTS]
+                                              for key, acc in rows.items()])
+            conn.executemany(_SENSOR_UPSERT, [list(key) + [n, total, low, high]
+                                              for key, (n, total, low, high) in sensor_rows.items()])
+
+    def _prune(self, conn, now):
+        """Delete rows older than their resolution's retention"""
+        with conn:
+            for resolution, seconds in self.retention.items():
+                if seconds is None:
+                    continue
+                for table in ("camera_rollups", "sensor_rollups"):
+                    conn.execute(f"DELETE FROM {table} WHERE resolution = ? AND bucket < ?",
+                                 (resolution, now - seconds))
+
+    def query(self, start, end, resolution=None, camera=None):
+        """
+        Rolled-up results for a time range.
+
+        Args:
+            start (float): Range start, epoch seconds
+            end (float): Range end, epoch seconds
+            resolution (str): "minute", "hour" or "day"; by default the finest
+                one giving at most a few hundred buckets
+            camera (str): Only this camera, all cameras combined by default
+                (sensors are shared by all cameras)
+
+        Returns:
+            dict: ``resolution``, ``buckets`` (oldest first, each with counts,
+                failure reasons and sensor min / mean / max) and ``totals``
+        """
+        if resolution is None:
+            span = end - start
+            resolution = "minute" if span <= 6 * 3600 else "hour" if span <= 14 * 86400 else "day"
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution {resolution!r}, expected one of {tuple(RESOLUTIONS)}")
+        size = RESOLUTIONS[resolution]
+        bounds = [resolution, int(start // size) * size, end]
+
+        sql = (f"SELECT bucket, {', '.join(f'SUM({c})' for c in _COUNTS)} FROM camera_rollups "
+               "WHERE resolution = ? AND bucket >= ? AND bucket < ?")
+        params = list(bounds)
+        if camera is not None:
+            sql += " AND camera = ?"
+            params.append(camera)
+        sql += " GROUP BY bucket"
+        sensor_sql = ("SELECT bucket, sensor, n, sum, min, max FROM sensor_rollups "
+                      "WHERE resolution = ? AND bucket >= ? AND bucket < ?")
+
+        conn = sqlite3.connect(self.path, timeout=10.0)
+        try:
+            rows = conn.execute(sql, params).fetchall()
+            sensor_rows = conn.execute(sensor_sql, bounds).fetchall()
+        except sqlite3.OperationalError as e:
+            if "no such table" not in str(e):
+                raise
+            rows, sensor_rows = [], []
+        finally:
+            conn.close()
+
+        accumulators = {}
+
+        def bucket(key):
+            acc = accumulators.get(key)
+            if acc is None:
+                acc = accumulators[key] = (_new_counts(), {s: _new_sensor() for s in SENSORS})
+            return acc
+
+        for row in rows:
+            counts, _ = bucket(row[0])
+            _merge_counts(counts, dict(zip(_COUNTS, row[1:])))
+        for key, sensor, n, total, low, high in sensor_rows:
+            _, sensors = bucket(key)
+            if sensor in sensors:
+                _merge_sensor(sensors[sensor], [n, total, math.inf if low is None else low,
+                                                -math.inf if high is None else high])
+
+        buckets = []
+        totals = (_new_counts(), {s: _new_sensor() for s in SENSORS})
+        for key in sorted(accumulators):
+            counts, sensors = accumulators[key]
+            _merge_counts(totals[0], counts)
+            for sensor in SENSORS:
+                _merge_sensor(totals[1][sensor], sensors[sensor])
+            buckets.append(dict(_summary(counts, sensors), bucket=key))
+        return {"resolution": resolution, "bucket_seconds": size, "buckets": buckets,
+                "totals": _summary(*totals)}
+
+
+def _summary(counts, sensors):
+    """JSON-friendly view of a bucket's counts and sensor statistics"""
+    summary = {column: counts[column] for column in _TOTALS}
+    summary["success_rate"] = (round(100.0 * counts["passes"] / counts["inspections"], 2)
+                               if counts["inspections"] else None)
+    summary["failures"] = {field: counts[f"fail_{field}"] for field in COMPONENTS}
+    summary["sensors"] = {}
+    for sensor in SENSORS:
+        n, total, low, high = sensors[sensor]
+        summary["sensors"][sensor] = ({"min": low, "mean": round(total / n, 3), "max": high}
+                                      if n else None)
+    return summary
@@ -1,26 +1,92 @@
-import cv2
-import numpy as np
+import os
+import random
 import threading
 import time
-import random
-from flask import Flask, Response, jsonify, render_template
+from flask import Flask, Response, abort, jsonify, render_template, request
+
+import inspection_profile
+import metrics
+from analytics import RESOLUTIONS as ROLLUP_RESOLUTIONS, AnalyticsRollups
+from event_store import EXPORT_FORMATS, EventStore, export_events
+from sensors import Sensor, SensorService
+from station import InspectionStation, StationProcess
+from status_log import StatusLog
+from streaming import status_events
 
 app = Flask(__name__)
 
-# Global variables for the processed frame and detection status
-output_frame = None
-detection_status = {
-    "fuel_cell_holes": "unknown",
-    "pipette": "unknown",
-    "flaps": "unknown",
-    "overflow": "unknown",
-    "overall": "unknown",
-    "temperature": "unknown",
-    "pressure": "unknown",
-    "motion": "unknown",
-    "ultrasonic": "unknown"
+# Cameras to inspect: name -> cv2.VideoCapture device index (or video path).
+# Each camera gets its own capture/detect pipeline and /video_feed/<camera>,
+# /detection/<camera> endpoints; the plain endpoints serve DEFAULT_CAMERA.
+CAMERAS = {
+    "main": 0,
+}
+DEFAULT_CAMERA = "main"
+
+# Run each camera's pipeline in its own process instead of a thread
+CAMERA_PROCESSES = False
+
+# What to do with frames a stage cannot keep up with: "latest" replaces the
+# pending frame, "oldest" discards the new one, "block" applies backpressure
+FRAME_DROP_POLICY = "latest"
+
+# Number of worker processes for the detectors; 0 runs them inline in the detect stage
+DETECTOR_WORKERS = 0
+
+# Full-frame scans run coarse-to-fine this many pyramid levels down (each level
+# halves the resolution), refining only candidate regions at full resolution;
+# 0 runs every detector at native camera resolution.
+# Trade-off: on the synthetic benchmark scenes one level roughly halves detection
+# time at 1080p/4K, but small holes and the pipette's tick marks blur away at
+# coarse levels. Levels that would shrink a frame below
+# inspection_profile.MIN_FRAME_SIZE are skipped, and when the coarse pass finds
+# no holes or no confirmed pipette that detector reruns at full resolution, so a
+# scene without a pipette (worst with heavy clutter) costs more than 0 levels.
+# Below 720p even one level loses holes; keep 0 there.
+PYRAMID_LEVELS = 0
+
+# Reuse detector results while the scene is static; each detector is still
+# re-run at least every DETECTOR_MAX_STALENESS seconds
+MOTION_GATING = True
+DETECTOR_MAX_STALENESS = {
+    "fuel_cell_holes": 2.0,
+    "pipette": 0.5,
+    "flaps": 1.0,
+    "overflow": 0.5,
 }
-lock = threading.Lock()
+
+# Search for holes and pipette only in a padded window around their last
+# detection, with a full-frame scan on track loss and every TRACK_FULL_SCAN_INTERVAL frames
+ROI_TRACKING = True
+TRACK_FULL_SCAN_INTERVAL = 30
+
+# Detection states kept per camera for /detection/history
+DETECTION_HISTORY_SIZE = 1024
+
+# Every detection state change is persisted here (SQLite, WAL mode) for /history,
+# along with the per-minute/hour/day rollups behind /analytics
+EVENT_STORE_PATH = "events.db"
+
+# Record the most recent captured frames (raw, memory-mapped) to a new
+# timestamped directory under RECORD_DIR/<camera> on every start, to
+# reproduce field failures offline; None disables recording. Each run holds
+# as many frames as fit RECORD_MAX_BYTES (2 GiB is about 80 seconds of 480p
+# or 12 seconds of 1080p at 30 FPS) and only the last RECORD_KEEP_RUNS runs
+# per camera are kept. A recording directory (or RECORD_DIR/<camera> for its
+# latest run) can be used as a camera source, replayed at REPLAY_SPEED
+# (1.0 = as captured, 0 = as fast as the pipeline runs)
+RECORD_DIR = None
+RECORD_MAX_BYTES = 2 << 30
+RECORD_KEEP_RUNS = 5
+REPLAY_SPEED = 1.0
+
+# Detection state changes are logged to stdout as JSON lines as they happen,
+# with a per-camera summary every STATUS_SUMMARY_INTERVAL seconds
+STATUS_SUMMARY_INTERVAL = 60.0
+
+# /events pushes detection changes immediately; sensor readings change on
+# every frame, so they are pushed at most once per SENSOR_PUSH_INTERVAL seconds
+SENSOR_PUSH_INTERVAL = 1.0
 
 # ----------------- Sensor Simulation (Replace with Real Sensors) -----------------
 def read_temperature():
@@ -35,492 +101,163 @@ def read_motion():
 def read_ultrasonic():
     return round(random.uniform(5, 15), 2)
 
-# ----------------- Vision Processing -----------------
-def detect_fuel_cell_holes(frame):
-    """
-    Detect if the fuel cell holes are open using contour detection
-    and shape analysis rather than simple circle detection.
-    """
-    # Convert to grayscale
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    
-    # Apply Gaussian blur to reduce noise
-    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-    
-    # Apply threshold to create binary image
-    _, thresh = cv2.threshold(blurred, 80, 255, cv2.THRESH_BINARY_INV)
-    
-    # Find contours
-    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    
-    # Filter contours by size and circularity to find holes
-    holes = []
-    for cnt in contours:
-        area = cv2.contourArea(cnt)
-        if area > 100 and area < 5000:  # Filter by size
-            perimeter = cv2.arcLength(cnt, True)
-            if perimeter > 0:
-                circularity = 4 * np.pi * area / (perimeter * perimeter)
-                if circularity > 0.7:  # Circle has circularity close to 1
-                    # Get bounding rectangle to find center and "radius"
-                    x, y, w, h = cv2.boundingRect(cnt)
-                    center = (int(x + w/2), int(y + h/2))
-                    radius = int((w + h) / 4)  # Approximate radius
-                    holes.append((center, radius))
-    
-    return holes
-
-def detect_syringe(frame):
-    """
-    Detect a syringe/pipette like the one in the reference image (clear with measurement markings).
-    Specifically looks for the characteristics of a medical syringe with plunger.
-    """
-    if frame is None:
-        return []
-        
-    # Convert to grayscale
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    
-    # Apply adaptive thresholding to highlight edges and text markings
-    # This will help detect the measurement lines on the syringe
-    thresh = cv2.adaptiveThreshold(
-        gray,
-        255,
-        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY_INV,
-        11,
-        2
+# Per-minute/hour/day inspection and sensor rollups for /analytics
+rollups = AnalyticsRollups(EVENT_STORE_PATH)
+
+# Each sensor is sampled on its own thread at its own rate (samples per second);
+# frames only pick up the latest readings, so a slow sensor never delays vision.
+# Every sample also feeds the sensor rollups behind /analytics
+sensor_service = SensorService([
+    Sensor("temperature", read_temperature, rate=1.0, unit="°C"),
+    Sensor("pressure", read_pressure, rate=2.0, unit="kPa"),
+    Sensor("motion", lambda: read_motion() == "Detected", rate=10.0,
+           labels=("Not Detected", "Detected")),
+    Sensor("ultrasonic", read_ultrasonic, rate=10.0, unit="cm"),
+], on_sample=rollups.add_sample)
+
+def read_sensors():
+    """Latest sensor readings as detection status fields"""
+    return sensor_service.status()
+
+# ----------------- Cameras -----------------
+event_store = EventStore(EVENT_STORE_PATH)
+status_log = StatusLog(summary_interval=STATUS_SUMMARY_INTERVAL)
+
+def make_station(name, source):
+    station_class = StationProcess if CAMERA_PROCESSES else InspectionStation
+    return station_class(
+        name,
+        source=source,
+        drop_policy=FRAME_DROP_POLICY,
+        detector_workers=DETECTOR_WORKERS,
+        pyramid_levels=PYRAMID_LEVELS,
+        max_staleness=DETECTOR_MAX_STALENESS if MOTION_GATING else None,
+        roi_tracking=ROI_TRACKING,
+        full_scan_interval=TRACK_FULL_SCAN_INTERVAL,
+        extra_status=read_sensors,
+        history_size=DETECTION_HISTORY_SIZE,
+        event_store=event_store,
+        rollups=rollups,
+        status_log=status_log,
+        record_path=os.path.join(RECORD_DIR, name) if RECORD_DIR else None,
+        record_max_bytes=RECORD_MAX_BYTES,
+        record_keep_runs=RECORD_KEEP_RUNS,
+        replay_speed=REPLAY_SPEED,
     )
-    
-    # Apply morphological operations to enhance the structure
-    kernel = np.ones((3, 3), np.uint8)
-    morph = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel, iterations=1)
-    
-    # Find contours
-    contours, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    
-    # Filter contours to find potential syringes
-    syringe_contours = []
-    for cnt in contours:
-        area = cv2.contourArea(cnt)
-        if area < 500:  # Ignore small contours
-            continue
-            
-        # Get bounding rectangle
-        x, y, w, h = cv2.boundingRect(cnt)
-        
-        # Check aspect ratio - syringes are elongated
-        aspect_ratio = float(h) / w if w > 0 else 0
-        if aspect_ratio < 2:  # Looking for tall, narrow objects
-            continue
-            
-        # Check if contour is mostly straight lines (like a syringe body)
-        # Approximate the contour
-        epsilon = 0.04 * cv2.arcLength(cnt, True)
-        approx = cv2.approxPolyDP(cnt, epsilon, True)
-        
-        # A syringe shape typically has 4-8 vertices when approximated
-        if len(approx) < 4 or len(approx) > 12:
-            continue
-            
-        # Additional check: Look for parallel lines that would be the syringe barrel
-        # Convert to grayscale and binary
-        roi = frame[y:y+h, x:x+w]
-        if roi.size == 0:
-            continue
-            
-        roi_gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-        _, roi_bin = cv2.threshold(roi_gray, 100, 255, cv2.THRESH_BINARY)
-        
-        # Apply edge detection
-        edges = cv2.Canny(roi_bin, 50, 150)
-        
-        # Apply Hough transform to detect lines
-        lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=50, minLineLength=h/3, maxLineGap=20)
-        
-        if lines is None or len(lines) < 2:
-            continue
-            
-        # Check for text markings (like measurements)
-        # Count small contours that could be measurement lines
-        roi_thresh = cv2.adaptiveThreshold(
-            roi_gray,
-            255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY_INV,
-            11,
-            2
-        )
-        
-        marking_contours, _ = cv2.findContours(roi_thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        small_markings = [c for c in marking_contours if 5 < cv2.contourArea(c) < 100]
-        
-        # Syringes typically have multiple small marking lines
-        if len(small_markings) < 3:
-            continue
-        
-        # If all checks pass, this is likely a syringe
-        syringe_contours.append({
-            'contour': cnt,
-            'rect': (x, y, w, h),
-            'confidence': min(100, area / 100)  # Basic confidence metric
-        })
-    
-    # Sort by confidence
-    syringe_contours.sort(key=lambda x: x['confidence'], reverse=True)
-    
-    # Return contours of detected syringes (highest confidence first)
-    return [s['contour'] for s in syringe_contours]
 
-def process_frame(frame):
-    """
-    Process the frame to:
-      - Detect fuel cell holes (using circle detection)
-      - Detect pipette/syringe specifically like in the reference image
-      - Check flap state
-      - Check for liquid overflow
-    Returns the processed frame and remarks.
-    """
-    if frame is None:
-        return None, []
-    
-    output = frame.copy()
-    remarks = []
-    
-    # --- 1. Fuel Cell Hole Detection ---
-    holes = detect_fuel_cell_holes(frame)
-    if len(holes) > 0:
-        # Draw detected holes
-        for (center, radius) in holes:
-            cv2.circle(output, center, radius, (0, 255, 0), 2)
-            cv2.circle(output, center, 2, (0, 0, 255), 2)
-        
-        remarks.append(f"Fuel cell holes detected: {len(holes)}")
-        detection_status["fuel_cell_holes"] = "detected"
-    else:
-        remarks.append("Fuel cell holes NOT detected")
-        detection_status["fuel_cell_holes"] = "not detected"
-    
-    # --- 2. Syringe/Pipette Detection ---
-    syringe_contours = detect_syringe(frame)
-    if len(syringe_contours) > 0:
-        # Draw detected syringe outline
-        cv2.drawContours(output, syringe_contours, -1, (255, 0, 0), 2)
-        
-        # Get bounding rectangle for the largest contour
-        if len(syringe_contours) > 0:
-            largest_contour = max(syringe_contours, key=cv2.contourArea)
-            x, y, w, h = cv2.boundingRect(largest_contour)
-            cv2.rectangle(output, (x, y), (x+w, y+h), (0, 255, 255), 2)
-            cv2.putText(output, "Pipette", (x, y-10), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-        
-        remarks.append("Pipette detected")
-        detection_status["pipette"] = "detected"
-    else:
-        remarks.append("Pipette NOT detected")
-        detection_status["pipette"] = "not detected"
-    
-    # --- 3. Flap State Detection ---
-    flap_info = detect_flaps(frame)
-    
-    # Draw ROIs for priming and spotON ports
-    x1, y1, x2, y2 = flap_info["priming_roi"]
-    cv2.rectangle(output, (x1, y1), (x2, y2), (0, 0, 255), 2)
-    cv2.putText(output, f"Priming: {'Closed' if flap_info['priming_closed'] else 'Open'}", 
-                (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-    
-    x1, y1, x2, y2 = flap_info["spoton_roi"]
-    cv2.rectangle(output, (x1, y1), (x2, y2), (0, 0, 255), 2)
-    cv2.putText(output, f"SpotON: {'Closed' if flap_info['spoton_closed'] else 'Open'}", 
-                (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-    
-    # Update overall flap status
-    flap_status = "Closed" if flap_info["flaps_closed"] else "Open"
-    remarks.append(f"Flaps are {flap_status}")
-    detection_status["flaps"] = flap_status
-    
-    # --- 4. Liquid Overflow Detection ---
-    overflow_info = detect_overflow(frame)
-    
-    # Draw overflow ROI
-    x1, y1, x2, y2 = overflow_info["overflow_roi"]
-    cv2.rectangle(output, (x1, y1), (x2, y2), (0, 255, 0), 2)
-    
-    # Update overflow status
-    overflow_status = "Overflowing" if overflow_info["is_overflowing"] else "Normal"
-    cv2.putText(output, f"Overflow: {overflow_status}", (x1, y1-10), 
-                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-    
-    remarks.append(f"Liquid overflow: {overflow_status}")
-    detection_status["overflow"] = overflow_status
-    
-    # --- 5. Overall Evaluation ---
-    # Passing criteria: 
-    # - Flaps are closed (as shown in the reference image)
-    # - No overflow
-    # - Fuel cell holes detected (when open)
-    # - Pipette detected (when present)
-    if (flap_status == "Closed" and 
-        overflow_status == "Normal" and 
-        detection_status["pipette"] == "detected" and 
-        detection_status["fuel_cell_holes"] == "detected"):
-        overall = "PASS"
-    else:
-        overall = "FAIL"
-    
-    cv2.putText(output, f"Overall: {overall}", (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX, 1.0,
-                (0, 255, 0) if overall == "PASS" else (0, 0, 255), 2)
-    
-    remarks.append(f"Overall: {overall}")
-    detection_status["overall"] = overall
-    
-    return output, remarks
-
-def detect_flaps(frame):
-    """
-    Detect if the Priming port cover and SpotON port cover are closed or open
-    based on the image of the fuel cell provided.
-    """
-    # Define regions of interest for the Priming port and SpotON port
-    # These coordinates need to be adjusted based on your camera setup
-    h, w = frame.shape[:2]
-    
-    # Approximate regions based on fuel cell image
-    # Left third is roughly where the Priming port is
-    priming_roi = frame[int(h*0.3):int(h*0.7), int(w*0.2):int(w*0.4)]
-    
-    # Right third is roughly where the SpotON port is
-    spoton_roi = frame[int(h*0.3):int(h*0.7), int(w*0.6):int(w*0.8)]
-    
-    # Convert ROIs to grayscale
-    priming_gray = cv2.cvtColor(priming_roi, cv2.COLOR_BGR2GRAY)
-    spoton_gray = cv2.cvtColor(spoton_roi, cv2.COLOR_BGR2GRAY)
-    
-    # Apply thresholding
-    _, priming_thresh = cv2.threshold(priming_gray, 80, 255, cv2.THRESH_BINARY)
-    _, spoton_thresh = cv2.threshold(spoton_gray, 80, 255, cv2.THRESH_BINARY)
-    
-    # Calculate the percentage of white pixels (indicating an open port)
-    priming_white_percent = (cv2.countNonZero(priming_thresh) / (priming_roi.shape[0] * priming_roi.shape[1])) * 100
-    spoton_white_percent = (cv2.countNonZero(spoton_thresh) / (spoton_roi.shape[0] * spoton_roi.shape[1])) * 100
-    
-    # Check if ports are closed based on the percentage of white pixels
-    # When closed, the dark covers will result in fewer white pixels
-    priming_closed = priming_white_percent < 40
-    spoton_closed = spoton_white_percent < 40
-    
-    # Overall flap state - both need to be in same state for simplicity
-    flaps_closed = priming_closed and spoton_closed
-    
-    return {
-        "flaps_closed": flaps_closed,
-        "priming_closed": priming_closed,
-        "spoton_closed": spoton_closed,
-        "priming_roi": (int(w*0.2), int(h*0.3), int(w*0.4), int(h*0.7)),
-        "spoton_roi": (int(w*0.6), int(h*0.3), int(w*0.8), int(h*0.7))
-    }
+# Sub-paths of the default camera's /detection endpoints; a camera with one of
+# these names would be unreachable at /detection/<camera>
+RESERVED_CAMERA_NAMES = ("history", "overlay")
 
-def detect_overflow(frame):
-    """
-    Detect liquid overflow using color detection for liquids.
-    This looks for any liquid outside the expected regions.
-    """
-    # Define region where overflow would be visible
-    h, w = frame.shape[:2]
-    overflow_roi = frame[int(h*0.5):int(h*0.9), int(w*0.1):int(w*0.9)]
-    
-    # Convert to HSV for better color detection
-    hsv = cv2.cvtColor(overflow_roi, cv2.COLOR_BGR2HSV)
-    
-    # Detect blue-ish colors (adjust range based on your actual liquid color)
-    lower_liquid = np.array([90, 50, 50])
-    upper_liquid = np.array([130, 255, 255])
-    mask = cv2.inRange(hsv, lower_liquid, upper_liquid)
-    
-    # Calculate percentage of liquid pixels
-    liquid_pixels = cv2.countNonZero(mask)
-    total_pixels = overflow_roi.shape[0] * overflow_roi.shape[1]
-    liquid_percent = (liquid_pixels / total_pixels) * 100
-    
-    # Determine if overflow is present
-    OVERFLOW_THRESHOLD = 5  # Adjust based on your conditions
-    is_overflowing = liquid_percent > OVERFLOW_THRESHOLD
-    
-    return {
-        "is_overflowing": is_overflowing,
-        "liquid_percent": liquid_percent,
-        "overflow_roi": (int(w*0.1), int(h*0.5), int(w*0.9), int(h*0.9))
-    }
+def check_camera_names(cameras):
+    for name in cameras:
+        if name in RESERVED_CAMERA_NAMES:
+            raise ValueError(f"Camera name {name!r} is reserved: /detection/{name} serves the default camera")
+
+check_camera_names(CAMERAS)
+stations = {name: make_station(name, source) for name, source in CAMERAS.items()}
+default_station = stations[DEFAULT_CAMERA]
+
+# Default camera's stream under its historical module-level name
+broadcaster = default_station.broadcaster
 
 def process_frame(frame):
+    """Process one frame with the default camera's detectors, updating its status"""
+    return default_station.process_frame(frame)
+
+def get_station(camera):
+    station = stations.get(camera)
+    if station is None:
+        abort(404, description=f"Unknown camera {camera!r}")
+    return station
+
+cameras_started = False
+cameras_lock = threading.Lock()
+
+def start_cameras():
     """
-    Process the frame to detect fuel cell components and status.
-    Update to detect:
-    - Fuel cell holes (open/closed)
-    - Syringe/pipette presence
-    - Flap state (closed/open) for both Priming and SpotON port covers
-    - Liquid overflow
+    Start every camera pipeline once. Importing this module does not open
+    the cameras (so batch tools and worker processes can import it); they
+    start when the web app runs or serves its first request.
     """
-    if frame is None:
-        return None, []
-    
-    output = frame.copy()
-    remarks = []
-    
-    # --- 1. Fuel Cell Hole Detection ---
-    holes = detect_fuel_cell_holes(frame)
-    if len(holes) > 0:
-        # Draw detected holes
-        for (center, radius) in holes:
-            cv2.circle(output, center, radius, (0, 255, 0), 2)
-            cv2.circle(output, center, 2, (0, 0, 255), 2)
-        
-        remarks.append(f"Fuel cell holes detected: {len(holes)}")
-        detection_status["fuel_cell_holes"] = "detected"
-    else:
-        remarks.append("Fuel cell holes NOT detected")
-        detection_status["fuel_cell_holes"] = "not detected"
-    
-    # --- 2. Syringe/Pipette Detection ---
-    syringe_contours = detect_syringe(frame)
-    if len(syringe_contours) > 0:
-        # Draw detected syringe outline
-        cv2.drawContours(output, syringe_contours, -1, (255, 0, 0), 2)
-        
-        # Find the largest contour - likely the main body of the syringe
-        largest_contour = max(syringe_contours, key=cv2.contourArea)
-        x, y, w, h = cv2.boundingRect(largest_contour)
-        cv2.rectangle(output, (x, y), (x+w, y+h), (0, 255, 255), 2)
-        
-        remarks.append("Pipette detected")
-        detection_status["pipette"] = "detected"
-    else:
-        remarks.append("Pipette NOT detected")
-        detection_status["pipette"] = "not detected"
-    
-    # --- 3. Flap State Detection ---
-    flap_info = detect_flaps(frame)
-    
-    # Draw ROIs for priming and spotON ports
-    x1, y1, x2, y2 = flap_info["priming_roi"]
-    cv2.rectangle(output, (x1, y1), (x2, y2), (0, 0, 255), 2)
-    cv2.putText(output, f"Priming: {'Closed' if flap_info['priming_closed'] else 'Open'}", 
-                (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-    
-    x1, y1, x2, y2 = flap_info["spoton_roi"]
-    cv2.rectangle(output, (x1, y1), (x2, y2), (0, 0, 255), 2)
-    cv2.putText(output, f"SpotON: {'Closed' if flap_info['spoton_closed'] else 'Open'}", 
-                (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-    
-    # Update overall flap status
-    flap_status = "Closed" if flap_info["flaps_closed"] else "Open"
-    remarks.append(f"Flaps are {flap_status}")
-    detection_status["flaps"] = flap_status
-    
-    # --- 4. Liquid Overflow Detection ---
-    overflow_info = detect_overflow(frame)
-    
-    # Draw overflow ROI
-    x1, y1, x2, y2 = overflow_info["overflow_roi"]
-    cv2.rectangle(output, (x1, y1), (x2, y2), (0, 255, 0), 2)
-    
-    # Update overflow status
-    overflow_status = "Overflowing" if overflow_info["is_overflowing"] else "Normal"
-    cv2.putText(output, f"Overflow: {overflow_status}", (x1, y1-10), 
-                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-    
-    remarks.append(f"Liquid overflow: {overflow_status}")
-    detection_status["overflow"] = overflow_status
-    
-    # --- 5. Overall Evaluation ---
-    # Passing criteria: 
-    # - Flaps are closed (as shown in the reference image)
-    # - No overflow
-    # - Fuel cell holes detected (when open)
-    # - Pipette detected (when present)
-    if (flap_status == "Closed" and 
-        overflow_status == "Normal" and 
-        detection_status["pipette"] == "detected" and 
-        detection_status["fuel_cell_holes"] == "detected"):
-        overall = "PASS"
-    else:
-        overall = "FAIL"
-    
-    cv2.putText(output, f"Overall: {overall}", (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX, 1.0,
-                (0, 255, 0) if overall == "PASS" else (0, 0, 255), 2)
-    
-    remarks.append(f"Overall: {overall}")
-    detection_status["overall"] = overall
-    
-    return output, remarks
-
-def capture_frames():
-    global output_frame, detection_status, lock
-    cap = cv2.VideoCapture(0)
-    
-    if not cap.isOpened():
-        print("Error: Cannot open camera")
-        return
-    
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Error: Unable to fetch frame")
-            break
-        
-        # 1. Process the frame (detect flaps, pipette, overflow, holes)
-        processed_frame, remarks = process_frame(frame)
-        
-        # 2. Update sensor readings (simulated)
-        detection_status["temperature"] = f"{read_temperature()} °C"
-        detection_status["pressure"] = f"{read_pressure()} kPa"
-        detection_status["motion"] = read_motion()
-        detection_status["ultrasonic"] = f"{read_ultrasonic()} cm"
-        
-        # For debugging: print remarks to console
-        for remark in remarks:
-            print(remark)
-        
-        # Update the global frame with a lock
-        with lock:
-            output_frame = processed_frame.copy()
-        
-        time.sleep(1/30.0)  # ~30 FPS
-    
-    cap.release()
-
-# Start capturing frames in a background thread
-capture_thread = threading.Thread(target=capture_frames)
-capture_thread.daemon = True
-capture_thread.start()
-
-def generate_video_stream():
-    global output_frame, lock
-    while True:
-        with lock:
-            if output_frame is None:
-                continue
-            ret, encodedImage = cv2.imencode(".jpg", output_frame)
-            if not ret:
-                continue
-            frame = encodedImage.tobytes()
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-        time.sleep(0.03)
+    global cameras_started
+    with cameras_lock:
+        if cameras_started:
+            return
+        cameras_started = True
+    event_store.start()
+    rollups.start()
+    status_log.start()
+    sensor_service.start()
+    for station in stations.values():
+        station.start()
+
+@app.before_request
+def ensure_cameras_started():
+    start_cameras()
+
+def generate_video_stream(station=None, width=None, quality=None, max_fps=None):
+    # Blocks until a newer encoded frame is available; clients asking for the
+    # same variant share one encoding
+    return (station or default_station).broadcaster.stream(width, quality, max_fps)
 
 @app.route("/video_feed")
-def video_feed():
-    return Response(generate_video_stream(),
+@app.route("/video_feed/<camera>")
+def video_feed(camera=DEFAULT_CAMERA):
+    # Optional ?width=, ?quality= and ?fps= pick a smaller / cheaper stream variant
+    args = request.args
+    return Response(generate_video_stream(get_station(camera), args.get("width", None, type=int),
+                                          args.get("quality", None, type=int),
+                                          args.get("fps", None, type=int)),
                     mimetype="multipart/x-mixed-replace; boundary=frame")
 
 @app.route("/detection")
-def detection():
-    with lock:
-        status = detection_status.copy()
-    return jsonify(status)
+@app.route("/detection/<camera>")
+def detection(camera=DEFAULT_CAMERA):
+    snapshot = get_station(camera).board.current()
+    return jsonify(dict(snapshot.status, version=snapshot.version, timestamp=snapshot.timestamp))
+
+@app.route("/detection/history")
+@app.route("/detection/<camera>/history")
+def detection_history(camera=DEFAULT_CAMERA):
+    """Detection states newer than ?since=<version>, oldest first (at most ?limit=)"""
+    station = get_station(camera)
+    since = request.args.get("since", 0, type=int)
+    limit = request.args.get("limit", None, type=int)
+    entries, truncated = station.history(since, limit)
+    return jsonify({"version": station.board.current().version, "entries": entries,
+                    "truncated": truncated})
+
+@app.route("/detection/overlay")
+@app.route("/detection/<camera>/overlay")
+def detection_overlay(camera=DEFAULT_CAMERA):
+    """Latest frame's detections (holes, syringe boxes, flap / overflow ROIs) for client-side drawing"""
+    overlay = get_station(camera).overlay()
+    if overlay is None:
+        abort(404)
+    return jsonify(overlay)
+
+@app.route("/events")
+@app.route("/events/<camera>")
+def events(camera=DEFAULT_CAMERA):
+    """Server-Sent Events stream of detection and sensor changes"""
+    board = get_station(camera).board
+    return Response(status_events(board, SENSOR_PUSH_INTERVAL), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/cameras")
+def cameras():
+    return jsonify({"default": DEFAULT_CAMERA, "cameras": list(stations)})
+
+@app.route("/pipeline")
+@app.route("/pipeline/<camera>")
+def pipeline_stats(camera=DEFAULT_CAMERA):
+    return jsonify(get_station(camera).stats())
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus scrape endpoint: per-camera stage latencies, frame and client counts"""
+    return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
 
 @app.route("/")
 def index():
@@ -530,13 +267,124 @@ def index():
 def analytics():
     return render_template("analytics.html")
 
+@app.route("/analytics/rollups")
+def analytics_rollups():
+    """
+    Pass/fail, failure and sensor rollups for ?start=&end= (epoch seconds, default
+    the last 24 hours), optionally ?resolution=minute|hour|day and ?camera=
+    """
+    args = request.args
+    end = args.get("end", None, type=float)
+    if end is None:
+        end = time.time()
+    start = args.get("start", None, type=float)
+    if start is None:
+        start = end - 86400
+    if start > end:
+        abort(400, description="start must not be after end")
+    resolution = args.get("resolution") or None
+    if resolution is not None and resolution not in ROLLUP_RESOLUTIONS:
+        abort(400, description=f"Unknown resolution {resolution!r}")
+    return jsonify(rollups.query(start, end, resolution, args.get("camera") or None))
+
+@app.route("/sensors")
+def sensors():
+    """Rate, unit, latest reading and error count of every sensor"""
+    return jsonify(sensor_service.describe())
+
+@app.route("/sensors/<name>")
+def sensor_series(name):
+    """
+    Readings of one sensor over the last ?window= seconds (default 300),
+    downsampled to at most ?points= buckets (default 300) of mean / min / max
+    """
+    if name not in sensor_service.sensors:
+        abort(404, description=f"Unknown sensor {name!r}")
+    args = request.args
+    end = time.time()
+    start = end - args.get("window", 300.0, type=float)
+    points = max(1, args.get("points", 300, type=int))
+    return jsonify(sensor_service.series(name, start, end, points))
+
 @app.route("/history")
 def history():
     return render_template("history.html")
 
+def event_filters(args):
+    """Event store filters from the start / end (epoch seconds), type, component, status and camera parameters"""
+    return {
+        "start": args.get("start", None, type=float),
+        "end": args.get("end", None, type=float),
+        "event_type": args.get("type") or None,
+        "component": args.get("component") or None,
+        "status": args.get("status") or None,
+        "camera": args.get("camera") or None,
+    }
+
+@app.route("/history/events")
+def history_events():
+    """
+    One page of stored events, newest first (event_filters plus per_page).
+    The response's ``next`` cursor, passed back as ?before=, gives the
+    following page; ``total`` is capped (see ``total_capped``).
+    """
+    args = request.args
+    before = args.get("before")
+    if before:
+        try:
+            timestamp, event_id = before.split(",")
+            before = (float(timestamp), int(event_id))
+        except ValueError:
+            abort(400, description=f"Invalid cursor {before!r}")
+    page = event_store.query(
+        before=before or None,
+        per_page=max(1, min(args.get("per_page", 50, type=int), 500)),
+        **event_filters(args),
+    )
+    if page["next"] is not None:
+        page["next"] = f"{page['next'][0]!r},{page['next'][1]}"
+    return jsonify(page)
+
+@app.route("/history/export")
+def history_export():
+    """
+    Stream every matching event (event_filters), oldest first, as
+    ?format=csv|ndjson, gzip-compressed with ?gzip=1. Rows are read and
+    sent in chunks, so exports of any size use constant memory.
+    """
+    args = request.args
+    fmt = args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        abort(400, description=f"Unknown export format {fmt!r}")
+    compress = args.get("gzip", "0") not in ("0", "", "false")
+
+    filename = f"events-{time.strftime('%Y%m%d-%H%M%S')}.{fmt}" + (".gz" if compress else "")
+    mimetype = "application/gzip" if compress else ("text/csv" if fmt == "csv" else "application/x-ndjson")
+    body = export_events(event_store.iter_events(**event_filters(args)), fmt, compress)
+    return Response(body, mimetype=mimetype,
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
 @app.route("/settings")
 def settings():
     return render_template("settings.html")
 
+@app.route("/settings/inspection", methods=["GET", "POST"])
+def inspection_settings():
+    """
+    Detection thresholds and regions. POST a JSON object of changes to apply
+    them to every camera (and camera / detector process) within about a second,
+    without restarting the pipelines.
+    """
+    if request.method == "POST":
+        changes = request.get_json(silent=True)
+        if not isinstance(changes, dict):
+            abort(400, description="Expected a JSON object of settings")
+        try:
+            inspection_profile.SETTINGS.save(changes)
+        except (TypeError, ValueError) as e:
+            abort(400, description=str(e))
+    return jsonify(inspection_profile.SETTINGS.current()._asdict())
+
 if __name__ == '__main__':
+    start_cameras()
     app.run(host="0.0.0.0", port=9000, threaded=True)
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""
+Offline batch inspection over recorded footage.
+
+Streams frames from a video file or an image folder through the detectors
+on a pool of worker processes and writes one JSON record per frame (JSON
+Lines), without a camera, Flask or real-time pacing:
+
+    python batch.py shift.mp4 -o shift.jsonl --workers 8
+    python batch.py captures/ -o captures.jsonl --pyramid-levels 1
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from inspection import describe, evaluate
+from vision import run_detectors, run_detectors_pyramid
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+def list_images(folder):
+    """Image files in a folder, in name order"""
+    names = sorted(n for n in os.listdir(folder) if n.lower().endswith(IMAGE_EXTENSIONS))
+    return [os.path.join(folder, n) for n in names]
+
+
+def inspect_frame(frame, pyramid_levels=0):
+    """
+    Run every detector on one frame and summarize it.
+
+    Detection is stateless here (no motion cache or ROI tracking), so every
+    frame gets a full scan and results do not depend on how frames are
+    split across workers.
+    """
+    if pyramid_levels > 0:
+        results = run_detectors_pyramid(frame, pyramid_levels)
+    else:
+        results = run_detectors(frame)
+    fields, remarks = evaluate(results)
+    record = describe(results, fields)
+    record["remarks"] = remarks
+    return record
+
+
+def _init_worker():
+    # Parallelism comes from the process pool; OpenCV's own thread pool in
+    # every worker would only oversubscribe the cores
+    cv2.setNumThreads(1)
+
+
+def _seek(cap, path, start):
+    """
+    Position ``cap`` exactly at frame ``start``.
+
+    Seeking snaps to a keyframe for many codecs, so the position is checked
+    and the remaining frames are decoded forward; when the backend landed
+    past ``start`` (or cannot tell), decoding restarts from the beginning.
+    """
+    if start == 0:
+        return cap
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    if not 0 <= position <= start:
+        cap.release()
+        cap = cv2.VideoCapture(path)
+        position = 0
+    for _ in range(start - position):
+        if not cap.grab():
+            break
+    return cap
+
+
+def read_segment(path, start, count=None):
+    """
+    Frames ``start`` to ``start + count`` of a video, to the end of the video
+    when ``count`` is None.
+
+    Yields:
+        tuple: (frame index, timestamp in seconds, frame)
+    """
+    cap = _seek(cv2.VideoCapture(path), path, start)
+    index = start
+    try:
+        while count is None or index < start + count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield index, round(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0, 3), frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def _inspect_video_segment(path, start, count, pyramid_levels):
+    # Each worker decodes its own contiguous segment, so frames never cross processes
+    records = []
+    for index, timestamp, frame in read_segment(path, start, count):
+        record = {"frame": index, "timestamp": timestamp}
+        record.update(inspect_frame(frame, pyramid_levels))
+        records.append(record)
+    return records
+
+
+def _inspect_images(paths, start, pyramid_levels):
+    records = []
+    for index, path in enumerate(paths, start):
+        frame = cv2.imread(path)
+        record = {"frame": index, "image": os.path.basename(path)}
+        if frame is None:
+            record["error"] = "unreadable image"
+        else:
+            record.update(inspect_frame(frame, pyramid_levels))
+        records.append(record)
+    return records
+
+
+def plan_tasks(source, segment):
+    """
+    Split a source into independent work items.
+
+    Returns:
+        list: (function, args) tuples, in frame order
+    """
+    if os.path.isdir(source):
+        paths = list_images(source)
+        return [(_inspect_images, (paths[i:i + segment], i))
+                for i in range(0, len(paths), segment)]
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video {source!r}")
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if total <= 0:
+        # Frame count unknown (e.g. some streams): decode everything in one task
+        return [(_inspect_video_segment, (source, 0, None))]
+    # The frame count is only the container's estimate: the last segment reads
+    # to the end of the video, and segments past the real end come back empty
+    starts = range(0, total, segment)
+    return [(_inspect_video_segment, (source, i, segment if i != starts[-1] else None))
+            for i in starts]
+
+
+def run_batch(source, output, workers=None, segment=150, pyramid_levels=0, max_pending=None):
+    """
+    Inspect every frame of ``source`` and write JSON Lines records to ``output``.
+
+    Records are written in frame order as segments complete; at most
+    ``max_pending`` segments are in flight, which bounds memory use.
+
+    Returns:
+        int: Number of records written
+    """
+    tasks = plan_tasks(source, segment)
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    written = 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor, open(output, "w") as out:
+        pending = []
+        next_task = 0
+        while next_task < len(tasks) or pending:
+            while next_task < len(tasks) and len(pending) < max_pending:
+                func, args = tasks[next_task]
+                pending.append(executor.submit(func, *args, pyramid_levels))
+                next_task += 1
+            for record in pending.pop(0).result():
+                out.write(json.dumps(record) + "\n")
+                written += 1
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline batch inspection of recorded footage")
+    parser.add_argument("source", help="Video file or folder of images")
+    parser.add_argument("-o", "--output", required=True, help="JSON Lines output file")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("--segment", type=int, default=150,
+                        help="Frames per work item (default: 150)")
+    parser.add_argument("--pyramid-levels", type=int, default=0,
+                        help="Coarse-to-fine pyramid levels (default: 0, full resolution)")
+    args = parser.parse_args(argv)
+
+    start = time.monotonic()
+    count = run_batch(args.source, args.output, workers=args.workers,
+                      segment=args.segment, pyramid_levels=args.pyramid_levels)
+    elapsed = time.monotonic() - start
+    print(f"Inspected {count} frames in {elapsed:.1f} s "
+          f"({count / elapsed if elapsed > 0 else 0:.1f} frames/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Detector benchmark on deterministic synthetic flow-cell scenes.
+
+Generates scenes at several resolutions and clutter levels (a tray of
+holes, a syringe-like barrel with tick marks, a blue overflow puddle and
+random bench clutter), times every detector and the full process_frame,
+and reports latency percentiles. No camera is needed.
+
+    python benchmark.py                               # report only
+    python benchmark.py --save-baseline bench.json    # record a baseline
+    python benchmark.py --baseline bench.json         # fail on regressions
+
+Exits with status 1 when any stage's median latency regresses past the
+stored baseline by more than the tolerance.
+"""
+import argparse
+import json
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from inspection import annotate, evaluate
+from vision import detect_flaps, detect_overflow, detect_syringe, find_fuel_cell_holes, run_detectors
+
+RESOLUTIONS = {
+    "720p": (720, 1280),
+    "1080p": (1080, 1920),
+    "4k": (2160, 3840),
+}
+
+# Clutter items per 720p-sized area of the scene
+CLUTTER_LEVELS = {
+    "low": 0,
+    "medium": 150,
+    "high": 600,
+}
+
+
+def synthetic_scene(height, width, clutter=0, seed=0):
+    """
+    Deterministic synthetic bench scene.
+
+    Contents are laid out relative to the frame size so every resolution
+    shows the same scene; tick marks keep a fixed pixel size like real
+    printed markings seen by a higher resolution camera.
+    """
+    rng = np.random.default_rng(seed)
+    s = height / 720.0
+    frame = np.full((height, width, 3), 200, np.uint8)
+    frame = cv2.add(frame, rng.integers(0, 2, frame.shape, dtype=np.uint8))
+
+    # Random bench clutter: outlines of boxes and stray lines in assorted grays
+    items = int(clutter * (height * width) / (720 * 1280))
+    for _ in range(items):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        size = rng.integers(3, 40, size=2) * s
+        shade = (int(rng.integers(0, 255)),) * 3
+        if rng.random() < 0.5:
+            cv2.rectangle(frame, (x, y), (x + int(size[0]), y + int(size[1])), shade, int(rng.integers(1, 3)))
+        else:
+            cv2.line(frame, (x, y), (x + int(size[0]), y - int(size[1])), shade, 1)
+
+    # Tray of open holes in the upper right
+    for row in range(4):
+        for col in range(8):
+            center = (int((800 + col * 50) * s), int((80 + row * 50) * s))
+            cv2.circle(frame, center, int(12 * s), (25, 25, 25), -1)
+
+    # Syringe-like barrel: open-topped outline with tick marks inside
+    x0, top, bottom, barrel = int(300 * s), int(150 * s), int(550 * s), int(70 * s)
+    cv2.polylines(frame, [np.array([(x0, top), (x0, bottom), (x0 + barrel, bottom), (x0 + barrel, top)])],
+                  False, (40, 40, 40), max(3, int(3 * s)))
+    for y in range(top + int(20 * s), bottom - int(20 * s), max(12, int(18 * s))):
+        cv2.line(frame, (x0 + int(15 * s), y), (x0 + int(15 * s) + 20, y), (30, 30, 30), 2)
+
+    # Blue liquid puddle in the overflow region
+    cv2.ellipse(frame, (int(900 * s), int(560 * s)), (int(150 * s), int(50 * s)), 0, 0, 360, (200, 110, 30), -1)
+    return frame
+
+
+def process_frame(frame):
+    """Full stateless frame processing: all detectors, verdicts and overlays"""
+    results = run_detectors(frame)
+    fields, remarks = evaluate(results)
+    return annotate(frame, results, fields), remarks
+
+
+STAGES = {
+    "holes": find_fuel_cell_holes,
+    "syringe": detect_syringe,
+    "flaps": detect_flaps,
+    "overflow": detect_overflow,
+    "process_frame": process_frame,
+}
+
+
+def time_stage(func, frame, repeat, warmup):
+    """
+    Returns:
+        numpy.ndarray: Per-call latencies in milliseconds
+    """
+    for _ in range(warmup):
+        func(frame)
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(frame)
+        samples[i] = (time.perf_counter() - start) * 1000.0
+    return samples
+
+
+def run_benchmark(resolutions, clutter_levels, repeat=30, warmup=3, seed=0):
+    """
+    Returns:
+        dict: "<stage>@<resolution>/<clutter>" -> latency percentiles in ms
+            plus what the detectors found in the scene
+    """
+    report = {}
+    for res in resolutions:
+        height, width = RESOLUTIONS[res]
+        for clutter in clutter_levels:
+            frame = synthetic_scene(height, width, CLUTTER_LEVELS[clutter], seed)
+            fields, _ = evaluate(run_detectors(frame))
+            for stage, func in STAGES.items():
+                samples = time_stage(func, frame, repeat, warmup)
+                report[f"{stage}@{res}/{clutter}"] = {
+                    "p50": round(float(np.percentile(samples, 50)), 3),
+                    "p90": round(float(np.percentile(samples, 90)), 3),
+                    "p99": round(float(np.percentile(samples, 99)), 3),
+                    "max": round(float(samples.max()), 3),
+                    "status": fields,
+                }
+    return report
+
+
+def compare(report, baseline, tolerance, min_delta):
+    """
+    Returns:
+        list: (key, baseline p50, current p50) for every regressed stage
+    """
+    regressions = []
+    for key, current in report.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        limit = max(base["p50"] * (1 + tolerance), base["p50"] + min_delta)
+        if current["p50"] > limit:
+            regressions.append((key, base["p50"], current["p50"]))
+    return regressions
+
+
+def print_report(report, baseline=None):
+    print(f"{'stage':<32}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'base p50':>10}")
+    for key, row in report.items():
+        base = baseline.get(key, {}).get("p50") if baseline else None
+        base_text = f"{base:>10.2f}" if base is not None else f"{'-':>10}"
+        print(f"{key:<32}{row['p50']:>9.2f}{row['p90']:>9.2f}{row['p99']:>9.2f}{row['max']:>9.2f}{base_text}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the detectors on synthetic scenes")
+    parser.add_argument("--resolutions", nargs="+", default=["720p", "1080p"], choices=RESOLUTIONS)
+    parser.add_argument("--clutter", nargs="+", default=list(CLUTTER_LEVELS), choices=CLUTTER_LEVELS)
+    parser.add_argument("--repeat", type=int, default=30, help="Timed runs per stage (default: 30)")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed runs per stage (default: 3)")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="Write this run as a baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative p50 regression (default: 0.2)")
+    parser.add_argument("--min-delta", type=float, default=0.5,
+                        help="Regressions smaller than this many ms are ignored (default: 0.5)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.resolutions, args.clutter, args.repeat, args.warmup)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance, args.min_delta)
+        for key, base, current in regressions:
+            print(f"REGRESSION {key}: p50 {base:.2f} ms -> {current:.2f} ms")
+        if regressions:
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
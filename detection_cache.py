@@ -0,0 +1,95 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class DetectionCache:
+    """
+    Motion-gated, per-detector result cache.
+
+    Each frame is reduced to a small grayscale thumbnail. A detector is only
+    re-run when the thumbnail differs from the one its cached result was
+    computed on, or when that result is older than the detector's maximum
+    staleness; otherwise the cached result is reused. Comparing against the
+    thumbnail of the detector's own last run (rather than the previous
+    frame) means slow drift still triggers a refresh, and the first frame
+    in which something moves is always processed.
+    """
+
+    def __init__(self, max_staleness=None, default_staleness=1.0, thumb_width=160,
+                 pixel_delta=12, changed_fraction=0.002):
+        """
+        Args:
+            max_staleness (dict): Maximum age in seconds of a cached result, per detector name
+            default_staleness (float): Maximum age for detectors not in ``max_staleness``
+            thumb_width (int): Width of the downsampled change-detection thumbnail
+            pixel_delta (int): Gray-level difference for a thumbnail pixel to count as changed
+            changed_fraction (float): Share of changed thumbnail pixels that counts as motion
+        """
+        self.max_staleness = dict(max_staleness or {})
+        self.default_staleness = default_staleness
+        self.thumb_width = thumb_width
+        self.pixel_delta = pixel_delta
+        self.changed_fraction = changed_fraction
+
+        # name -> (result, thumbnail it was computed on, monotonic time)
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        size = (self.thumb_width, max(1, round(h * self.thumb_width / w)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def _changed(self, thumb, reference):
+        if reference.shape != thumb.shape:
+            return True
+        diff = cv2.absdiff(thumb, reference)
+        changed = np.count_nonzero(diff > self.pixel_delta)
+        return changed > self.changed_fraction * diff.size
+
+    def run(self, frame, run_detectors, names):
+        """
+        Return results for ``names``, re-running only the detectors that are due.
+
+        Args:
+            frame (numpy.ndarray): Current frame
+            run_detectors (callable): ``run_detectors(frame, names)`` returning
+                a dict of fresh results for the given detector names
+            names (list): Detector names whose results are needed
+
+        Returns:
+            dict: Result per detector name, cached or fresh
+        """
+        now = time.monotonic()
+        thumb = self._thumbnail(frame)
+
+        due = []
+        changed = {}  # detectors that last ran on the same frame share one comparison
+        for name in names:
+            entry = self._entries.get(name)
+            if entry is None or now - entry[2] > self.max_staleness.get(name, self.default_staleness):
+                due.append(name)
+                continue
+            reference = entry[1]
+            if id(reference) not in changed:
+                changed[id(reference)] = self._changed(thumb, reference)
+            if changed[id(reference)]:
+                due.append(name)
+
+        self.misses += len(due)
+        self.hits += len(names) - len(due)
+        if due:
+            for name, result in run_detectors(frame, due).items():
+                self._entries[name] = (result, thumb, now)
+
+        return {name: self._entries[name][0] for name in names}
+
+    def clear(self):
+        """Drop every cached result so the next frame runs all detectors"""
+        self._entries.clear()
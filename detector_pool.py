@@ -0,0 +1,117 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from vision import DETECTORS, run_detectors_pyramid
+
+# Shared memory blocks attached in this worker process, keyed by block name
+_attached = {}
+
+
+def _attach(name, shape, dtype):
+    """Map the parent's shared frame buffer into this worker without copying it"""
+    shm = _attached.get(name)
+    if shm is None:
+        # The parent reallocated (new frame size): drop blocks we no longer need
+        for old in _attached.values():
+            old.close()
+        _attached.clear()
+        shm = shared_memory.SharedMemory(name=name)
+        _attached[name] = shm
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _run_detector(detector, shm_name, shape, dtype, pyramid_levels):
+    # Returns (result, seconds spent in the detector) so the parent can export timings
+    frame = _attach(shm_name, shape, dtype)
+    start = time.perf_counter()
+    if pyramid_levels > 0:
+        result = run_detectors_pyramid(frame, pyramid_levels, [detector])[detector]
+    else:
+        result = DETECTORS[detector](frame)
+    return result, time.perf_counter() - start
+
+
+class ProcessDetectorPool:
+    """
+    Runs the independent detectors in parallel worker processes.
+
+    Each frame is copied once into a shared memory block that the workers
+    map directly, so only the detector name and the (small) results cross
+    the process boundary. Every worker builds its own FrameContext, since
+    cached planes cannot be shared between processes.
+    """
+
+    def __init__(self, workers=None, detectors=None, pyramid_levels=0):
+        """
+        Args:
+            workers (int): Number of worker processes, defaults to one per detector
+            detectors (list): Detector names from vision.DETECTORS to run
+            pyramid_levels (int): Run coarse-to-fine pyramid detection this many
+                levels down (see vision.run_detectors_pyramid); 0 runs at full resolution
+        """
+        self.detectors = list(detectors or DETECTORS)
+        self.pyramid_levels = pyramid_levels
+        # Spawn rather than fork: the parent runs capture and Flask threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers or len(self.detectors),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self._shm = None
+        self._shape = None
+        self._dtype = None
+        self._frame = None
+
+    def _stage(self, frame):
+        """Copy the frame into shared memory, reallocating when its size changes"""
+        if self._shm is None or frame.shape != self._shape or frame.dtype != self._dtype:
+            self._release()
+            self._shm = shared_memory.SharedMemory(create=True, size=frame.nbytes)
+            self._shape = frame.shape
+            self._dtype = frame.dtype
+            self._frame = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self._shm.buf)
+        self._frame[...] = frame
+
+    def run(self, frame, names=None, timings=None):
+        """
+        Run the pool's detectors (or the ``names`` subset of them) on one frame.
+
+        Blocks until all workers are done, so the shared buffer is never
+        overwritten while a worker is still reading it.
+
+        Args:
+            timings (dict): If given, each detector's run time in its worker
+                is added to ``timings[name]``
+
+        Returns:
+            dict: Raw detector output keyed like vision.DETECTORS
+        """
+        self._stage(frame)
+        futures = {
+            name: self._executor.submit(
+                _run_detector, name, self._shm.name, self._shape, self._dtype.str,
+                self.pyramid_levels,
+            )
+            for name in (self.detectors if names is None else names)
+        }
+        results = {}
+        for name, future in futures.items():
+            results[name], elapsed = future.result()
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + elapsed
+        return results
+
+    def _release(self):
+        if self._shm is not None:
+            self._frame = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def close(self):
+        """Shut down the workers and free the shared frame buffer"""
+        self._executor.shutdown(wait=True)
+        self._release()
@@ -0,0 +1,349 @@
+"""
+Append-only inspection event log in SQLite.
+
+Producers (the detection pipeline, the robot) only put events on an
+in-memory queue; a single writer thread inserts them in batches, one
+transaction per batch, so neither frame processing nor robot moves wait on
+disk I/O. The database runs in WAL mode so the web app can query while the
+writer appends, including from other processes (e.g. robot.py).
+"""
+import csv
+import io
+import json
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_PATH = "events.db"
+
+# Most matching events ``EventStore.query`` counts for a page's total
+MAX_COUNT = 10000
+
+# Event types, matching the history page filter
+EVENT_TYPES = ("error", "warning", "status", "success", "maintenance", "robot")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    camera TEXT,
+    event_type TEXT NOT NULL,
+    component TEXT NOT NULL,
+    status TEXT NOT NULL,
+    description TEXT NOT NULL,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS events_timestamp ON events (timestamp);
+CREATE INDEX IF NOT EXISTS events_type_timestamp ON events (event_type, timestamp);
+CREATE INDEX IF NOT EXISTS events_component_timestamp ON events (component, timestamp);
+CREATE INDEX IF NOT EXISTS events_status_timestamp ON events (status, timestamp);
+"""
+
+_COLUMNS = ("id", "timestamp", "camera", "event_type", "component", "status", "description", "details")
+
+# Detection status field -> (component name, value that passes inspection)
+COMPONENTS = {
+    "fuel_cell_holes": ("Fuel Cell Holes", "detected"),
+    "pipette": ("Pipette", "detected"),
+    "flaps": ("Flaps", "Closed"),
+    "overflow": ("Overflow", "Normal"),
+}
+
+# Query filters: argument -> column
+_FILTERS = {
+    "event_type": "event_type",
+    "component": "component",
+    "status": "status",
+    "camera": "camera",
+}
+
+
+def connect(path):
+    """Writer connection to an event database, in WAL mode"""
+    conn = sqlite3.connect(path, timeout=10.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL keeps committed transactions durable across crashes of the app;
+    # NORMAL only risks the last batch on power loss, which is fine for an event log
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class EventStore:
+    """
+    Persistent, indexed store of inspection events with asynchronous batched writes.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, batch_size=500, flush_interval=0.5, max_pending=100000):
+        """
+        Args:
+            path (str): SQLite database file
+            batch_size (int): Most events inserted per transaction
+            flush_interval (float): Seconds the writer waits to fill a batch
+            max_pending (int): Events queued before new ones are dropped
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(max_pending)
+        self._thread = None
+        self._started = threading.Lock()
+
+    # ----------------- Writing -----------------
+    def start(self):
+        """Create the schema and start the writer thread (idempotent)"""
+        with self._started:
+            if self._thread is not None:
+                return
+            conn = connect(self.path)
+            conn.executescript(_SCHEMA)
+            conn.close()
+            self._thread = threading.Thread(target=self._write_loop, name="event-store", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Write out every queued event and stop the writer"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def record(self, event_type, component, status, description, camera=None, details=None,
+               timestamp=None):
+        """
+        Queue one event for writing; never blocks.
+
+        Returns:
+            bool: False if the queue was full and the event was dropped
+        """
+        row = (timestamp if timestamp is not None else time.time(), camera, event_type, component,
+               status, description, json.dumps(details) if details is not None else None)
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def record_transitions(self, camera, previous, status, timestamp=None):
+        """
+        Queue an event for every inspected component, and the overall verdict,
+        whose value differs between two detection states.
+        """
+        for field, (component, passing) in COMPONENTS.items():
+            value = status.get(field, "unknown")
+            if value == "unknown" or value == previous.get(field):
+                continue
+            ok = value == passing
+            self.record("status", component, "PASS" if ok else "FAIL",
+                        f"{component} {value}", camera, {"from": previous.get(field), "to": value},
+                        timestamp)
+
+        overall = status.get("overall", "unknown")
+        if overall != "unknown" and overall != previous.get("overall"):
+            failing = [COMPONENTS[f][0] for f, (_, passing) in COMPONENTS.items()
+                       if status.get(f) != passing]
+            description = ("Inspection passed" if overall == "PASS"
+                           else "Inspection failed: " + ", ".join(failing))
+            self.record("success" if overall == "PASS" else "error", "System", overall,
+                        description, camera, {"from": previous.get("overall"), "to": overall},
+                        timestamp)
+
+    def _write_loop(self):
+        conn = connect(self.path)
+        try:
+            while True:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                # Gather more events until the batch is full or the flush interval is up
+                while batch[-1] is not None and len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                                     else self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                done = batch[-1] is None
+                rows = [row for row in batch if row is not None]
+                if rows:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO events (timestamp, camera, event_type, component, status, "
+                            "description, details) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                    self.written += len(rows)
+                if done:
+                    return
+        finally:
+            conn.close()
+
+    # ----------------- Queries -----------------
+    @staticmethod
+    def _where(start, end, filters):
+        where, params = [], []
+        if start is not None:
+            where.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            where.append("timestamp < ?")
+            params.append(end)
+        for name, value in filters.items():
+            if name not in _FILTERS:
+                raise ValueError(f"Unknown event filter {name!r}")
+            if value is not None:
+                where.append(f"{_FILTERS[name]} = ?")
+                params.append(value)
+        return where, params
+
+    def query(self, start=None, end=None, before=None, per_page=50, max_count=MAX_COUNT, **filters):
+        """
+        One page of events, newest first.
+
+        Pages are keyset-paginated: ``before`` is the ``next`` cursor of the
+        previous page, so every page costs one index search whatever its
+        depth in the log.
+
+        Args:
+            start (float): Earliest timestamp (inclusive), epoch seconds
+            end (float): Latest timestamp (exclusive), epoch seconds
+            before (tuple): (timestamp, id) cursor; only older events are returned
+            per_page (int): Events per page
+            max_count (int): Most matching events counted for ``total``
+            **filters: Exact matches on event_type, component, status or camera
+
+        Returns:
+            dict: ``events`` (list of dicts), ``per_page``, ``next`` (cursor of the
+                following page, None on the last one) and ``total`` matching events
+                (all of them, not only those before the cursor), at most
+                ``max_count``, with ``total_capped`` set when there are more
+        """
+        where, params = self._where(start, end, filters)
+        clause = " WHERE " + " AND ".join(where) if where else ""
+        sql, page_params = self._keyset_query(where, params, before, per_page + 1, descending=True)
+
+        conn = sqlite3.connect(self.path, timeout=10.0)
+        try:
+            # Counting stops at max_count, so it stays cheap on a months-long log
+            total = conn.execute(f"SELECT COUNT(*) FROM (SELECT 1 FROM events{clause} LIMIT ?)",
+                                 params + [max_count + 1]).fetchone()[0]
+            rows = conn.execute(sql, page_params).fetchall()
+        except sqlite3.OperationalError as e:
+            # Nothing written yet: the schema does not exist until start()
+            if "no such table" not in str(e):
+                raise
+            total, rows = 0, []
+        finally:
+            conn.close()
+
+        # The extra row only tells whether there is a next page
+        more = len(rows) > per_page
+        rows = rows[:per_page]
+        return {"events": [_event(row) for row in rows], "per_page": per_page,
+                "next": (rows[-1][1], rows[-1][0]) if more else None,
+                "total": min(total, max_count), "total_capped": total > max_count}
+
+    def iter_events(self, start=None, end=None, chunk_size=1000, **filters):
+        """
+        Every matching event, oldest first, read in chunks of ``chunk_size``.
+
+        Each chunk is its own short query continuing after the last (timestamp,
+        id) seen, so memory stays bounded and no read transaction is held open
+        while the caller is busy with a chunk (e.g. sending it to a client).
+
+        Yields:
+            dict: One event, as in ``query()``
+        """
+        where, params = self._where(start, end, filters)
+        conn = sqlite3.connect(self.path, timeout=10.0)
+        try:
+            after = None
+            while True:
+                sql, chunk_params = self._keyset_query(where, params, after, chunk_size)
+                try:
+                    rows = conn.execute(sql, chunk_params).fetchall()
+                except sqlite3.OperationalError as e:
+                    if "no such table" not in str(e):
+                        raise
+                    return
+                for row in rows:
+                    yield _event(row)
+                if len(rows) < chunk_size:
+                    return
+                after = (rows[-1][1], rows[-1][0])
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _keyset_query(where, params, cursor, limit, descending=False):
+        """
+        SQL and parameters of the ``limit`` events after the (timestamp, id)
+        ``cursor`` in (timestamp, id) order, or before it when ``descending``
+        """
+        where, params = list(where), list(params)
+        if cursor is not None:
+            # Row-value comparison, so the page starts with an index search on
+            # events_timestamp instead of scanning it from the beginning
+            where.append(f"(timestamp, id) {'<' if descending else '>'} (?, ?)")
+            params += [cursor[0], cursor[1]]
+        clause = " WHERE " + " AND ".join(where) if where else ""
+        order = "timestamp DESC, id DESC" if descending else "timestamp, id"
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM events{clause} ORDER BY {order} LIMIT ?"
+        return sql, params + [limit]
+
+
+def _event(row):
+    event = dict(zip(_COLUMNS, row))
+    event["details"] = json.loads(event["details"]) if event["details"] else None
+    return event
+
+
+EXPORT_FORMATS = ("csv", "ndjson")
+
+
+def export_events(events, fmt="csv", compress=False, chunk_bytes=64 * 1024):
+    """
+    Serialize events as CSV or newline-delimited JSON, chunk by chunk.
+
+    Args:
+        events: Iterable of event dicts (e.g. ``EventStore.iter_events()``)
+        fmt (str): "csv" or "ndjson"
+        compress (bool): Gzip the output on the fly
+        chunk_bytes (int): Approximate size of each yielded chunk before compression
+
+    Yields:
+        bytes: Output chunks; memory use does not grow with the number of events
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {EXPORT_FORMATS}")
+    # wbits=31: gzip container rather than a raw zlib stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(_COLUMNS)
+
+    def take():
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor is not None else data
+
+    for event in events:
+        if writer is not None:
+            details = event["details"]
+            writer.writerow([event[c] if c != "details" else (json.dumps(details) if details else "")
+                             for c in _COLUMNS])
+        else:
+            buffer.write(json.dumps(event) + "\n")
+        if buffer.tell() >= chunk_bytes:
+            chunk = take()
+            if chunk:
+                yield chunk
+
+    chunk = take()
+    if compressor is not None:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
@@ -0,0 +1,147 @@
+import cv2
+import numpy as np
+
+
+def evaluate(results):
+    """
+    Turn raw detector output into status fields and operator remarks.
+
+    Args:
+        results (dict): Detector output keyed like vision.DETECTORS
+
+    Returns:
+        tuple: (fields, remarks) where ``fields`` holds the fuel_cell_holes,
+            pipette, flaps, overflow and overall status values
+    """
+    fields = {}
+    remarks = []
+
+    # --- 1. Fuel Cell Hole Detection ---
+    holes = results["fuel_cell_holes"]
+    if len(holes) > 0:
+        remarks.append(f"Fuel cell holes detected: {len(holes)}")
+        fields["fuel_cell_holes"] = "detected"
+    else:
+        remarks.append("Fuel cell holes NOT detected")
+        fields["fuel_cell_holes"] = "not detected"
+
+    # --- 2. Syringe/Pipette Detection ---
+    if len(results["pipette"]) > 0:
+        remarks.append("Pipette detected")
+        fields["pipette"] = "detected"
+    else:
+        remarks.append("Pipette NOT detected")
+        fields["pipette"] = "not detected"
+
+    # --- 3. Flap State Detection ---
+    flap_status = "Closed" if results["flaps"]["flaps_closed"] else "Open"
+    remarks.append(f"Flaps are {flap_status}")
+    fields["flaps"] = flap_status
+
+    # --- 4. Liquid Overflow Detection ---
+    overflow_status = "Overflowing" if results["overflow"]["is_overflowing"] else "Normal"
+    remarks.append(f"Liquid overflow: {overflow_status}")
+    fields["overflow"] = overflow_status
+
+    # --- 5. Overall Evaluation ---
+    # Passing criteria:
+    # - Flaps are closed (as shown in the reference image)
+    # - No overflow
+    # - Fuel cell holes detected (when open)
+    # - Pipette detected (when present)
+    if (flap_status == "Closed" and
+        overflow_status == "Normal" and
+        fields["pipette"] == "detected" and
+        fields["fuel_cell_holes"] == "detected"):
+        overall = "PASS"
+    else:
+        overall = "FAIL"
+    remarks.append(f"Overall: {overall}")
+    fields["overall"] = overall
+
+    return fields, remarks
+
+
+def annotate(frame, results, fields, out=None):
+    """
+    Draw the detections and verdicts onto a copy of the frame.
+
+    Args:
+        out (numpy.ndarray): Buffer of the frame's shape to draw into (e.g. a
+            recycled one from a FramePool) instead of allocating a new frame
+
+    Returns:
+        numpy.ndarray: Annotated frame
+    """
+    if out is None:
+        output = frame.copy()
+    else:
+        output = out
+        np.copyto(output, frame)
+
+    # Detected holes
+    for x, y, radius in results["fuel_cell_holes"].tolist():
+        cv2.circle(output, (x, y), radius, (0, 255, 0), 2)
+        cv2.circle(output, (x, y), 2, (0, 0, 255), 2)
+
+    # Syringe outline, with a box around the largest contour - likely the main body
+    syringe_contours = results["pipette"]
+    if len(syringe_contours) > 0:
+        cv2.drawContours(output, syringe_contours, -1, (255, 0, 0), 2)
+        largest_contour = max(syringe_contours, key=cv2.contourArea)
+        x, y, w, h = cv2.boundingRect(largest_contour)
+        cv2.rectangle(output, (x, y), (x+w, y+h), (0, 255, 255), 2)
+
+    # ROIs for priming and spotON ports
+    flap_info = results["flaps"]
+    x1, y1, x2, y2 = flap_info["priming_roi"]
+    cv2.rectangle(output, (x1, y1), (x2, y2), (0, 0, 255), 2)
+    cv2.putText(output, f"Priming: {'Closed' if flap_info['priming_closed'] else 'Open'}",
+                (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+
+    x1, y1, x2, y2 = flap_info["spoton_roi"]
+    cv2.rectangle(output, (x1, y1), (x2, y2), (0, 0, 255), 2)
+    cv2.putText(output, f"SpotON: {'Closed' if flap_info['spoton_closed'] else 'Open'}",
+                (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+
+    # Overflow ROI
+    x1, y1, x2, y2 = results["overflow"]["overflow_roi"]
+    cv2.rectangle(output, (x1, y1), (x2, y2), (0, 255, 0), 2)
+    cv2.putText(output, f"Overflow: {fields['overflow']}", (x1, y1-10),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+    overall = fields["overall"]
+    cv2.putText(output, f"Overall: {overall}", (10, 30),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.0,
+                (0, 255, 0) if overall == "PASS" else (0, 0, 255), 2)
+
+    return output
+
+
+def describe(results, fields):
+    """
+    JSON-serializable summary of one frame's detections and verdicts.
+
+    Returns:
+        dict: Status fields plus hole circles, syringe boxes and the flap /
+            overflow measurements and regions
+    """
+    flaps = results["flaps"]
+    overflow = results["overflow"]
+    return {
+        "status": dict(fields),
+        "holes": results["fuel_cell_holes"].tolist(),
+        "pipette": [list(cv2.boundingRect(cnt)) for cnt in results["pipette"]],
+        "flaps": {
+            "priming_closed": bool(flaps["priming_closed"]),
+            "spoton_closed": bool(flaps["spoton_closed"]),
+            "priming_white_percent": round(float(flaps["priming_white_percent"]), 2),
+            "spoton_white_percent": round(float(flaps["spoton_white_percent"]), 2),
+            "priming_roi": list(flaps["priming_roi"]),
+            "spoton_roi": list(flaps["spoton_roi"]),
+        },
+        "overflow": {
+            "liquid_percent": round(float(overflow["liquid_percent"]), 2),
+            "overflow_roi": list(overflow["overflow_roi"]),
+        },
+    }
@@ -0,0 +1,211 @@
+"""
+Tunable inspection thresholds and regions, compiled per frame size.
+
+Settings live in a small JSON file so that every process (the web app,
+camera processes and detector workers) sees the same values. The file is
+replaced atomically on save and each process re-reads it when its
+modification time changes, checking at most once per ``CHECK_INTERVAL``,
+so retuning takes effect within about a second without a restart.
+
+Detectors never work from the raw settings: ``current_profile(h, w)``
+returns an InspectionProfile with the pixel regions, array slices, region
+sizes and colour bounds already worked out for that frame size, cached
+per (frame size, settings) pair.
+"""
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+SETTINGS_PATH = "inspection_settings.json"
+
+# Seconds between checks of the settings file for changes
+CHECK_INTERVAL = 1.0
+
+# Setting -> (default, minimum, maximum)
+_LIMITS = {
+    # Gray level above which a port cover pixel counts as bright
+    "flap_gray_threshold": (80, 0, 255),
+    # Percentage of bright pixels above which a port cover counts as open
+    "flap_open_percent": (40.0, 0.0, 100.0),
+    # HSV range of the liquid colour (OpenCV hue is 0-179)
+    "liquid_hue_low": (90, 0, 179),
+    "liquid_hue_high": (130, 0, 179),
+    "liquid_saturation_min": (50, 0, 255),
+    "liquid_value_min": (50, 0, 255),
+    # Percentage of liquid-coloured pixels in the overflow region that counts as overflowing
+    "overflow_percent": (5.0, 0.0, 100.0),
+}
+
+# Regions as (x1, y1, x2, y2) fractions of the frame size; these need to be
+# adjusted to the camera setup. Left third is roughly where the Priming port
+# is, right third the SpotON port.
+_REGIONS = {
+    "priming_roi": (0.2, 0.3, 0.4, 0.7),
+    "spoton_roi": (0.6, 0.3, 0.8, 0.7),
+    "overflow_roi": (0.1, 0.5, 0.9, 0.9),
+}
+
+# Smallest (height, width) frame every region must cover at least one pixel of
+MIN_FRAME_SIZE = (120, 160)
+
+Settings = namedtuple("Settings", list(_LIMITS) + list(_REGIONS),
+                      defaults=[d for d, _, _ in _LIMITS.values()] + list(_REGIONS.values()))
+
+
+def make_settings(values, base=None):
+    """
+    Validated Settings from a dict of changes applied to ``base``.
+
+    Raises:
+        ValueError: For an unknown setting or an out-of-range value
+    """
+    settings = (base or Settings())._asdict()
+    for name, value in values.items():
+        if name in _LIMITS:
+            default, low, high = _LIMITS[name]
+            if not _is_number(value):
+                raise ValueError(f"{name} must be a number, got {value!r}")
+            value = type(default)(value)
+            if not low <= value <= high:
+                raise ValueError(f"{name} must be between {low} and {high}, got {value}")
+        elif name in _REGIONS:
+            if not isinstance(value, (list, tuple)) or len(value) != 4 or not all(map(_is_number, value)):
+                raise ValueError(f"{name} must be a list of four numbers, got {value!r}")
+            value = tuple(float(v) for v in value)
+            if not (0 <= value[0] < value[2] <= 1 and 0 <= value[1] < value[3] <= 1):
+                raise ValueError(f"{name} must be (x1, y1, x2, y2) fractions with x1 < x2, y1 < y2")
+            x1, y1, x2, y2 = _region(value, *MIN_FRAME_SIZE)
+            if x1 == x2 or y1 == y2:
+                raise ValueError(f"{name} covers no pixels of a {MIN_FRAME_SIZE[1]}x{MIN_FRAME_SIZE[0]} frame")
+        else:
+            raise ValueError(f"Unknown inspection setting {name!r}")
+        settings[name] = value
+    if settings["liquid_hue_low"] > settings["liquid_hue_high"]:
+        raise ValueError("liquid_hue_low must not exceed liquid_hue_high")
+    return Settings(**settings)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _region(fractions, height, width):
+    """Pixel (x1, y1, x2, y2) of a region given as fractions of the frame size"""
+    x1, y1, x2, y2 = fractions
+    return int(width * x1), int(height * y1), int(width * x2), int(height * y2)
+
+
+class InspectionProfile:
+    """
+    Settings compiled for one frame size: pixel regions, the array slices
+    selecting them, their pixel counts and the inRange colour bounds.
+    """
+
+    def __init__(self, height, width, settings):
+        self.height = height
+        self.width = width
+        self.settings = settings
+        self.priming_roi = _region(settings.priming_roi, height, width)
+        self.spoton_roi = _region(settings.spoton_roi, height, width)
+        self.overflow_roi = _region(settings.overflow_roi, height, width)
+        self.priming_slice = self._slice(self.priming_roi)
+        self.spoton_slice = self._slice(self.spoton_roi)
+        self.priming_pixels = self._pixels(self.priming_roi)
+        self.spoton_pixels = self._pixels(self.spoton_roi)
+        self.overflow_pixels = self._pixels(self.overflow_roi)
+        self.flap_gray_threshold = settings.flap_gray_threshold
+        self.flap_open_percent = settings.flap_open_percent
+        self.overflow_percent = settings.overflow_percent
+        self.liquid_lower = np.array([settings.liquid_hue_low, settings.liquid_saturation_min,
+                                      settings.liquid_value_min], np.uint8)
+        self.liquid_upper = np.array([settings.liquid_hue_high, 255, 255], np.uint8)
+
+    @staticmethod
+    def _slice(roi):
+        x1, y1, x2, y2 = roi
+        return slice(y1, y2), slice(x1, x2)
+
+    @staticmethod
+    def _pixels(roi):
+        x1, y1, x2, y2 = roi
+        return max(1, (x2 - x1) * (y2 - y1))
+
+
+@lru_cache(maxsize=32)
+def compile_profile(height, width, settings):
+    """InspectionProfile for a frame size, cached per (frame size, settings)"""
+    return InspectionProfile(height, width, settings)
+
+
+class SettingsFile:
+    """
+    The settings JSON file, re-read when it changes and replaced atomically on save.
+    """
+
+    def __init__(self, path=SETTINGS_PATH, check_interval=CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._settings = Settings()
+        self._mtime = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Current Settings; a cheap attribute read except once per check interval"""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            self._reload()
+        return self._settings
+
+    def _reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        settings = Settings()
+        if mtime is not None:
+            try:
+                with open(self.path) as f:
+                    settings = make_settings(json.load(f))
+            except (OSError, ValueError, TypeError) as e:
+                print(f"Ignoring invalid inspection settings in {self.path!r}: {e}")
+                settings = self._settings
+        # One reference swap: detectors see either the old or the new settings, never a mix
+        self._settings = settings
+        self._mtime = mtime
+
+    def save(self, values):
+        """
+        Apply and persist changes to the current settings.
+
+        Returns:
+            Settings: The new settings
+
+        Raises:
+            ValueError: For an unknown setting or an out-of-range value
+        """
+        with self._lock:
+            settings = make_settings(values, self.current())
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(settings._asdict(), f, indent=2)
+            os.replace(tmp, self.path)
+            self._settings = settings
+            self._mtime = os.stat(self.path).st_mtime_ns
+        return settings
+
+
+SETTINGS = SettingsFile()
+
+
+def current_profile(height, width):
+    """InspectionProfile for the current settings and a frame size"""
+    return compile_profile(height, width, SETTINGS.current())
@@ -0,0 +1,237 @@
+"""
+Low-overhead counters, gauges and fixed-bucket latency histograms,
+rendered in the Prometheus text exposition format for /metrics.
+"""
+import bisect
+import threading
+import time
+
+# Latency buckets in seconds, from sub-millisecond detector steps to stalled stages
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """A metric family: one child per combination of label values"""
+
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._remote = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **kwargs):
+        """Child metric for the given label values (positional or by name)"""
+        if kwargs:
+            values = tuple(str(kwargs[n]) for n in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def snapshot(self):
+        """Plain-data copy of every child, e.g. to ship from another process"""
+        return {values: child.state() for values, child in list(self._children.items())}
+
+    def load_remote(self, source, snapshot):
+        """Show another process's children (from ``snapshot()``) alongside our own"""
+        self._remote[source] = snapshot
+
+    def _states(self):
+        """Local and remote child states, summed where both report the same labels"""
+        states = self.snapshot()
+        for snapshot in list(self._remote.values()):
+            for values, state in snapshot.items():
+                states[values] = self._merge(states[values], state) if values in states else state
+        return states.items()
+
+    @staticmethod
+    def _merge(a, b):
+        return a + b
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, state in self._states():
+            lines.extend(self._render_child(values, state))
+        return lines
+
+    def _render_child(self, values, state):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(state)}"]
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def state(self):
+        return self.value
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0
+        self._function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Read the value from ``function()`` at scrape time instead"""
+        self._function = function
+
+    def state(self):
+        return self._function() if self._function is not None else self.value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def time(self):
+        """Context manager observing the elapsed wall time of its block"""
+        return _Timer(self)
+
+    def state(self):
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class Histogram(_Metric):
+    """Fixed-bucket distribution of observed values (latencies in seconds)"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    @staticmethod
+    def _merge(a, b):
+        return [x + y for x, y in zip(a[0], b[0])], a[1] + b[1]
+
+    def _render_child(self, values, state):
+        counts, total = state
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = f'le="{_format_value(float(bound))}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(float(total))}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self):
+        """Plain-data state of every metric, picklable for another process"""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def load_remote(self, source, snapshot):
+        """Merge a snapshot from another process (e.g. a camera process)"""
+        for name, data in snapshot.items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric.load_remote(source, data)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+FRAMES_CAPTURED = REGISTRY.register(Counter(
+    "flowcell_frames_captured_total", "Frames read from the camera", ["camera"]))
+FRAMES_PROCESSED = REGISTRY.register(Counter(
+    "flowcell_frames_processed_total", "Frames run through detection", ["camera"]))
+FRAMES_DROPPED = REGISTRY.register(Counter(
+    "flowcell_frames_dropped_total", "Frames discarded in front of a pipeline stage", ["camera", "stage"]))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "flowcell_stage_errors_total", "Frames a pipeline stage failed on", ["camera", "stage"]))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "flowcell_stage_seconds", "Time spent per frame in each pipeline stage", ["camera", "stage"]))
+DETECTOR_SECONDS = REGISTRY.register(Histogram(
+    "flowcell_detector_seconds", "Time spent per frame in each detector", ["camera", "detector"]))
+STREAM_CLIENTS = REGISTRY.register(Gauge(
+    "flowcell_stream_clients", "Connected /video_feed clients", ["camera"]))
@@ -0,0 +1,394 @@
+import threading
+import time
+import traceback
+
+import numpy as np
+
+import metrics
+
+
+class LatestSlot:
+    """
+    Bounded single-slot hand-off between two pipeline stages.
+
+    The drop policy decides what happens when the producer puts a new item
+    while the previous one has not been consumed yet:
+      - "latest": replace the pending item (newest frame wins)
+      - "oldest": keep the pending item and discard the new one
+      - "block":  wait until the consumer has taken the pending item
+
+    ``on_drop(item)`` is called for every item that never reaches the
+    consumer (replaced, discarded, or still pending on close), e.g. to hand
+    its frame buffer back to a FramePool.
+
+    ``close(drain=True)`` only closes the producer side: the consumer still
+    gets the pending item, and None once the slot is empty.
+    """
+
+    POLICIES = ("latest", "oldest", "block")
+
+    def __init__(self, policy="latest", on_drop=None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown drop policy {policy!r}, expected one of {self.POLICIES}")
+        self.policy = policy
+        self.on_drop = on_drop
+        self.dropped = 0
+        self._cond = threading.Condition()
+        self._item = None
+        self._full = False
+        self._closed = False
+
+    def put(self, item):
+        """
+        Offer an item to the consumer.
+
+        Returns:
+            bool: False if the item was discarded or the slot is closed
+        """
+        with self._cond:
+            if self.policy == "block":
+                self._cond.wait_for(lambda: not self._full or self._closed)
+            if self._closed:
+                lost, accepted = item, False
+            elif self._full and self.policy == "oldest":
+                self.dropped += 1
+                lost, accepted = item, False
+            else:
+                lost = self._item if self._full else None
+                if self._full:
+                    self.dropped += 1
+                self._item = item
+                self._full = True
+                self._cond.notify_all()
+                accepted = True
+        if lost is not None and self.on_drop is not None:
+            self.on_drop(lost)
+        return accepted
+
+    def get(self, timeout=None):
+        """
+        Take the pending item, waiting for one if necessary.
+
+        Returns:
+            The item, or None on timeout or once the slot is closed
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._full or self._closed, timeout=timeout):
+                return None
+            if not self._full:
+                return None
+            item = self._item
+            self._item = None
+            self._full = False
+            self._cond.notify_all()
+            return item
+
+    def close(self, drain=False):
+        """
+        Release every waiting producer and consumer.
+
+        Args:
+            drain (bool): Keep the pending item for the consumer instead of dropping it
+        """
+        with self._cond:
+            self._closed = True
+            lost = self._item if self._full and not drain else None
+            if not drain:
+                self._item = None
+                self._full = False
+            self._cond.notify_all()
+        if lost is not None and self.on_drop is not None:
+            self.on_drop(lost)
+
+
+class FramePool:
+    """
+    Reusable, preallocated frame buffers.
+
+    A buffer taken with ``acquire()`` has one holder; ``retain()`` adds
+    holders and ``release()`` removes one. When the last holder lets go the
+    buffer goes back on the free list instead of to the allocator, so a
+    running pipeline cycles through the same few frames (capture, pending
+    in each hand-off, being detected / annotated / encoded) rather than
+    allocating several full frames per iteration. Arrays that were never
+    acquired from the pool are ignored by ``release()``.
+    """
+
+    def __init__(self, size=8):
+        """
+        Args:
+            size (int): Most free buffers kept for reuse
+        """
+        self.size = size
+        self.allocated = 0
+        self.reused = 0
+        self._free = []
+        self._holders = {}  # id(buffer) -> holder count
+        self._lock = threading.Lock()
+
+    def reserve(self, shape, count, dtype=np.uint8):
+        """Preallocate ``count`` free buffers of the given shape"""
+        buffers = [np.empty(shape, dtype) for _ in range(count)]
+        with self._lock:
+            self.allocated += count
+            self._free.extend(buffers)
+            del self._free[:-self.size]
+
+    def acquire(self, shape, dtype=np.uint8):
+        """
+        A buffer of the given shape with undefined contents, reused when one is free.
+        """
+        buffer = None
+        with self._lock:
+            for i, free in enumerate(self._free):
+                if free.shape == shape and free.dtype == dtype:
+                    buffer = self._free.pop(i)
+                    self.reused += 1
+                    break
+            else:
+                self.allocated += 1
+        if buffer is None:
+            # Allocated outside the lock so other threads can release meanwhile
+            buffer = np.empty(shape, dtype)
+        return self.adopt(buffer)
+
+    def adopt(self, buffer):
+        """Manage an array allocated elsewhere (e.g. by cv2) as a pool buffer with one holder"""
+        with self._lock:
+            self._holders[id(buffer)] = 1
+        return buffer
+
+    def retain(self, buffer):
+        """Add a holder to a pool buffer"""
+        with self._lock:
+            if id(buffer) in self._holders:
+                self._holders[id(buffer)] += 1
+
+    def release(self, buffer):
+        """Drop a holder; the last one returns the buffer to the free list"""
+        with self._lock:
+            holders = self._holders.get(id(buffer))
+            if holders is None:
+                return
+            if holders > 1:
+                self._holders[id(buffer)] = holders - 1
+                return
+            del self._holders[id(buffer)]
+            # Buffers of another size are stale after a resolution change
+            self._free = [free for free in self._free
+                          if free.shape == buffer.shape and free.dtype == buffer.dtype]
+            if len(self._free) < self.size:
+                self._free.append(buffer)
+
+    def stats(self):
+        return {"allocated": self.allocated, "reused": self.reused, "free": len(self._free),
+                "in_use": len(self._holders)}
+
+
+class FpsCounter:
+    """Counts events and reports their rate over a rolling window"""
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self.count = 0
+        self.fps = 0.0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def tick(self):
+        self.count += 1
+        self._window_count += 1
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed >= self.window:
+            self.fps = self._window_count / elapsed
+            self._window_start = now
+            self._window_count = 0
+
+
+class InspectionPipeline:
+    """
+    Capture -> detect -> publish, each stage on its own thread.
+
+    Stages are connected by LatestSlot hand-offs, so the capture stage keeps
+    draining the camera even while detection is slow and the publish stage
+    always works on the newest processed result.
+
+    When ``read`` reports the end of the stream, the stages finish the frames
+    already captured before the pipeline stops, so a finite source (a video
+    or recording) with the "block" policy publishes every frame.
+
+    An exception from ``process`` or ``publish`` is logged and counted
+    against that frame only; the stage carries on with the next one.
+
+    With a FramePool, frames are read into recycled buffers and each one is
+    released once ``process`` is done with it (or failed, or it was dropped);
+    dropped results are handed to ``discard`` so their buffers can be
+    recycled too.
+    """
+
+    STAGES = ("capture", "detect", "publish")
+
+    def __init__(self, read, process, publish, drop_policy="latest", name="default",
+                 frame_pool=None, discard=None, finite=False):
+        """
+        Args:
+            read (callable): Returns (ok, frame) like cv2.VideoCapture.read; with a
+                frame pool it is called as ``read(buffer)`` to fill a recycled buffer
+            process (callable): Turns a frame into a result for publishing
+            publish (callable): Consumes one processed result
+            drop_policy (str): LatestSlot policy for both hand-offs
+            name (str): Camera label on the exported metrics
+            frame_pool (FramePool): Buffers to capture into, None lets read allocate
+            discard (callable): Called with every processed result that is dropped
+                instead of published
+            finite (bool): The source ends (a video file or recording), so running
+                out of frames is the expected end of stream rather than an error
+        """
+        self.read = read
+        self.process = process
+        self.publish = publish
+        self.name = name
+        self.frame_pool = frame_pool
+        self.finite = finite
+
+        self._detect_slot = LatestSlot(drop_policy,
+                                       on_drop=frame_pool.release if frame_pool is not None else None)
+        self._publish_slot = LatestSlot(drop_policy, on_drop=discard)
+        self._counters = {stage: FpsCounter() for stage in self.STAGES}
+        self._errors = {stage: 0 for stage in self.STAGES}
+        self._running = threading.Event()
+        self._threads = []
+
+    @property
+    def running(self):
+        return self._running.is_set()
+
+    def start(self):
+        """Start all stage threads"""
+        self._running.set()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="pipeline-capture", daemon=True),
+            threading.Thread(target=self._detect_loop, name="pipeline-detect", daemon=True),
+            threading.Thread(target=self._publish_loop, name="pipeline-publish", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Ask every stage to finish and unblock them"""
+        self._running.clear()
+        self._detect_slot.close()
+        self._publish_slot.close()
+
+    def join(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Per-stage fps, frame and error counts, plus frames dropped in front of each stage
+        """
+        stats = {}
+        for stage, counter in self._counters.items():
+            stats[stage] = {"fps": round(counter.fps, 2), "frames": counter.count,
+                            "errors": self._errors[stage]}
+        stats["detect"]["dropped"] = self._detect_slot.dropped
+        stats["publish"]["dropped"] = self._publish_slot.dropped
+        if self.frame_pool is not None:
+            stats["frame_pool"] = self.frame_pool.stats()
+        return stats
+
+    @staticmethod
+    def _put(slot, item, dropped):
+        # Each slot has a single producer, so only this put can move its drop count
+        before = slot.dropped
+        slot.put(item)
+        if slot.dropped != before:
+            dropped.inc()
+
+    def _failed(self, stage, failures):
+        # Full traceback for the first failure, then a count every 100 so a
+        # stage failing on every frame does not flood the log
+        self._errors[stage] += 1
+        failures.inc()
+        errors = self._errors[stage]
+        if errors == 1:
+            print(f"Camera {self.name!r}: {stage} failed, skipping the frame:\n{traceback.format_exc()}")
+        elif errors % 100 == 0:
+            print(f"Camera {self.name!r}: {stage} failed on {errors} frames so far")
+
+    def _capture_loop(self):
+        latency = metrics.STAGE_SECONDS.labels(self.name, "capture")
+        captured = metrics.FRAMES_CAPTURED.labels(self.name)
+        dropped = metrics.FRAMES_DROPPED.labels(self.name, "detect")
+        pool = self.frame_pool
+        shape = None
+        while self.running:
+            # Until the first frame shows the size, let read allocate
+            buffer = pool.acquire(shape) if pool is not None and shape is not None else None
+            with latency.time():
+                ret, frame = self.read(buffer) if buffer is not None else self.read()
+            if pool is not None and ret and frame is not buffer:
+                # The buffer did not fit (first frame or a new resolution) or read
+                # returned its own, possibly read-only, array: pool it only if writable
+                if buffer is not None:
+                    pool.release(buffer)
+                if frame.flags.writeable:
+                    pool.adopt(frame)
+                shape = frame.shape
+            if not ret:
+                if buffer is not None:
+                    pool.release(buffer)
+                if self.finite:
+                    print(f"Camera {self.name!r}: end of stream after "
+                          f"{self._counters['capture'].count} frames")
+                else:
+                    print(f"Error: Unable to fetch frame from camera {self.name!r}")
+                # Let detect and publish finish what was captured, then stop
+                self._detect_slot.close(drain=True)
+                break
+            self._counters["capture"].tick()
+            captured.inc()
+            self._put(self._detect_slot, frame, dropped)
+
+    def _detect_loop(self):
+        latency = metrics.STAGE_SECONDS.labels(self.name, "detect")
+        processed = metrics.FRAMES_PROCESSED.labels(self.name)
+        dropped = metrics.FRAMES_DROPPED.labels(self.name, "publish")
+        failures = metrics.STAGE_ERRORS.labels(self.name, "detect")
+        while True:
+            # None once the slot is closed and drained
+            frame = self._detect_slot.get()
+            if frame is None:
+                break
+            try:
+                with latency.time():
+                    result = self.process(frame)
+            except Exception:
+                self._failed("detect", failures)
+                continue
+            finally:
+                if self.frame_pool is not None:
+                    self.frame_pool.release(frame)
+            self._counters["detect"].tick()
+            processed.inc()
+            self._put(self._publish_slot, result, dropped)
+        self._publish_slot.close(drain=True)
+
+    def _publish_loop(self):
+        latency = metrics.STAGE_SECONDS.labels(self.name, "publish")
+        failures = metrics.STAGE_ERRORS.labels(self.name, "publish")
+        while True:
+            result = self._publish_slot.get()
+            if result is None:
+                break
+            try:
+                with latency.time():
+                    self.publish(result)
+            except Exception:
+                self._failed("publish", failures)
+                continue
+            self._counters["publish"].tick()
+        self._running.clear()
@@ -0,0 +1,314 @@
+"""
+Raw frame recording and deterministic replay.
+
+Every run of a FrameRecorder writes a new recording, a timestamped
+directory under the recorder's path holding three memory-mapped .npy files:
+``frames.npy``, a fixed-stride (capacity, height, width, channels) ring
+preallocated on the first frame and sized to the recorder's byte budget,
+``index.npy``, the capture timestamp of every slot, and ``sequence.npy``,
+the frame number held by every slot (-1 while a slot is empty or being
+rewritten). Once the ring is full the oldest frame is overwritten, so a
+recording always holds the last ``capacity`` frames before a failure. A
+slot's sequence number is written last, so a recording cut short by a crash
+is still readable up to the last complete frame. Only the latest
+``keep_runs`` runs are kept, so restarts do not fill the disk.
+
+ReplayCapture reads a recording back through the cv2.VideoCapture
+interface the stations use, handing out views of the mapped file, either
+paced like the original capture or as fast as the pipeline takes them:
+
+    python recording.py recordings/main --speed 0      # load-test the pipeline
+
+Given the recorder's path rather than one run, replay picks the latest run.
+"""
+import argparse
+import os
+import shutil
+import time
+
+import cv2
+import numpy as np
+
+FRAMES_FILE = "frames.npy"
+INDEX_FILE = "index.npy"
+SEQUENCE_FILE = "sequence.npy"
+
+
+# Bytes of frames one run preallocates when no frame count is given
+DEFAULT_MAX_BYTES = 2 << 30
+
+# Runs kept per recorder directory; older ones are deleted when a new run starts
+DEFAULT_KEEP_RUNS = 5
+
+
+def _is_run(path):
+    return os.path.isfile(os.path.join(path, INDEX_FILE))
+
+
+def _runs(path):
+    """Run directories under a recorder's directory, oldest first, including ones cut short while opening"""
+    if not os.path.isdir(path):
+        return []
+    return sorted(entry.path for entry in os.scandir(path) if entry.is_dir() and (
+        _is_run(entry.path) or os.path.isfile(os.path.join(entry.path, FRAMES_FILE))))
+
+
+def latest_recording(path):
+    """
+    The recording at ``path``: the directory itself if it is one run, else
+    its most recent run (run directories are named by their start time),
+    None if there is none.
+    """
+    if not isinstance(path, str) or not os.path.isdir(path):
+        return None
+    if _is_run(path):
+        return path
+    runs = [run for run in _runs(path) if _is_run(run)]
+    return runs[-1] if runs else None
+
+
+def is_recording(path):
+    """Whether ``path`` is a recording directory, or a recorder's directory of runs"""
+    return latest_recording(path) is not None
+
+
+class FrameRecorder:
+    """
+    Records raw frames and their timestamps into a ring of the last
+    ``capacity`` frames, in a new run directory each time it is started.
+
+    Disk use is bounded: a run preallocates at most ``max_bytes`` of frames,
+    and starting a run deletes the oldest ones beyond ``keep_runs``.
+    """
+
+    def __init__(self, path, max_frames=None, max_bytes=DEFAULT_MAX_BYTES, keep_runs=DEFAULT_KEEP_RUNS):
+        """
+        Args:
+            path (str): Directory the run directories are created in
+            max_frames (int): Most frames the ring holds, None for as many as fit ``max_bytes``;
+                older frames are overwritten
+            max_bytes (int): Most bytes of frames a run preallocates
+            keep_runs (int): Runs kept in ``path``, including the new one
+        """
+        self.path = path
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.keep_runs = keep_runs
+        self.capacity = None
+        self.directory = None
+        self.count = 0
+        self.stopped = False
+        self._frames = None
+        self._index = None
+        self._sequence = None
+
+    def _prune(self):
+        runs = _runs(self.path)
+        for run in runs[:max(0, len(runs) - self.keep_runs + 1)]:
+            shutil.rmtree(run, ignore_errors=True)
+            print(f"Deleted old recording {run!r}")
+
+    def _open(self, frame):
+        # Make room before preallocating the new run
+        self._prune()
+        self.capacity = max(1, self.max_bytes // frame.nbytes)
+        if self.max_frames is not None:
+            self.capacity = min(self.capacity, self.max_frames)
+        # Runs are never overwritten: each gets its own directory, named by its start time
+        now = time.time()
+        name = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f".{int(now % 1 * 1000):03d}"
+        directory = os.path.join(self.path, name)
+        suffix = 1
+        while os.path.exists(directory):
+            suffix += 1
+            directory = os.path.join(self.path, f"{name}-{suffix}")
+        os.makedirs(directory)
+        self.directory = directory
+        self._frames = np.lib.format.open_memmap(os.path.join(directory, FRAMES_FILE), mode="w+",
+                                                 dtype=frame.dtype,
+                                                 shape=(self.capacity,) + frame.shape)
+        self._sequence = np.lib.format.open_memmap(os.path.join(directory, SEQUENCE_FILE), mode="w+",
+                                                   dtype=np.int64, shape=(self.capacity,))
+        self._sequence[:] = -1
+        # Written last: its presence marks the directory as a recording
+        self._index = np.lib.format.open_memmap(os.path.join(directory, INDEX_FILE), mode="w+",
+                                                dtype=np.float64, shape=(self.capacity,))
+        self._index[:] = np.nan
+
+    def _stop(self, reason):
+        if not self.stopped:
+            self.stopped = True
+            print(f"Recording {self.directory or self.path!r} stopped after {self.count} frames: {reason}")
+
+    def write(self, frame, timestamp=None):
+        """
+        Record one frame (copied into the mapped file), overwriting the oldest once the ring is full.
+
+        Returns:
+            bool: False once the recording has stopped (closed, or the frame size changed)
+        """
+        if self.stopped:
+            return False
+        if self._frames is None:
+            self._open(frame)
+        if frame.shape != self._frames.shape[1:]:
+            self._stop("frame size changed")
+            return False
+        slot = self.count % self.capacity
+        self._sequence[slot] = -1
+        np.copyto(self._frames[slot], frame)
+        self._index[slot] = timestamp if timestamp is not None else time.time()
+        self._sequence[slot] = self.count
+        self.count += 1
+        return True
+
+    def close(self):
+        """Stop recording and flush the mapped files to disk"""
+        self._stop("closed")
+        if self._frames is not None:
+            self._frames.flush()
+            self._index.flush()
+            self._sequence.flush()
+            self._frames = self._index = self._sequence = None
+
+    def wrap(self, read):
+        """
+        A ``read([image])`` that records every frame returned by ``read``
+        (e.g. cv2.VideoCapture.read) before returning it.
+        """
+        def recording_read(*args):
+            ret, frame = read(*args)
+            if ret and not self.stopped:
+                self.write(frame)
+            return ret, frame
+        return recording_read
+
+
+class ReplayCapture:
+    """
+    Stand-in for cv2.VideoCapture playing back a recording.
+
+    ``read()`` returns read-only views of the mapped file (no copy, no
+    decode); ``read(image)`` copies into ``image`` unless ``zero_copy``.
+    With ``speed`` set, frames are released on the recording's own
+    timeline (scaled by ``speed``); with ``speed=0`` they come as fast as
+    they are read.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False, zero_copy=True):
+        """
+        Args:
+            path (str): Recording directory, or a recorder's directory of runs to play the latest
+            speed (float): Playback speed relative to the capture, 0 for unpaced
+            loop (bool): Start over at the end instead of reporting end of stream
+            zero_copy (bool): Return views even when ``read`` is given a buffer
+        """
+        self.path = latest_recording(path) or path
+        self.speed = speed
+        self.loop = loop
+        self.zero_copy = zero_copy
+        self._frames = np.load(os.path.join(self.path, FRAMES_FILE), mmap_mode="r")
+        index = np.load(os.path.join(self.path, INDEX_FILE), mmap_mode="r")
+        sequence_path = os.path.join(self.path, SEQUENCE_FILE)
+        if os.path.isfile(sequence_path):
+            # Ring slots in recording order, skipping empty and half-written ones
+            sequence = np.load(sequence_path)
+            slots = np.flatnonzero(sequence >= 0)
+            self._slots = slots[np.argsort(sequence[slots])]
+        else:
+            # Recorded before the ring format: frames in order up to the first empty slot
+            written = np.isnan(index)
+            self._slots = np.arange(int(np.argmax(written)) if written.any() else len(index))
+        self._timestamps = np.array(index[self._slots])
+        self._position = 0
+        self._clock = None  # (wall time, recording time) playback is anchored to
+
+    def isOpened(self):
+        return self._frames is not None and len(self._timestamps) > 0
+
+    def release(self):
+        self._frames = None
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self._frames.shape[1])
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self._frames.shape[2])
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self._timestamps))
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._position)
+        if prop == cv2.CAP_PROP_FPS:
+            span = self._timestamps[-1] - self._timestamps[0] if len(self._timestamps) > 1 else 0
+            return (len(self._timestamps) - 1) / span if span > 0 else 0.0
+        return 0.0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES and 0 <= value < len(self._timestamps):
+            self._position = int(value)
+            self._clock = None
+            return True
+        return False
+
+    def read(self, image=None):
+        """
+        Returns:
+            tuple: (ok, frame) like cv2.VideoCapture.read
+        """
+        if self._frames is None:
+            return False, None
+        if self._position >= len(self._timestamps):
+            if not self.loop or not len(self._timestamps):
+                return False, None
+            self._position = 0
+            self._clock = None
+
+        recorded = self._timestamps[self._position]
+        if self.speed:
+            if self._clock is None:
+                self._clock = (time.monotonic(), recorded)
+            delay = self._clock[0] + (recorded - self._clock[1]) / self.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        frame = self._frames[self._slots[self._position]]
+        self._position += 1
+        if image is not None and not self.zero_copy and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame
+
+
+def open_capture(source, replay_speed=1.0):
+    """cv2.VideoCapture for a device or video, ReplayCapture for a recording directory"""
+    if is_recording(source):
+        return ReplayCapture(source, speed=replay_speed)
+    return cv2.VideoCapture(source)
+
+
+def main(argv=None):
+    from station import InspectionStation
+
+    parser = argparse.ArgumentParser(description="Replay a recording through the inspection pipeline")
+    parser.add_argument("path", help="Recording directory")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Playback speed, 0 for as fast as possible (default: 1.0)")
+    args = parser.parse_args(argv)
+
+    station = InspectionStation("replay", source=args.path, replay_speed=args.speed,
+                                drop_policy="block" if args.speed == 0 else "latest")
+    start = time.perf_counter()
+    station.run()
+    elapsed = time.perf_counter() - start
+    stats = station.stats()["stages"]
+    frames = stats["detect"]["frames"]
+    print(f"{frames} frames in {elapsed:.2f} s ({frames / elapsed:.1f} FPS), "
+          f"{stats['detect']['dropped']} dropped before detection")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,18 +2,22 @@ import time
 from pydobot import Dobot
 import serial.tools.list_ports
 
+from event_store import EventStore
+
 class DobotPipettingSystem:
-    def __init__(self, port='/dev/cu.usbmodem11301', verbose=True):
+    def __init__(self, port='/dev/cu.usbmodem11301', verbose=True, event_store=None):
         """
         Initialize the Dobot pipetting system with fixed pose handling
         
         Args:
             port (str): Serial port for Dobot connection
             verbose (bool): Enable verbose output
+            event_store (EventStore): Records robot operations for the history page
         """
         self.device = None
         self.connected = False
         self.verbose = verbose
+        self.event_store = event_store
         
         # Connect to the robot
         self._connect(port)
@@ -34,9 +38,16 @@ class DobotPipettingSystem:
                     print(f"Connected to Dobot on {port}")
             except Exception as e:
                 print(f"Connected but couldn't get position: {e}")
+            self._record("robot", "INFO", f"Connected to Dobot on {port}")
                 
         except Exception as e:
             print(f"Failed to connect to Dobot: {e}")
+            self._record("error", "FAIL", f"Failed to connect to Dobot on {port}: {e}")
+    
+    def _record(self, event_type, status, description, details=None):
+        """Queue a robot event in the event store, if one is attached"""
+        if self.event_store is not None:
+            self.event_store.record(event_type, "Robot", status, description, details=details)
     
     def _get_position(self):
         """
@@ -66,6 +77,7 @@ class DobotPipettingSystem:
         if self.verbose:
             print("Homing robot...")
         self.device.home()
+        self._record("maintenance", "COMPLETE", "Robot homed")
     
     def move_to(self, x, y, z, r=0, jump=True, wait=True):
         """
@@ -205,14 +217,20 @@ class DobotPipettingSystem:
         if self.verbose:
             print(f"Starting pipetting operation: {source_pos} -> {target_pos}")
         
-        # Pickup liquid
-        self.pipette_pickup(source_pos, safe_z)
-        
-        # Dispense liquid
-        self.pipette_dispense(target_pos, safe_z)
+        details = {"source": list(source_pos), "target": list(target_pos)}
+        try:
+            # Pickup liquid
+            self.pipette_pickup(source_pos, safe_z)
+            
+            # Dispense liquid
+            self.pipette_dispense(target_pos, safe_z)
+        except Exception as e:
+            self._record("error", "FAIL", f"Pipetting operation failed: {e}", details)
+            raise
         
         if self.verbose:
             print("Pipetting operation completed")
+        self._record("robot", "COMPLETE", "Pipetting operation completed", details)
     
     def close(self):
         """Close connection to robot"""
@@ -225,12 +243,17 @@ class DobotPipettingSystem:
 
 # Example usage for fuel cell application
 if __name__ == "__main__":
+    # Robot operations go into the same event log as the inspection app
+    event_store = EventStore()
+    event_store.start()
+
     # Initialize robot with macOS port
-    pipetting_system = DobotPipettingSystem(port='/dev/cu.usbmodem11301')
+    pipetting_system = DobotPipettingSystem(port='/dev/cu.usbmodem11301', event_store=event_store)
     
     # Check if connection successful
     if not pipetting_system.connected:
         print("Failed to connect to Dobot. Exiting.")
+        event_store.close()
         exit()
     
     try:
@@ -272,4 +295,5 @@ if __name__ == "__main__":
     
     finally:
         # Always close the connection properly
-        pipetting_system.close()
\ No newline at end of file
+        pipetting_system.close()
+        event_store.close()
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""
+Sensor sampling independent of the camera pipeline.
+
+Each sensor has a driver (any callable returning a number; real I2C or
+serial reads take milliseconds) sampled on its own thread at its own rate
+into a fixed-size ring of timestamped readings. Stations only read the
+latest formatted values, so a slow sensor never holds up vision, and the
+rings serve downsampled time series for charts.
+"""
+import threading
+import time
+
+import numpy as np
+
+
+class SensorRing:
+    """
+    Fixed-capacity ring of (timestamp, value) readings in preallocated numpy
+    arrays, written by one sampler thread.
+    """
+
+    def __init__(self, capacity=3600):
+        self.capacity = capacity
+        self._timestamps = np.zeros(capacity, np.float64)
+        self._values = np.zeros(capacity, np.float64)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def append(self, timestamp, value):
+        with self._lock:
+            slot = self._count % self.capacity
+            self._timestamps[slot] = timestamp
+            self._values[slot] = value
+            self._count += 1
+
+    def _ordered(self):
+        with self._lock:
+            if self._count <= self.capacity:
+                return self._timestamps[:self._count].copy(), self._values[:self._count].copy()
+            # Oldest reading sits right after the newest one
+            start = self._count % self.capacity
+            return (np.roll(self._timestamps, -start), np.roll(self._values, -start))
+
+    def series(self, start=None, end=None, points=None):
+        """
+        Readings in a time range, oldest first, optionally downsampled.
+
+        Args:
+            start (float): Earliest timestamp (inclusive), epoch seconds
+            end (float): Latest timestamp (exclusive), epoch seconds
+            points (int): Reduce to at most this many equal-width time buckets,
+                each summarized by its mean, min and max
+
+        Returns:
+            dict: ``timestamps`` and ``mean`` / ``min`` / ``max`` lists (all three
+                equal to the raw values when not downsampled)
+        """
+        timestamps, values = self._ordered()
+        lo = 0 if start is None else np.searchsorted(timestamps, start, "left")
+        hi = len(timestamps) if end is None else np.searchsorted(timestamps, end, "left")
+        timestamps, values = timestamps[lo:hi], values[lo:hi]
+
+        if points is None or len(values) <= points:
+            raw = values.tolist()
+            return {"timestamps": timestamps.tolist(), "mean": raw, "min": raw, "max": raw}
+
+        first = timestamps[0] if start is None else start
+        last = timestamps[-1] if end is None else end
+        width = max((last - first) / points, 1e-9)
+        buckets = np.minimum(((timestamps - first) / width).astype(np.int64), points - 1)
+        # Readings are sorted, so each bucket is one contiguous run
+        edges = np.flatnonzero(np.diff(buckets)) + 1
+        starts = np.concatenate(([0], edges))
+        counts = np.diff(np.concatenate((starts, [len(values)])))
+        return {
+            "timestamps": (first + (buckets[starts] + 0.5) * width).tolist(),
+            "mean": (np.add.reduceat(values, starts) / counts).tolist(),
+            "min": np.minimum.reduceat(values, starts).tolist(),
+            "max": np.maximum.reduceat(values, starts).tolist(),
+        }
+
+
+class Sensor:
+    """
+    One sensor: its driver, sampling rate and recent readings.
+    """
+
+    def __init__(self, name, driver, rate=1.0, unit=None, labels=None, capacity=3600, digits=2):
+        """
+        Args:
+            name (str): Status field the latest reading is published as
+            driver (callable): Returns one reading as a number (or bool)
+            rate (float): Samples per second
+            unit (str): Appended to the published reading, e.g. "°C"
+            labels (tuple): For on/off sensors, the published text for 0 and 1
+            capacity (int): Readings kept in the ring
+            digits (int): Decimal places of the published reading
+        """
+        self.name = name
+        self.driver = driver
+        self.rate = rate
+        self.unit = unit
+        self.labels = labels
+        self.digits = digits
+        self.ring = SensorRing(capacity)
+        self.errors = 0
+        # Formatted once per sample so status reads are a plain attribute lookup
+        self.reading = "unknown"
+        self.timestamp = None
+
+    def format(self, value):
+        if self.labels is not None:
+            return self.labels[int(bool(value))]
+        text = f"{round(value, self.digits)}"
+        return f"{text} {self.unit}" if self.unit else text
+
+    def sample(self):
+        """
+        Read the driver once and record the value; driver errors are counted and skipped.
+
+        Returns:
+            float: The value, None if the read failed
+        """
+        try:
+            value = float(self.driver())
+        except Exception as e:
+            self.errors += 1
+            if self.errors == 1 or self.errors % 100 == 0:
+                print(f"Sensor {self.name!r} read failed ({self.errors} so far): {e}")
+            return None
+        timestamp = time.time()
+        self.ring.append(timestamp, value)
+        self.reading = self.format(value)
+        self.timestamp = timestamp
+        return value
+
+
+class SensorService:
+    """
+    Samples every sensor on its own thread, each at its own rate.
+    """
+
+    def __init__(self, sensors, on_sample=None):
+        """
+        Args:
+            sensors (list): Sensor instances
+            on_sample (callable): Called as ``on_sample(name, timestamp, value)``
+                with every successful sample, on the sensor's thread
+        """
+        self.sensors = {sensor.name: sensor for sensor in sensors}
+        self.on_sample = on_sample
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Start one sampler thread per sensor (idempotent)"""
+        if self._threads:
+            return
+        self._stop.clear()
+        for sensor in self.sensors.values():
+            thread = threading.Thread(target=self._sample_loop, args=(sensor,),
+                                      name=f"sensor-{sensor.name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _sample_loop(self, sensor):
+        interval = 1.0 / sensor.rate
+        due = time.monotonic()
+        while not self._stop.is_set():
+            value = sensor.sample()
+            if value is not None and self.on_sample is not None:
+                self.on_sample(sensor.name, sensor.timestamp, value)
+            # Fixed schedule; a read slower than the interval skips the missed slots
+            due += interval
+            now = time.monotonic()
+            if due < now:
+                due = now + interval - (now - due) % interval
+            self._stop.wait(due - now)
+
+    def status(self):
+        """Latest formatted reading of every sensor, as detection status fields"""
+        return {name: sensor.reading for name, sensor in self.sensors.items()}
+
+    def describe(self):
+        """Sampling rate, unit, latest reading and error count of every sensor"""
+        return {name: {"rate": sensor.rate, "unit": sensor.unit, "reading": sensor.reading,
+                       "timestamp": sensor.timestamp, "samples": len(sensor.ring),
+                       "errors": sensor.errors}
+                for name, sensor in self.sensors.items()}
+
+    def series(self, name, start=None, end=None, points=None):
+        """Time series of one sensor, see SensorRing.series; KeyError for an unknown sensor"""
+        sensor = self.sensors[name]
+        return dict(sensor.ring.series(start, end, points), name=name, unit=sensor.unit)
@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+import numpy as np
+
+# One published detection state; ``status`` is a read-only mapping
+Snapshot = namedtuple("Snapshot", ["version", "timestamp", "status"])
+
+# Status fields kept in the history ring (sensor readings are not detection history)
+HISTORY_FIELDS = ("fuel_cell_holes", "pipette", "flaps", "overflow", "overall")
+
+
+class SnapshotHistory:
+    """
+    Fixed-capacity ring of past detection states.
+
+    Storage is preallocated numpy arrays: versions, timestamps and one
+    small integer code per history field, with each field's distinct
+    values (a handful of strings such as "detected" or "PASS") kept in a
+    per-field vocabulary. Versions are consecutive, so the slot of any
+    version still in the ring is ``version % capacity``.
+    """
+
+    def __init__(self, capacity=1024, fields=HISTORY_FIELDS):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self._versions = np.zeros(capacity, np.int64)
+        self._timestamps = np.zeros(capacity, np.float64)
+        self._codes = np.zeros((capacity, len(self.fields)), np.uint8)
+        self._vocab = [[] for _ in self.fields]
+        self._code_of = [{} for _ in self.fields]
+        self._latest = 0
+        self._lock = threading.Lock()
+
+    @property
+    def latest(self):
+        """Version of the newest entry, 0 when empty"""
+        return self._latest
+
+    def _encode(self, i, value):
+        code = self._code_of[i].get(value)
+        if code is None:
+            if len(self._vocab[i]) >= 256:
+                raise ValueError(f"Too many distinct values for history field {self.fields[i]!r}")
+            code = len(self._vocab[i])
+            self._vocab[i].append(value)
+            self._code_of[i][value] = code
+        return code
+
+    def append(self, snapshot):
+        """Store a snapshot; its version must follow the previous one"""
+        with self._lock:
+            if snapshot.version != self._latest + 1:
+                raise ValueError(f"Expected version {self._latest + 1}, got {snapshot.version}")
+            slot = snapshot.version % self.capacity
+            self._versions[slot] = snapshot.version
+            self._timestamps[slot] = snapshot.timestamp
+            for i, field in enumerate(self.fields):
+                self._codes[slot, i] = self._encode(i, snapshot.status.get(field, "unknown"))
+            self._latest = snapshot.version
+
+    def since(self, version=0, limit=None):
+        """
+        Entries newer than ``version``, oldest first.
+
+        Args:
+            version (int): Last version the caller has already seen
+            limit (int): Return at most this many of the oldest new entries
+
+        Returns:
+            tuple: (entries, truncated) where ``entries`` is a list of dicts with
+                version, timestamp and the history fields, and ``truncated`` is
+                True when entries after ``version`` have already been overwritten
+        """
+        with self._lock:
+            oldest = max(1, self._latest - self.capacity + 1)
+            first = max(version + 1, oldest)
+            last = self._latest if limit is None else min(self._latest, first + limit - 1)
+            if first > last:
+                return [], version + 1 < oldest
+            slots = np.arange(first, last + 1) % self.capacity
+            versions = self._versions[slots].tolist()
+            timestamps = self._timestamps[slots].tolist()
+            codes = self._codes[slots].tolist()
+            vocab = [list(values) for values in self._vocab]
+
+        entries = []
+        for v, ts, row in zip(versions, timestamps, codes):
+            entry = {"version": v, "timestamp": ts}
+            for i, field in enumerate(self.fields):
+                entry[field] = vocab[i][row[i]]
+            entries.append(entry)
+        return entries, version + 1 < oldest
+
+
+class StatusBoard:
+    """
+    Publishes detection status as immutable, versioned snapshots.
+
+    Every update builds a new status mapping and swaps it in as one
+    reference, so readers always see a complete state from a single frame
+    and never need the lock; the lock only orders concurrent publishers
+    and wakes subscribers waiting for a newer version.
+    """
+
+    def __init__(self, initial, history_size=1024, on_publish=None):
+        """
+        Args:
+            initial (dict): Status before the first update
+            history_size (int): Entries kept in the history ring
+            on_publish (callable): Called as ``on_publish(previous, snapshot)``
+                after every publish, outside the lock
+        """
+        self.history = SnapshotHistory(history_size)
+        self.on_publish = on_publish
+        self._current = Snapshot(0, time.time(), MappingProxyType(dict(initial)))
+        self._changed = threading.Condition()
+
+    def current(self):
+        """The latest Snapshot"""
+        return self._current
+
+    def publish(self, *updates):
+        """
+        Publish a new snapshot: the current status with the given dicts applied.
+
+        Returns:
+            Snapshot: The snapshot just published
+        """
+        with self._changed:
+            previous = self._current
+            status = dict(previous.status)
+            for update in updates:
+                status.update(update)
+            snapshot = Snapshot(previous.version + 1, time.time(), MappingProxyType(status))
+            self.history.append(snapshot)
+            self._current = snapshot
+            self._changed.notify_all()
+        if self.on_publish is not None:
+            self.on_publish(previous, snapshot)
+        return snapshot
+
+    def wait(self, version, timeout=None):
+        """
+        Block until a snapshot newer than ``version`` is published.
+
+        Returns:
+            Snapshot: The latest snapshot, or None on timeout
+        """
+        with self._changed:
+            if not self._changed.wait_for(lambda: self._current.version > version, timeout):
+                return None
+            return self._current
@@ -50,60 +50,108 @@ function initializeCharts() {
   }
 }
 
-// Create all chart instances
-function createAllCharts() {
-  // System Performance Over Time
-  createPerformanceChart();
-  
-  // Success Rate Pie Chart
-  createSuccessRateChart();
-  
-  // Failure Distribution
-  createFailureDistributionChart();
-  
-  // Temperature Trends
-  createTemperatureChart();
-  
-  // Pressure Variations
-  createPressureChart();
-}
+// Chart instances by canvas id, so a refresh replaces instead of stacking charts
+const charts = {};
 
-// Create System Performance chart
-function createPerformanceChart() {
-  const ctx = document.getElementById('performanceChart');
-  if (!ctx) {
-    // If canvas doesn't exist, try to create it
-    const container = document.querySelector('.chart-card.wide .placeholder-chart');
-    if (container) {
-      container.innerHTML = '<canvas id="performanceChart"></canvas>';
-      const canvas = document.getElementById('performanceChart');
-      if (!canvas) return;
-      createPerformanceChartInstance(canvas);
+// Time range lengths of the Time Range filter, in seconds
+const TIME_RANGES = {
+  '1h': 3600,
+  '6h': 6 * 3600,
+  '24h': 24 * 3600,
+  '7d': 7 * 86400,
+  '30d': 30 * 86400
+};
+
+// Component filter values -> rollup failure keys
+const COMPONENT_FIELDS = {
+  fuel_cell: 'fuel_cell_holes',
+  pipette: 'pipette',
+  flaps: 'flaps',
+  overflow: 'overflow'
+};
+
+// Selected time range as epoch seconds
+function selectedRange() {
+  const timeRange = document.getElementById('timeRange');
+  const end = Date.now() / 1000;
+  if (timeRange && timeRange.value === 'custom') {
+    const startInput = document.getElementById('startDate').value;
+    const endInput = document.getElementById('endDate').value;
+    if (startInput && endInput) {
+      return { start: new Date(startInput).getTime() / 1000, end: new Date(endInput).getTime() / 1000 };
     }
-  } else {
-    createPerformanceChartInstance(ctx);
   }
+  const span = TIME_RANGES[timeRange ? timeRange.value : '24h'] || TIME_RANGES['24h'];
+  return { start: end - span, end: end };
 }
 
-function createPerformanceChartInstance(ctx) {
-  // Generate labels (past 24 hours with 2-hour intervals)
-  const labels = [];
-  const now = new Date();
-  for (let i = 12; i >= 0; i--) {
-      const time = new Date(now);
-      time.setHours(now.getHours() - i * 2);
-      labels.push(time.toLocaleTimeString('en-US', { hour: '2-digit', minute: '2-digit' }));
+// Canvas for a chart: the existing one, or a new one in the placeholder showing placeholderText
+function chartCanvas(id, placeholderText) {
+  const existing = document.getElementById(id);
+  if (existing) return existing;
+
+  for (const container of document.querySelectorAll('.chart-card .placeholder-chart')) {
+    if (container.textContent.includes(placeholderText)) {
+      container.innerHTML = `<canvas id="${id}"></canvas>`;
+      return document.getElementById(id);
+    }
   }
+  return null;
+}
+
+function renderChart(ctx, config) {
+  if (charts[ctx.id]) charts[ctx.id].destroy();
+  charts[ctx.id] = new Chart(ctx, config);
+}
+
+// Bucket start times as axis labels
+function bucketLabels(data) {
+  return data.buckets.map(bucket => {
+    const time = new Date(bucket.bucket * 1000);
+    if (data.resolution === 'day') {
+      return time.toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
+    }
+    return time.toLocaleTimeString('en-US', { hour: '2-digit', minute: '2-digit' });
+  });
+}
+
+// Create all chart instances from the server-side rollups
+function createAllCharts() {
+  const range = selectedRange();
+  fetch(`/analytics/rollups?start=${range.start}&end=${range.end}`)
+    .then(response => response.json())
+    .then(data => {
+      // System Performance Over Time
+      createPerformanceChart(data);
+      
+      // Success Rate Pie Chart
+      createSuccessRateChart(data);
+      
+      // Failure Distribution
+      createFailureDistributionChart(data);
+      
+      // Temperature Trends
+      createTemperatureChart(data);
+      
+      // Pressure Variations
+      createPressureChart(data);
+    })
+    .catch(error => console.error('Failed to load analytics:', error));
+}
+
+// Create System Performance chart
+function createPerformanceChart(data) {
+  const ctx = chartCanvas('performanceChart', 'Performance');
+  if (!ctx) return;
   
-  // Sample data
-  const chart = new Chart(ctx, {
+  renderChart(ctx, {
       type: 'line',
       data: {
-          labels: labels,
+          labels: bucketLabels(data),
           datasets: [
               {
                   label: 'Success Rate (%)',
-                  data: [85, 82, 90, 95, 88, 78, 84, 89, 92, 87, 91, 86, 89],
+                  data: data.buckets.map(bucket => bucket.success_rate),
                   borderColor: '#3b82f6',
                   backgroundColor: 'rgba(59, 130, 246, 0.1)',
                   fill: true,
@@ -111,8 +159,8 @@ function createPerformanceChartInstance(ctx) {
                   yAxisID: 'y'
               },
               {
-                  label: 'Process Time (s)',
-                  data: [4.2, 4.5, 4.0, 3.8, 4.2, 4.7, 4.3, 4.1, 3.9, 4.0, 4.2, 4.3, 4.1],
+                  label: 'Inspections',
+                  data: data.buckets.map(bucket => bucket.inspections),
                   borderColor: '#16a34a',
                   backgroundColor: 'rgba(22, 163, 74, 0.1)',
                   fill: true,
@@ -146,14 +194,13 @@ function createPerformanceChartInstance(ctx) {
                   type: 'linear',
                   display: true,
                   position: 'right',
-                  min: 0,
-                  max: 10,
+                  beginAtZero: true,
                   grid: {
                       drawOnChartArea: false
                   },
                   title: {
                       display: true,
-                      text: 'Process Time (s)'
+                      text: 'Inspections'
                   }
               }
           }
@@ -162,33 +209,16 @@ function createPerformanceChartInstance(ctx) {
 }
 
 // Create Success Rate pie chart
-function createSuccessRateChart() {
-  // Find the Success Rate chart container
-  const containers = document.querySelectorAll('.chart-card .placeholder-chart');
-  let successRateContainer = null;
-  
-  for (const container of containers) {
-    if (container.textContent.includes('Success Rate')) {
-      successRateContainer = container;
-      break;
-    }
-  }
-  
-  if (!successRateContainer) return;
-  
-  // Create canvas
-  successRateContainer.innerHTML = '<canvas id="successRateChart"></canvas>';
-  
-  const ctx = document.getElementById('successRateChart');
+function createSuccessRateChart(data) {
+  const ctx = chartCanvas('successRateChart', 'Success Rate');
   if (!ctx) return;
   
-  // Sample data
-  const chart = new Chart(ctx, {
+  renderChart(ctx, {
       type: 'doughnut',
       data: {
           labels: ['Success', 'Failure'],
           datasets: [{
-              data: [87.5, 12.5],
+              data: [data.totals.passes, data.totals.fails],
               backgroundColor: ['#16a34a', '#dc2626'],
               hoverOffset: 4
           }]
@@ -210,34 +240,24 @@ function createSuccessRateChart() {
 }
 
 // Create Failure Distribution chart
-function createFailureDistributionChart() {
-  // Find the Failure Distribution chart container
-  const containers = document.querySelectorAll('.chart-card .placeholder-chart');
-  let failureContainer = null;
-  
-  for (const container of containers) {
-    if (container.textContent.includes('Failure Breakdown')) {
-      failureContainer = container;
-      break;
-    }
-  }
-  
-  if (!failureContainer) return;
-  
-  // Create canvas
-  failureContainer.innerHTML = '<canvas id="failureDistributionChart"></canvas>';
-  
-  const ctx = document.getElementById('failureDistributionChart');
+function createFailureDistributionChart(data) {
+  const ctx = chartCanvas('failureDistributionChart', 'Failure Breakdown');
   if (!ctx) return;
   
-  // Sample data
-  const chart = new Chart(ctx, {
+  // Only the selected component, if the Component filter is set
+  const component = document.getElementById('component');
+  const only = component ? COMPONENT_FIELDS[component.value] : undefined;
+  const fields = ['fuel_cell_holes', 'pipette', 'flaps', 'overflow'];
+  const names = ['Fuel Cell Holes', 'Pipette', 'Flaps', 'Overflow'];
+  const failures = fields.map(field => (!only || only === field) ? data.totals.failures[field] : 0);
+  
+  renderChart(ctx, {
       type: 'bar',
       data: {
-          labels: ['Fuel Cell Holes', 'Pipette', 'Flaps', 'Overflow'],
+          labels: names,
           datasets: [{
               label: 'Failure Count',
-              data: [23, 8, 15, 4],
+              data: failures,
               backgroundColor: [
                   'rgba(220, 38, 38, 0.8)',
                   'rgba(217, 119, 6, 0.8)',
@@ -279,53 +299,39 @@ function createFailureDistributionChart() {
 }
 
 // Create Temperature Trends chart
-function createTemperatureChart() {
-  // Find the Temperature Trends chart container
-  const containers = document.querySelectorAll('.chart-card .placeholder-chart');
-  let temperatureContainer = null;
-  
-  for (const container of containers) {
-    if (container.textContent.includes('Temperature Line Chart')) {
-      temperatureContainer = container;
-      break;
-    }
-  }
-  
-  if (!temperatureContainer) return;
-  
-  // Create canvas
-  temperatureContainer.innerHTML = '<canvas id="temperatureChart"></canvas>';
-  
-  const ctx = document.getElementById('temperatureChart');
+function createTemperatureChart(data) {
+  const ctx = chartCanvas('temperatureChart', 'Temperature Line Chart');
   if (!ctx) return;
   
-  // Generate labels (past 24 hours with 2-hour intervals)
-  const labels = [];
-  const now = new Date();
-  for (let i = 12; i >= 0; i--) {
-      const time = new Date(now);
-      time.setHours(now.getHours() - i * 2);
-      labels.push(time.toLocaleTimeString('en-US', { hour: '2-digit', minute: '2-digit' }));
-  }
+  // Mean per bucket, with the bucket's min and max around it
+  const stats = data.buckets.map(bucket => bucket.sensors.temperature);
+  const series = key => stats.map(stat => stat ? stat[key] : null);
   
-  // Sample data with random variations around 24.3°C
-  const temperatureData = [];
-  for (let i = 0; i < 13; i++) {
-      temperatureData.push(24.3 + (Math.random() * 2 - 1));
-  }
-  
-  // Create chart
-  const chart = new Chart(ctx, {
+  renderChart(ctx, {
       type: 'line',
       data: {
-          labels: labels,
+          labels: bucketLabels(data),
           datasets: [{
               label: 'Temperature (°C)',
-              data: temperatureData,
+              data: series('mean'),
               borderColor: '#dc2626',
               backgroundColor: 'rgba(220, 38, 38, 0.1)',
               fill: true,
               tension: 0.4
+          }, {
+              label: 'Min',
+              data: series('min'),
+              borderColor: 'rgba(220, 38, 38, 0.1)',
+              borderDash: [4, 4],
+              pointRadius: 0,
+              fill: false
+          }, {
+              label: 'Max',
+              data: series('max'),
+              borderColor: 'rgba(220, 38, 38, 0.1)',
+              borderDash: [4, 4],
+              pointRadius: 0,
+              fill: false
           }]
       },
       options: {
@@ -339,8 +345,6 @@ function createTemperatureChart() {
           },
           scales: {
               y: {
-                  min: 15,
-                  max: 35,
                   title: {
                       display: true,
                       text: 'Temperature (°C)'
@@ -352,53 +356,39 @@ function createTemperatureChart() {
 }
 
 // Create Pressure Variations chart
-function createPressureChart() {
-  // Find the Pressure Variations chart container
-  const containers = document.querySelectorAll('.chart-card .placeholder-chart');
-  let pressureContainer = null;
-  
-  for (const container of containers) {
-    if (container.textContent.includes('Pressure Area Chart')) {
-      pressureContainer = container;
-      break;
-    }
-  }
-  
-  if (!pressureContainer) return;
-  
-  // Create canvas
-  pressureContainer.innerHTML = '<canvas id="pressureChart"></canvas>';
-  
-  const ctx = document.getElementById('pressureChart');
+function createPressureChart(data) {
+  const ctx = chartCanvas('pressureChart', 'Pressure Area Chart');
   if (!ctx) return;
   
-  // Generate labels (past 24 hours with 2-hour intervals)
-  const labels = [];
-  const now = new Date();
-  for (let i = 12; i >= 0; i--) {
-      const time = new Date(now);
-      time.setHours(now.getHours() - i * 2);
-      labels.push(time.toLocaleTimeString('en-US', { hour: '2-digit', minute: '2-digit' }));
-  }
-  
-  // Sample data with random variations around 106.5 kPa
-  const pressureData = [];
-  for (let i = 0; i < 13; i++) {
-      pressureData.push(106.5 + (Math.random() * 4 - 2));
-  }
+  // Mean per bucket, with the bucket's min and max around it
+  const stats = data.buckets.map(bucket => bucket.sensors.pressure);
+  const series = key => stats.map(stat => stat ? stat[key] : null);
   
-  // Create chart
-  const chart = new Chart(ctx, {
+  renderChart(ctx, {
       type: 'line',
       data: {
-          labels: labels,
+          labels: bucketLabels(data),
           datasets: [{
               label: 'Pressure (kPa)',
-              data: pressureData,
+              data: series('mean'),
               borderColor: '#3b82f6',
               backgroundColor: 'rgba(59, 130, 246, 0.1)',
               fill: true,
               tension: 0.4
+          }, {
+              label: 'Min',
+              data: series('min'),
+              borderColor: 'rgba(59, 130, 246, 0.1)',
+              borderDash: [4, 4],
+              pointRadius: 0,
+              fill: false
+          }, {
+              label: 'Max',
+              data: series('max'),
+              borderColor: 'rgba(59, 130, 246, 0.1)',
+              borderDash: [4, 4],
+              pointRadius: 0,
+              fill: false
           }]
       },
       options: {
@@ -412,8 +402,6 @@ function createPressureChart() {
           },
           scales: {
               y: {
-                  min: 95,
-                  max: 115,
                   title: {
                       display: true,
                       text: 'Pressure (kPa)'
@@ -429,6 +417,15 @@ function setupFilters() {
   const filterButton = document.querySelector('.filter-button');
   if (!filterButton) return;
   
+  // Show the start/end pickers for a custom range
+  const timeRange = document.getElementById('timeRange');
+  const customDates = document.getElementById('customDateContainer');
+  if (timeRange && customDates) {
+    timeRange.addEventListener('change', function() {
+      customDates.style.display = this.value === 'custom' ? '' : 'none';
+    });
+  }
+  
   filterButton.addEventListener('click', function() {
       // Get filter values
       const timeRange = document.querySelector('select[id="timeRange"]').value;
@@ -437,8 +434,6 @@ function setupFilters() {
       
       console.log(`Applying filters: Time=${timeRange}, Component=${component}, Status=${status}`);
       
-      // In a real implementation, this would refresh the charts with filtered data
-      // For demo purposes, just reload the current charts
-      initializeCharts();
+      createAllCharts();
   });
 }
\ No newline at end of file
@@ -10,9 +10,8 @@ document.addEventListener('DOMContentLoaded', function() {
     updateTime();
     setInterval(updateTime, 1000);
     
-    // Simulate real-time monitoring with updates
-    setInterval(updateComponentStatus, 5000);
-    setInterval(updateSensorReadings, 3000);
+    // Live updates pushed by the server whenever the status changes
+    subscribeToStatusEvents();
 
     // Add event listeners for manual status control (if needed)
     setupManualControls();
@@ -23,11 +22,20 @@ document.addEventListener('DOMContentLoaded', function() {
     // Create performance chart
     createPerformanceChart();
     
-    // Initialize component statuses
-    updateComponentStatus(true); // true = force initial update
-    
-    // Initialize sensor readings
-    updateSensorReadings(true); // true = force initial update
+    // First render from the current state; the event stream takes over from there
+    fetch('/detection')
+      .then(response => response.json())
+      .then(renderDetection)
+      .catch(error => console.error('Error loading detection status:', error));
+
+    fetch('/sensors')
+      .then(response => response.json())
+      .then(sensors => {
+        const readings = {};
+        Object.keys(sensors).forEach(name => { readings[name] = sensors[name].reading; });
+        renderSensors(readings);
+      })
+      .catch(error => console.error('Error loading sensor readings:', error));
   }
   
   // Update the time display
@@ -79,7 +87,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const cycleTimeData = [3.8, 4.2, 4.1, 3.9, 4.0, 4.2, 4.5, 4.4, 4.6, 4.8];
     
     // Use Chart.js to create the chart
-    const chart = new Chart(ctx, {
+    new Chart(ctx, {
       type: 'line',
       data: {
         labels: labels,
@@ -142,29 +150,58 @@ document.addEventListener('DOMContentLoaded', function() {
         }
       }
     });
-    
-    // Update the chart data periodically
-    setInterval(() => {
-      // Remove the oldest data point and add a new one
-      chart.data.datasets[0].data.shift();
-      chart.data.datasets[1].data.shift();
-      
-      // Add new random data
-      const newSuccessRate = Math.max(75, Math.min(95, chart.data.datasets[0].data[chart.data.datasets[0].data.length - 1] + (Math.random() * 6 - 3)));
-      const newCycleTime = Math.max(3.5, Math.min(5, chart.data.datasets[1].data[chart.data.datasets[1].data.length - 1] + (Math.random() * 0.4 - 0.2)));
-      
-      chart.data.datasets[0].data.push(newSuccessRate);
-      chart.data.datasets[1].data.push(newCycleTime);
-      
-      // Update time labels
-      chart.data.labels.shift();
-      const now = new Date();
-      chart.data.labels.push(now.toLocaleTimeString('en-US', { hour: '2-digit', minute: '2-digit' }));
-      
-      chart.update();
-    }, 5000);
   }
   
+  // Subscribe to the server's detection/sensor change events (Server-Sent Events).
+  // EventSource reconnects on its own if the connection drops.
+  function subscribeToStatusEvents() {
+    if (!window.EventSource) return;
+    const source = new EventSource('/events');
+
+    source.addEventListener('detection', event => renderDetection(JSON.parse(event.data)));
+    source.addEventListener('sensors', event => renderSensors(JSON.parse(event.data)));
+  }
+
+  // Render a detection status (as served by /detection and the 'detection' event)
+  function renderDetection(detection) {
+    const currentStatuses = {
+      flowCellHoles: detection.fuel_cell_holes === 'detected' ? 'Detected' : 'Not Detected',
+      pipette: detection.pipette === 'detected' ? 'Detected' : 'Not Detected',
+      flaps: detection.flaps === 'Closed' ? 'Closed' : 'Open',
+      overflow: detection.overflow === 'Overflowing' ? 'Critical' : 'Normal',
+      overall: detection.overall
+    };
+
+    updateComponentStatusUI('Flow Cell Holes', currentStatuses.flowCellHoles);
+    updateComponentStatusUI('Pipette', currentStatuses.pipette);
+    updateComponentStatusUI('Flaps', currentStatuses.flaps);
+    updateComponentStatusUI('Overflow', currentStatuses.overflow);
+    updateOverallStatus(currentStatuses);
+    updateLiveFeedIndicators(currentStatuses);
+    updateAlerts(currentStatuses);
+  }
+
+  // Render formatted sensor readings keyed by sensor name (as in the 'sensors' event)
+  function renderSensors(sensors) {
+    const ranges = {
+      temperature: { min: 15, max: 35 },
+      pressure: { min: 95, max: 105 },
+      motion: { min: 0, max: 2 },
+      ultrasonic: { min: 10, max: 60 }
+    };
+    // Readings arrive formatted (e.g. "24.3 °C"); motion is "Detected" / "Not Detected"
+    const temperature = parseFloat(sensors.temperature);
+    const pressure = parseFloat(sensors.pressure);
+    const ultrasonic = parseFloat(sensors.ultrasonic);
+
+    if (!isNaN(temperature)) updateSensorUI('Temperature', temperature.toFixed(1), '°C', ranges.temperature);
+    if (!isNaN(pressure)) updateSensorUI('Pressure', pressure.toFixed(1), 'kPa', ranges.pressure);
+    if (sensors.motion !== undefined && sensors.motion !== 'unknown') {
+      updateSensorUI('Motion', (sensors.motion === 'Detected' ? 1 : 0).toFixed(1), 'mm/s', ranges.motion);
+    }
+    if (!isNaN(ultrasonic)) updateSensorUI('Ultrasonic', ultrasonic.toFixed(1), 'mm', ranges.ultrasonic);
+  }
+
   // Set up manual controls for component statuses
   function setupManualControls() {
     // This function could add event listeners for buttons or UI controls
@@ -219,64 +256,6 @@ document.addEventListener('DOMContentLoaded', function() {
     };
   }
   
-  // Update component status indicators
-  function updateComponentStatus(forceUpdate = false) {
-    // Define possible statuses
-    const statuses = {
-      flowCellHoles: ['Detected', 'Not Detected'],
-      pipette: ['Detected', 'Not Detected'],
-      flaps: ['Open', 'Closed'],
-      overflow: ['Normal', 'Warning', 'Critical']
-    };
-    
-    // Get current statuses or set specific values if forced update
-    let currentStatuses = {};
-    
-    if (forceUpdate) {
-      // Initial setup - set statuses based on the image
-      currentStatuses = {
-        flowCellHoles: 'Not Detected',
-        pipette: 'Detected',
-        flaps: 'Closed',
-        overflow: 'Normal'
-      };
-    } else {
-      // For automatic updates, use a pattern that cycles through statuses
-      // Get current time to create a consistent pattern
-      const now = new Date();
-      const cycleMinutes = now.getMinutes() % 10; // 0-9 minute cycle
-      
-      currentStatuses = {
-        // Change Flow Cell Holes status based on minute (0-4: Not Detected, 5-9: Detected)
-        flowCellHoles: cycleMinutes < 5 ? 'Not Detected' : 'Detected',
-        
-        // Change Pipette status based on minute (0-1, 5-6: Not Detected, others: Detected)
-        pipette: (cycleMinutes % 5 < 2) ? 'Not Detected' : 'Detected',
-        
-        // Change Flaps status based on minute (0-2, 5-7: Closed, others: Open)
-        flaps: (cycleMinutes % 5 < 3) ? 'Closed' : 'Open',
-        
-        // Change Overflow status based on minute (0: Critical, 1-2: Warning, others: Normal)
-        overflow: cycleMinutes === 0 ? 'Critical' : (cycleMinutes < 3 ? 'Warning' : 'Normal')
-      };
-    }
-    
-    // Update the status in the UI
-    updateComponentStatusUI('Flow Cell Holes', currentStatuses.flowCellHoles);
-    updateComponentStatusUI('Pipette', currentStatuses.pipette);
-    updateComponentStatusUI('Flaps', currentStatuses.flaps);
-    updateComponentStatusUI('Overflow', currentStatuses.overflow);
-    
-    // Update overall system status
-    updateOverallStatus(currentStatuses);
-    
-    // Update status indicators on the live feed
-    updateLiveFeedIndicators(currentStatuses);
-    
-    // Update alerts based on status changes
-    updateAlerts(currentStatuses);
-  }
-  
   // Helper function to update component status in the UI
   function updateComponentStatusUI(componentName, status) {
     // Find all component items
@@ -331,8 +310,8 @@ document.addEventListener('DOMContentLoaded', function() {
   function updateOverallStatus(statuses) {
     let overallStatus = 'NORMAL';
     
-    // Logic to determine overall status
-    if (statuses.flowCellHoles === 'Not Detected' || statuses.overflow === 'Critical') {
+    // Logic to determine overall status (the server's verdict wins when it is known)
+    if (statuses.overall === 'FAIL' || statuses.flowCellHoles === 'Not Detected' || statuses.overflow === 'Critical') {
       overallStatus = 'FAIL';
     } else if (statuses.flaps === 'Closed' || statuses.overflow === 'Warning') {
       overallStatus = 'WARNING';
@@ -467,86 +446,6 @@ document.addEventListener('DOMContentLoaded', function() {
     }
   }
   
-  // Update sensor readings with realistic variations
-  function updateSensorReadings(forceUpdate = false) {
-    // Base values for sensors
-    const baseValues = {
-      temperature: 24.3,
-      pressure: 101.3,
-      motion: 0.3,
-      ultrasonic: 45.7
-    };
-    
-    // Min/Max ranges for each sensor
-    const ranges = {
-      temperature: { min: 15, max: 35 },
-      pressure: { min: 95, max: 105 },
-      motion: { min: 0, max: 2 },
-      ultrasonic: { min: 10, max: 60 }
-    };
-    
-    // Get current values from the DOM or apply random variations
-    let currentValues = {};
-    
-    if (forceUpdate) {
-      currentValues = { ...baseValues };
-    } else {
-      // Apply random variations to each sensor
-      const sensorItems = document.querySelectorAll('.sensor-item');
-      
-      sensorItems.forEach(item => {
-        const nameElement = item.querySelector('.sensor-name span');
-        const valueElement = item.querySelector('.sensor-value .value');
-        
-        if (nameElement && valueElement) {
-          const sensorName = nameElement.textContent.trim().toLowerCase();
-          const currentValue = parseFloat(valueElement.textContent);
-          
-          // Apply appropriate random variation based on sensor type
-          if (sensorName === 'temperature') {
-            currentValues.temperature = Math.max(
-              ranges.temperature.min, 
-              Math.min(
-                ranges.temperature.max, 
-                currentValue + (Math.random() * 1.0 - 0.5)
-              )
-            );
-          } else if (sensorName === 'pressure') {
-            currentValues.pressure = Math.max(
-              ranges.pressure.min, 
-              Math.min(
-                ranges.pressure.max, 
-                currentValue + (Math.random() * 1.0 - 0.5)
-              )
-            );
-          } else if (sensorName === 'motion') {
-            currentValues.motion = Math.max(
-              ranges.motion.min, 
-              Math.min(
-                ranges.motion.max, 
-                currentValue + (Math.random() * 0.3 - 0.15)
-              )
-            );
-          } else if (sensorName === 'ultrasonic') {
-            currentValues.ultrasonic = Math.max(
-              ranges.ultrasonic.min, 
-              Math.min(
-                ranges.ultrasonic.max, 
-                currentValue + (Math.random() * 2.0 - 1.0)
-              )
-            );
-          }
-        }
-      });
-    }
-    
-    // Update the values in the UI
-    updateSensorUI('Temperature', currentValues.temperature.toFixed(1), '°C', ranges.temperature);
-    updateSensorUI('Pressure', currentValues.pressure.toFixed(1), 'kPa', ranges.pressure);
-    updateSensorUI('Motion', currentValues.motion.toFixed(1), 'mm/s', ranges.motion);
-    updateSensorUI('Ultrasonic', currentValues.ultrasonic.toFixed(1), 'mm', ranges.ultrasonic);
-  }
-  
   // Helper function to update sensor UI
   function updateSensorUI(sensorName, value, unit, range) {
     const sensorItems = document.querySelectorAll('.sensor-item');
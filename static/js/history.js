@@ -37,7 +37,8 @@ document.addEventListener('DOMContentLoaded', function() {
   searchInput.addEventListener('input', function() {
       const searchTerm = this.value.toLowerCase();
       
-      timelineRows.forEach(row => {
+      // Rows are re-rendered on every fetch, so look them up each time
+      document.querySelectorAll('.timeline-body .timeline-row').forEach(row => {
           const text = row.textContent.toLowerCase();
           if (text.includes(searchTerm)) {
               row.style.display = '';
@@ -54,94 +55,92 @@ document.addEventListener('DOMContentLoaded', function() {
       dateRangeInput.value = today;
   }
   
+  // Events per page of the timeline
+  const PAGE_SIZE = 20;
+
+  // Display names for the stored event types
+  const EVENT_TYPE_NAMES = {
+      error: 'Error',
+      warning: 'Warning',
+      status: 'Status',
+      success: 'Success',
+      maintenance: 'Maintenance',
+      robot: 'Robot'
+  };
+
+  // Filters of the page currently shown, reused by the pagination buttons;
+  // cursors holds the ?before= cursor of every page up to the current one
+  let currentFilters = null;
+
+  // Query parameters for the event type and day filters
+  function historyParams(filters) {
+      const params = new URLSearchParams();
+      if (filters.eventType && filters.eventType !== 'all') {
+          params.set('type', filters.eventType);
+      }
+      if (filters.date) {
+          // The selected day in local time
+          const start = new Date(`${filters.date}T00:00:00`);
+          const end = new Date(start);
+          end.setDate(end.getDate() + 1);
+          params.set('start', start.getTime() / 1000);
+          params.set('end', end.getTime() / 1000);
+      }
+      return params;
+  }
+
   // Function to fetch event history data
   function fetchHistoryData(filters) {
-      console.log('Fetching history data with filters:', filters);
-      
-      // In a real implementation, this would make an API call to get data
-      // Then update the timeline with the fetched events
-      
+      filters = { cursors: [null], ...filters };
+      currentFilters = filters;
+
       // Show loading state
       const timelineBody = document.querySelector('.timeline-body');
       timelineBody.innerHTML = '<div class="loading-indicator"><i class="fas fa-spinner fa-spin"></i> Loading events...</div>';
-      
-      // Simulate API delay
-      setTimeout(() => {
-          // In a real implementation, this would parse the response and build the timeline
-          generateMockEventData(filters);
-      }, 1000);
+
+      const params = historyParams(filters);
+      const before = filters.cursors[filters.cursors.length - 1];
+      if (before) params.set('before', before);
+      params.set('per_page', PAGE_SIZE);
+
+      fetch(`/history/events?${params}`)
+          .then(response => response.json())
+          .then(data => {
+              renderEvents(data.events);
+              renderPagination(filters, data);
+          })
+          .catch(error => {
+              console.error('Failed to load history:', error);
+              timelineBody.innerHTML = '<div class="loading-indicator">Could not load events</div>';
+          });
   }
-  
-  // Generate mock event data for demonstration
-  function generateMockEventData(filters) {
+
+  // Render one page of stored events
+  function renderEvents(storedEvents) {
       const timelineBody = document.querySelector('.timeline-body');
       timelineBody.innerHTML = ''; // Clear existing content
-      
-      // Mock event types
-      const eventTypes = ['Error', 'Warning', 'Status', 'Success', 'Maintenance'];
-      const components = ['Fuel Cell Holes', 'Pipette', 'Flaps', 'Overflow', 'System'];
-      const statuses = ['FAIL', 'WARNING', 'INFO', 'PASS', 'COMPLETE'];
-      const descriptions = [
-          'Fuel cell holes not detected during processing',
-          'Flaps detected in closed position',
-          'Processing started for batch',
-          'Batch completed successfully',
-          'Calibration check performed',
-          'Temperature exceeded normal range',
-          'Overflow detected in processing area',
-          'Pressure dropped below minimum threshold',
-          'Maintenance required on pipette assembly',
-          'System restarted automatically'
-      ];
-      
-      // Filter events by type if specified
-      let filteredTypes = eventTypes;
-      if (filters.eventType !== 'all') {
-          // Map filter value to display text
-          const typeMap = {
-              'error': 'Error',
-              'warning': 'Warning',
-              'status': 'Status',
-              'success': 'Success',
-              'maintenance': 'Maintenance'
-          };
-          filteredTypes = [typeMap[filters.eventType]];
-      }
-      
-      // Create mock events based on filters
-      const mockEvents = [];
-      const numEvents = 10; // Number of events to generate
-      
-      for (let i = 0; i < numEvents; i++) {
-          // Use filtered event types
-          const eventType = filteredTypes[Math.floor(Math.random() * filteredTypes.length)];
-          const component = components[Math.floor(Math.random() * components.length)];
-          const status = statuses[Math.floor(Math.random() * statuses.length)];
-          const description = descriptions[Math.floor(Math.random() * descriptions.length)];
-          
-          // Mock date: today - random hours (0-48)
-          const eventDate = new Date(filters.date);
-          eventDate.setHours(eventDate.getHours() - Math.floor(Math.random() * 48));
-          
-          mockEvents.push({
-              date: eventDate.toISOString().split('T')[0],
+
+      const rows = storedEvents.map(event => {
+          const eventDate = new Date(event.timestamp * 1000);
+          const pad = n => String(n).padStart(2, '0');
+          return {
+              date: `${eventDate.getFullYear()}-${pad(eventDate.getMonth() + 1)}-${pad(eventDate.getDate())}`,
               time: eventDate.toTimeString().split(' ')[0],
-              eventType: eventType,
-              component: component,
-              description: description,
-              status: status
-          });
-      }
-      
-      // Sort events by date/time (most recent first)
-      mockEvents.sort((a, b) => {
-          const dateA = new Date(`${a.date}T${a.time}`);
-          const dateB = new Date(`${b.date}T${b.time}`);
-          return dateB - dateA;
+              eventType: EVENT_TYPE_NAMES[event.event_type] || event.event_type,
+              component: event.camera && event.component !== 'Robot'
+                  ? `${event.component} (${event.camera})` : event.component,
+              description: event.description,
+              status: event.status
+          };
       });
+
+      if (rows.length === 0) {
+          timelineBody.innerHTML = '<div class="loading-indicator">No events for these filters</div>';
+          return;
+      }
       
       // Create event rows
-      mockEvents.forEach(event => {
+      rows.forEach(event => {
           // Create row element
           const row = document.createElement('div');
           row.className = 'timeline-row';
@@ -279,70 +278,47 @@ document.addEventListener('DOMContentLoaded', function() {
       fetchHistoryData(filters);
   });
   
-  // Set up export button
+  // Set up export button: the server streams every matching event as CSV
   document.querySelector('.export-button').addEventListener('click', function() {
-      console.log('Exporting history data...');
-      
-      // Get current filters
-      const eventType = document.getElementById('eventType').value;
-      const dateRange = document.getElementById('dateRange').value;
-      
-      // In a real implementation, this would generate a CSV or PDF
-      alert(`Exporting events:\nEvent Type: ${eventType}\nDate: ${dateRange}`);
+      const params = historyParams({
+          eventType: document.getElementById('eventType').value,
+          date: document.getElementById('dateRange').value
+      });
+      params.set('format', 'csv');
+      window.location.href = `/history/export?${params}`;
   });
   
-  // Set up pagination
-  const paginationButtons = document.querySelectorAll('.pagination-button, .pagination-number');
-  
-  paginationButtons.forEach(button => {
-      if (!button.classList.contains('disabled')) {
-          button.addEventListener('click', function() {
-              // Remove active class from all pagination numbers
-              document.querySelectorAll('.pagination-number').forEach(num => {
-                  num.classList.remove('active');
-              });
-              
-              // If this is a number button, make it active
-              if (this.classList.contains('pagination-number')) {
-                  this.classList.add('active');
-                  
-                  // Get current filters and update with page number
-                  const eventType = document.getElementById('eventType').value;
-                  const dateRange = document.getElementById('dateRange').value;
-                  
-                  const filters = {
-                      eventType: eventType,
-                      date: dateRange,
-                      page: this.textContent.trim()
-                  };
-                  
-                  fetchHistoryData(filters);
-              } else {
-                  // This is a prev/next button
-                  const currentPage = document.querySelector('.pagination-number.active');
-                  let newPage;
-                  
-                  if (this.querySelector('i').classList.contains('fa-chevron-left')) {
-                      // Previous page
-                      newPage = currentPage.previousElementSibling;
-                      while (newPage && !newPage.classList.contains('pagination-number')) {
-                          newPage = newPage.previousElementSibling;
-                      }
-                  } else {
-                      // Next page
-                      newPage = currentPage.nextElementSibling;
-                      while (newPage && !newPage.classList.contains('pagination-number')) {
-                          newPage = newPage.nextElementSibling;
-                      }
-                  }
-                  
-                  if (newPage) {
-                      newPage.click();
-                  }
-              }
-          });
+  // Rebuild the pagination controls for the page shown; pages are followed
+  // by cursor, so only the neighbouring pages can be reached directly
+  function renderPagination(filters, data) {
+      const pagination = document.querySelector('.pagination');
+      if (!pagination) return;
+      pagination.innerHTML = '';
+
+      const page = filters.cursors.length;
+      const pages = Math.max(1, Math.ceil(data.total / data.per_page));
+
+      function addButton(label, cursors, classes) {
+          const button = document.createElement('button');
+          button.className = classes;
+          button.innerHTML = label;
+          if (cursors !== null) {
+              button.addEventListener('click', () => fetchHistoryData({ ...filters, cursors: cursors }));
+          }
+          pagination.appendChild(button);
       }
-  });
+
+      addButton('<i class="fas fa-chevron-left"></i>', page > 1 ? filters.cursors.slice(0, -1) : null,
+                page > 1 ? 'pagination-button' : 'pagination-button disabled');
+
+      const position = document.createElement('span');
+      position.className = 'pagination-number active';
+      position.textContent = `${page} / ${pages}${data.total_capped ? '+' : ''}`;
+      pagination.appendChild(position);
+
+      addButton('<i class="fas fa-chevron-right"></i>', data.next ? filters.cursors.concat([data.next]) : null,
+                data.next ? 'pagination-button' : 'pagination-button disabled');
+  }
   
   // Initial data fetch with default filters
   const initialFilters = {
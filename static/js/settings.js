@@ -65,8 +65,10 @@ document.addEventListener('DOMContentLoaded', function() {
     rangeSliders.forEach(slider => {
         const valueDisplay = slider.nextElementSibling;
         
-        // Set initial value display
-        valueDisplay.textContent = `${slider.value}%`;
+        // Set initial value display (disabled sliders wait for the server's value)
+        if (!slider.disabled) {
+            valueDisplay.textContent = `${slider.value}%`;
+        }
         
         // Update value display on input
         slider.addEventListener('input', function() {
@@ -141,14 +143,6 @@ document.addEventListener('DOMContentLoaded', function() {
                 defaultValue: 50,
                 unit: '%'
             },
-            flapThreshold: {
-                defaultValue: 60,
-                unit: '%'
-            },
-            overflowThreshold: {
-                defaultValue: 20,
-                unit: '%'
-            },
             circleThreshold: {
                 defaultValue: 75,
                 unit: '%'
@@ -183,6 +177,39 @@ document.addEventListener('DOMContentLoaded', function() {
     // Call setup function
     setupDetectionSliders();
     
+    // Sliders backed by the server's inspection settings (slider id -> setting)
+    const INSPECTION_SETTINGS = {
+        flapThreshold: 'flap_open_percent',
+        overflowThreshold: 'overflow_percent'
+    };
+    
+    // Show the thresholds the detectors are actually using. These sliders have
+    // no defaults of their own: they stay disabled, and are left out of saves,
+    // until the server's values are loaded
+    function loadInspectionSettings() {
+        fetch('/settings/inspection')
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(settings => {
+                Object.entries(INSPECTION_SETTINGS).forEach(([sliderId, name]) => {
+                    const slider = document.getElementById(sliderId);
+                    if (slider && settings[name] !== undefined) {
+                        slider.value = settings[name];
+                        slider.disabled = false;
+                        slider.dispatchEvent(new Event('input'));
+                        originalValues[sliderId] = slider.value;
+                    }
+                });
+            })
+            .catch(error => console.error('Error loading inspection settings:', error));
+    }
+    
+    loadInspectionSettings();
+    
     // Toggle switches
     const toggles = document.querySelectorAll('.toggle input');
     toggles.forEach(toggle => {
@@ -203,21 +230,18 @@ document.addEventListener('DOMContentLoaded', function() {
         this.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Saving...';
         this.disabled = true;
         
-        // Simulate API call to save settings
-        setTimeout(() => {
-            // In a real implementation, this would make an API call to save
-            saveSettingsToServer();
-            
-            // Update original values to match current
-            updateOriginalValues();
-            
-            // Reset button
-            this.innerHTML = 'Save Changes';
-            this.disabled = false;
-            
-            // Show success message
-            showMessage('Settings saved successfully', 'success');
-        }, 1500);
+        saveSettingsToServer()
+            .then(() => {
+                // Update original values to match current
+                updateOriginalValues();
+                showMessage('Settings saved successfully', 'success');
+            })
+            .catch(error => showMessage(`Settings not saved: ${error.message}`, 'error'))
+            .finally(() => {
+                // Reset button
+                this.innerHTML = 'Save Changes';
+                this.disabled = false;
+            });
     });
     
     // Cancel button
@@ -267,7 +291,7 @@ document.addEventListener('DOMContentLoaded', function() {
         showMessage('Changes discarded', 'info');
     }
     
-    // Simulate saving settings to server
+    // Save settings; detection thresholds take effect on the running cameras
     function saveSettingsToServer() {
         console.log('Saving settings to server...');
         
@@ -289,7 +313,25 @@ document.addEventListener('DOMContentLoaded', function() {
         
         console.log('Settings to save:', settings);
         
-        // In a real implementation, this would send the settings to the server
+        // Only the detection thresholds are kept on the server so far
+        const inspection = {};
+        Object.entries(INSPECTION_SETTINGS).forEach(([sliderId, name]) => {
+            const slider = document.getElementById(sliderId);
+            if (slider && !slider.disabled && settings[sliderId] !== undefined) {
+                inspection[name] = Number(settings[sliderId]);
+            }
+        });
+        
+        return fetch('/settings/inspection', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(inspection)
+        }).then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            return response.json();
+        });
     }
     
     // Show message function
@@ -0,0 +1,492 @@
+import multiprocessing
+import threading
+import time
+
+import cv2
+
+import metrics
+from detection_cache import DetectionCache
+from detector_pool import ProcessDetectorPool
+from inspection import annotate, describe, evaluate
+from pipeline import FramePool, InspectionPipeline
+from recording import DEFAULT_KEEP_RUNS, DEFAULT_MAX_BYTES, FrameRecorder, open_capture
+from snapshots import StatusBoard
+from streaming import FrameBroadcaster
+from tracking import RoiTracker
+from vision import DETECTORS, TRACKABLE, run_detectors, run_detectors_pyramid
+
+
+def new_status():
+    """Detection status dict with every field still unknown"""
+    return {
+        "fuel_cell_holes": "unknown",
+        "pipette": "unknown",
+        "flaps": "unknown",
+        "overflow": "unknown",
+        "overall": "unknown",
+        "temperature": "unknown",
+        "pressure": "unknown",
+        "motion": "unknown",
+        "ultrasonic": "unknown"
+    }
+
+
+class ResultRecorder:
+    """
+    Mixin for stations: ``record_result`` is their StatusBoard's on_publish
+    hook, feeding every published result to ``event_store``, ``rollups`` and
+    ``status_log`` (each may be None) under the station's ``name``.
+    """
+
+    def record_result(self, previous, snapshot):
+        """
+        Queue state changes for the event store and the status log and fold the
+        result into the rollups (no I/O here)
+        """
+        if self.event_store is not None:
+            self.event_store.record_transitions(self.name, previous.status, snapshot.status,
+                                                snapshot.timestamp)
+        if self.rollups is not None:
+            self.rollups.add(self.name, snapshot.timestamp, snapshot.status, previous.status)
+        if self.status_log is not None:
+            self.status_log.record(self.name, previous.status, snapshot.status, snapshot.timestamp)
+
+
+class InspectionStation(ResultRecorder):
+    """
+    One camera with its own capture -> detect -> publish pipeline.
+
+    Each station owns everything that used to be module-level state in
+    app.py: its detection status, stream broadcaster, detection cache, ROI
+    tracks and optional detector process pool, so several cameras can be
+    inspected side by side in one process.
+
+    Status is published once per processed frame as an immutable, versioned
+    snapshot (see snapshots.StatusBoard), with recent states kept in a
+    history ring.
+    """
+
+    def __init__(self, name, source=0, drop_policy="latest", detector_workers=0,
+                 pyramid_levels=0, max_staleness=None, roi_tracking=True,
+                 full_scan_interval=30, extra_status=None, history_size=1024, event_store=None,
+                 rollups=None, status_log=None, record_path=None,
+                 record_max_bytes=DEFAULT_MAX_BYTES, record_keep_runs=DEFAULT_KEEP_RUNS,
+                 replay_speed=1.0, verbose=True):
+        """
+        Args:
+            name (str): Camera name used in the per-camera endpoints
+            source: cv2.VideoCapture device index or video path, or a recording
+                directory (see recording.py) to replay
+            drop_policy (str): Pipeline drop policy ("latest", "oldest" or "block")
+            detector_workers (int): Detector worker processes, 0 runs detectors inline
+            pyramid_levels (int): Coarse-to-fine pyramid levels for full-frame scans, 0 disables
+            max_staleness (dict): Per-detector cache staleness in seconds, None disables motion gating
+            roi_tracking (bool): Track holes and pipette in a window between full scans
+            full_scan_interval (int): Tracked frames between forced full-frame scans
+            extra_status (callable): Returns extra status fields (e.g. sensor readings)
+                merged into the status on every published frame
+            history_size (int): Detection states kept for /detection/history
+            event_store (event_store.EventStore): Persists every detection state change
+            rollups (analytics.AnalyticsRollups): Aggregates every result for /analytics
+            status_log (status_log.StatusLog): Logs detection state changes and summaries
+            record_path (str): Record every captured frame to a new timestamped
+                directory under this one on each run
+            record_max_bytes (int): Most bytes of frames preallocated per run; the
+                recording keeps as many of the most recent frames as fit
+            record_keep_runs (int): Runs kept under ``record_path``, oldest deleted first
+            replay_speed (float): Playback speed of a recording source, 0 for as fast as possible
+            verbose (bool): Log to ``status_log``
+        """
+        self.name = name
+        self.source = source
+        self.drop_policy = drop_policy
+        self.detector_workers = detector_workers
+        self.pyramid_levels = pyramid_levels
+        self.extra_status = extra_status
+        self.record_path = record_path
+        self.record_max_bytes = record_max_bytes
+        self.record_keep_runs = record_keep_runs
+        self.replay_speed = replay_speed
+        self.verbose = verbose
+
+        self.event_store = event_store
+        self.rollups = rollups
+        self.status_log = status_log if verbose else None
+        self.board = StatusBoard(new_status(), history_size, on_publish=self.record_result)
+        # Processed frames are JPEG-encoded once by the broadcaster and fanned out to every client
+        self.broadcaster = FrameBroadcaster(name=name)
+        # Captured and annotated frames cycle through recycled buffers
+        self.frame_pool = FramePool()
+        self.detection_cache = DetectionCache(max_staleness) if max_staleness is not None else None
+        self.roi_tracker = (RoiTracker(TRACKABLE, full_scan_interval=full_scan_interval)
+                            if roi_tracking else None)
+        self.detector_pool = None
+        self.pipeline = None
+        self._thread = None
+        # (version, raw detector output, fields) of the latest frame, described on request
+        self._latest = None
+
+    # ----------------- Detection -----------------
+    def run_full_frame(self, frame, names, timings=None):
+        """Run the named detectors on the whole frame, inline or on the process pool"""
+        if self.detector_pool is not None:
+            return self.detector_pool.run(frame, names, timings)
+        if self.pyramid_levels > 0:
+            return run_detectors_pyramid(frame, self.pyramid_levels, names, timings)
+        return run_detectors(frame, names=names, timings=timings)
+
+    def run_selected_detectors(self, frame, names, timings=None):
+        """
+        Run the named detectors. Tracked detectors with a live track search only
+        their window (inline, it is small); everything else scans the full frame.
+        """
+        tracker = self.roi_tracker
+        if tracker is None:
+            return self.run_full_frame(frame, names, timings)
+
+        results = {}
+        full = []
+        for name in names:
+            window = tracker.window(name) if tracker.tracks(name) else None
+            if window is None:
+                full.append(name)
+                continue
+            x1, y1, x2, y2 = window
+            result = run_detectors(frame[y1:y2, x1:x2], names=[name], timings=timings)[name]
+            result = tracker.record(name, result, frame.shape, window)
+            if result is None:
+                full.append(name)  # Track lost: rescan the whole frame now
+            else:
+                results[name] = result
+
+        if full:
+            for name, result in self.run_full_frame(frame, full, timings).items():
+                if tracker.tracks(name):
+                    result = tracker.record(name, result, frame.shape)
+                results[name] = result
+        return results
+
+    def detect(self, frame):
+        """
+        Run the detectors that are due, either inline with one shared FrameContext
+        or in parallel worker processes reading the frame from shared memory.
+
+        Returns:
+            dict: Raw detector output keyed like vision.DETECTORS
+        """
+        timings = {}
+
+        def run(frame, names):
+            return self.run_selected_detectors(frame, names, timings)
+
+        if self.detection_cache is not None:
+            results = self.detection_cache.run(frame, run, list(DETECTORS))
+        else:
+            results = run(frame, list(DETECTORS))
+
+        # Only detectors that actually ran (not served from the cache) are timed
+        for name, seconds in timings.items():
+            metrics.DETECTOR_SECONDS.labels(self.name, name).observe(seconds)
+        return results
+
+    def process_frame(self, frame):
+        """
+        Process the frame to detect fuel cell components and status.
+        Update to detect:
+        - Fuel cell holes (open/closed)
+        - Syringe/pipette presence
+        - Flap state (closed/open) for both Priming and SpotON port covers
+        - Liquid overflow
+
+        Returns:
+            tuple: (annotated frame or None when nobody watches the stream, remarks)
+        """
+        if frame is None:
+            return None, []
+
+        results = self.detect(frame)
+        fields, remarks = evaluate(results)
+        extra = self.extra_status() if self.extra_status is not None else {}
+        snapshot = self.board.publish(fields, extra)
+        self._latest = (snapshot.version, results, fields)
+
+        # Overlays are only drawn while someone watches the stream
+        output = None
+        if self.watching():
+            with metrics.STAGE_SECONDS.labels(self.name, "overlay").time():
+                output = annotate(frame, results, fields,
+                                  out=self.frame_pool.acquire(frame.shape, frame.dtype))
+
+        return output, remarks
+
+    def watching(self):
+        """Whether any stream client needs annotated frames"""
+        return self.broadcaster.clients > 0
+
+    def overlay(self):
+        """
+        Detections of the latest frame for drawing on the client side.
+
+        Returns:
+            dict: ``inspection.describe()`` output plus the status ``version`` it
+                belongs to, or None before the first frame
+        """
+        latest = self._latest
+        if latest is None:
+            return None
+        version, results, fields = latest
+        return dict(describe(results, fields), version=version)
+
+    # ----------------- Capture pipeline -----------------
+    def publish_result(self, result):
+        """
+        Final pipeline stage: hand the annotated frame, if one was drawn, to
+        the stream encoder. Remarks are not printed per frame; state changes
+        reach the status log through record_result.
+        """
+        processed_frame, _ = result
+
+        # Hand the frame to the stream encoder, which recycles it once it is encoded
+        if processed_frame is not None:
+            self.broadcaster.publish(processed_frame, release=self.frame_pool.release)
+
+    def discard_result(self, result):
+        """Recycle the frame of a result the pipeline dropped instead of publishing"""
+        if result[0] is not None:
+            self.frame_pool.release(result[0])
+
+    def run(self):
+        """Open the camera and run the pipeline until the source is exhausted"""
+        cap = open_capture(self.source, self.replay_speed)
+
+        if not cap.isOpened():
+            print(f"Error: Cannot open camera {self.name!r} ({self.source})")
+            return
+
+        if self.detector_workers > 0:
+            self.detector_pool = ProcessDetectorPool(self.detector_workers,
+                                                     pyramid_levels=self.pyramid_levels)
+
+        # Enough buffers for a frame in every stage and hand-off, allocated up front
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if width > 0 and height > 0:
+            self.frame_pool.reserve((height, width, 3), self.frame_pool.size)
+
+        read = cap.read
+        recorder = None
+        if self.record_path is not None:
+            recorder = FrameRecorder(self.record_path, max_bytes=self.record_max_bytes,
+                                     keep_runs=self.record_keep_runs)
+            read = recorder.wrap(read)
+
+        # Capture, detection and publishing run on separate threads; the camera is
+        # always drained and each stage works on the newest frame available
+        # Devices and network streams report no frame count; files and recordings end
+        self.pipeline = InspectionPipeline(read, self.process_frame, self.publish_result,
+                                           drop_policy=self.drop_policy, name=self.name,
+                                           frame_pool=self.frame_pool, discard=self.discard_result,
+                                           finite=cap.get(cv2.CAP_PROP_FRAME_COUNT) > 0)
+        self.pipeline.start()
+        self.pipeline.join()
+
+        cap.release()
+        if recorder is not None:
+            recorder.close()
+        if self.detector_pool is not None:
+            self.detector_pool.close()
+            self.detector_pool = None
+
+    def start(self):
+        """Start the stream encoder and run the station on a background thread"""
+        self.broadcaster.start()
+        self._thread = threading.Thread(target=self.run, name=f"station-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self.pipeline is not None:
+            self.pipeline.stop()
+
+    @property
+    def status(self):
+        """Current detection status (read-only mapping)"""
+        return self.board.current().status
+
+    def snapshot(self):
+        """Copy of the current detection status"""
+        return dict(self.board.current().status)
+
+    def history(self, since=0, limit=None):
+        """Detection states newer than version ``since``, see SnapshotHistory.since"""
+        return self.board.history.since(since, limit)
+
+    def stats(self):
+        """Pipeline, cache and tracking statistics"""
+        if self.pipeline is None:
+            return {"running": False}
+        stats = {"running": self.pipeline.running, "stages": self.pipeline.stats()}
+        if self.detection_cache is not None:
+            stats["detection_cache"] = {"hits": self.detection_cache.hits,
+                                        "misses": self.detection_cache.misses}
+        if self.roi_tracker is not None:
+            stats["roi_tracking"] = {"full_scans": self.roi_tracker.full_scans,
+                                     "tracked_scans": self.roi_tracker.tracked_scans,
+                                     "losses": self.roi_tracker.losses}
+        return stats
+
+
+class _ChildStation(InspectionStation):
+    """
+    Station running in a camera process, reporting back over a pipe.
+
+    Every detection state is sent from the detect stage as soon as it is
+    published, so the parent records the same states as a local station
+    even for results the publish hand-off drops; the publish stage sends
+    the encoded frame, overlay and periodic statistics separately.
+    """
+
+    def __init__(self, name, conn, watching, **kwargs):
+        super().__init__(name, **kwargs)
+        self._conn = conn
+        self._watching = watching
+        self._stats_due = 0.0
+        # The detect and publish stages both send
+        self._send_lock = threading.Lock()
+
+    def _send(self, message):
+        with self._send_lock:
+            self._conn.send(message)
+
+    def watching(self):
+        # Stream clients are connected to the parent's broadcaster
+        return self._watching.value > 0
+
+    def process_frame(self, frame):
+        result = super().process_frame(frame)
+        if frame is not None:
+            self._send((self.snapshot(), None, None, None))
+        return result
+
+    def publish_result(self, result):
+        processed_frame, _ = result
+
+        # Annotated (and so encoded) only while the parent has stream clients
+        jpeg = None
+        if processed_frame is not None:
+            with metrics.STAGE_SECONDS.labels(self.name, "encode").time():
+                ret, encoded = cv2.imencode(".jpg", processed_frame)
+            if ret:
+                jpeg = encoded.tobytes()
+            self.frame_pool.release(processed_frame)
+
+        # Statistics and metrics travel with the frame about once a second
+        stats = None
+        now = time.monotonic()
+        if now >= self._stats_due:
+            stats = (self.stats(), metrics.REGISTRY.snapshot())
+            self._stats_due = now + 1.0
+        self._send((None, jpeg, self.overlay(), stats))
+
+    def send_final_stats(self):
+        """Report the final statistics and metrics once the pipeline has stopped"""
+        try:
+            self._send((None, None, None, (self.stats(), metrics.REGISTRY.snapshot())))
+        except OSError:
+            # The parent has gone away
+            pass
+
+
+def _station_main(name, conn, watching, kwargs):
+    station = _ChildStation(name, conn, watching, **kwargs)
+    try:
+        station.run()
+        # Counts since the last periodic report would otherwise be lost
+        station.send_final_stats()
+    finally:
+        conn.close()
+
+
+class StationProcess(ResultRecorder):
+    """
+    Parent-side proxy for an InspectionStation running in its own process.
+
+    The child runs capture and detection and sends back its status and, while
+    anyone is watching, the JPEG-encoded frame; the proxy exposes the same
+    status / broadcaster / snapshot / stats interface as a local station.
+    """
+
+    def __init__(self, name, extra_status=None, history_size=1024, event_store=None, rollups=None,
+                 status_log=None, verbose=True, **kwargs):
+        self.name = name
+        self.extra_status = extra_status
+        self.event_store = event_store
+        self.rollups = rollups
+        self.status_log = status_log if verbose else None
+        self.board = StatusBoard(new_status(), history_size, on_publish=self.record_result)
+        self.broadcaster = FrameBroadcaster(name=name)
+        self._kwargs = kwargs
+        self._stats = {"running": False}
+        self._overlay = None
+        self._process = None
+        self._conn = None
+        self._watching = None
+
+    def start(self):
+        """Spawn the camera process and start relaying its results"""
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe(duplex=False)
+        self._watching = ctx.Value("i", 0, lock=False)
+        self._process = ctx.Process(target=_station_main, name=f"station-{self.name}",
+                                    args=(self.name, child_conn, self._watching, self._kwargs),
+                                    daemon=True)
+        self._process.start()
+        child_conn.close()
+        self.broadcaster.start()
+        threading.Thread(target=self._relay, name=f"station-relay-{self.name}", daemon=True).start()
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+
+    def _relay(self):
+        while True:
+            try:
+                status, jpeg, overlay, stats = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            # Messages carry either a detection state, or a published frame's
+            # encoding, overlay and statistics
+            if status is not None:
+                extra = self.extra_status() if self.extra_status is not None else {}
+                self.board.publish(status, extra)
+            if overlay is not None:
+                # Versions are the parent's, like those of the status endpoints
+                self._overlay = dict(overlay, version=self.board.current().version)
+            if stats is not None:
+                self._stats, remote_metrics = stats
+                metrics.REGISTRY.load_remote(self.name, remote_metrics)
+            if jpeg is not None:
+                self.broadcaster.publish_jpeg(jpeg)
+            self._watching.value = self.broadcaster.clients
+        self._stats = dict(self._stats, running=False)
+
+    @property
+    def status(self):
+        """Latest status reported by the camera process (read-only mapping)"""
+        return self.board.current().status
+
+    def snapshot(self):
+        """Copy of the latest status reported by the camera process"""
+        return dict(self.board.current().status)
+
+    def history(self, since=0, limit=None):
+        """Detection states newer than version ``since``, see SnapshotHistory.since"""
+        return self.board.history.since(since, limit)
+
+    def overlay(self):
+        """Detections of the latest frame reported by the camera process, see InspectionStation.overlay"""
+        return self._overlay
+
+    def stats(self):
+        """Latest pipeline statistics reported by the camera process"""
+        return self._stats
@@ -0,0 +1,121 @@
+"""
+Detection status log: one structured line per state change, plus summaries.
+
+Stations hand every published snapshot to ``StatusLog.record()``, which
+only compares it with the previous one and queues a record when a status
+field changed (no I/O, no formatting). A writer thread turns the queue into
+JSON lines on the output stream and adds a per-camera summary every
+``summary_interval`` seconds, so a 30 FPS pipeline no longer writes five
+console lines per frame.
+"""
+import json
+import queue
+import sys
+import threading
+import time
+
+from snapshots import HISTORY_FIELDS
+
+
+class StatusLog:
+    """
+    Asynchronous, state-change-only log of detection results.
+    """
+
+    def __init__(self, stream=None, summary_interval=60.0, max_pending=10000):
+        """
+        Args:
+            stream: Text stream written to, sys.stdout by default
+            summary_interval (float): Seconds between per-camera summaries, 0 disables them
+            max_pending (int): Records queued before new ones are dropped
+        """
+        self.stream = stream
+        self.summary_interval = summary_interval
+        self.dropped = 0
+        self._queue = queue.Queue(max_pending)
+        # camera -> [frames, passes, fails, changes, latest status] since the last summary
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start the writer thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._write_loop, name="status-log", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Write out every queued record and stop the writer"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def record(self, camera, previous, status, timestamp=None):
+        """
+        Count one published detection state and queue a record for every
+        status field that differs from the previous state; never blocks.
+        """
+        timestamp = timestamp if timestamp is not None else time.time()
+        changes = [(field, previous.get(field), status.get(field)) for field in HISTORY_FIELDS
+                   if status.get(field) != previous.get(field)]
+        with self._lock:
+            counts = self._counts.get(camera)
+            if counts is None:
+                counts = self._counts[camera] = [0, 0, 0, 0, None]
+            counts[0] += 1
+            overall = status.get("overall")
+            if overall == "PASS":
+                counts[1] += 1
+            elif overall == "FAIL":
+                counts[2] += 1
+            counts[3] += len(changes)
+            counts[4] = status
+        for field, before, after in changes:
+            try:
+                self._queue.put_nowait((timestamp, camera, field, before, after))
+            except queue.Full:
+                self.dropped += 1
+
+    def _summaries(self, now):
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        for camera, (frames, passes, fails, changes, status) in counts.items():
+            yield {"time": round(now, 3), "event": "summary", "camera": camera,
+                   "interval": self.summary_interval, "frames": frames, "passes": passes,
+                   "fails": fails, "changes": changes,
+                   "status": {field: status.get(field) for field in HISTORY_FIELDS}}
+
+    def _write(self, records):
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write("".join(json.dumps(record) + "\n" for record in records))
+        stream.flush()
+
+    def _write_loop(self):
+        next_summary = time.monotonic() + self.summary_interval if self.summary_interval else None
+        while True:
+            timeout = max(0.0, next_summary - time.monotonic()) if next_summary is not None else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+            # Write everything already queued in one go
+            batch = [item]
+            while batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            done = batch[-1] is None
+            records = [{"time": round(timestamp, 3), "event": "change", "camera": camera,
+                        "field": field, "from": before, "to": after}
+                       for timestamp, camera, field, before, after in (i for i in batch if i)]
+            if next_summary is not None and (done or time.monotonic() >= next_summary):
+                records.extend(self._summaries(time.time()))
+                next_summary = time.monotonic() + self.summary_interval
+            if records:
+                self._write(records)
+            if done:
+                return
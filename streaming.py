@@ -0,0 +1,355 @@
+import json
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import metrics
+from snapshots import HISTORY_FIELDS
+
+
+class _Frame:
+    """A published raw frame, recycled through ``release`` once superseded and encoded"""
+
+    __slots__ = ("image", "release", "readers", "superseded")
+
+    def __init__(self, image, release):
+        self.image = image
+        self.release = release
+        self.readers = 0
+        self.superseded = False
+
+    def retire(self):
+        """Mark superseded; True when nobody is reading it and it can be released now"""
+        self.superseded = True
+        return self.readers == 0 and self.release is not None
+
+
+class _Variant:
+    """One encoding of the stream (size, quality, frame rate) and its clients"""
+
+    def __init__(self, width, quality, max_fps):
+        self.width = width
+        self.quality = quality
+        self.max_fps = max_fps
+        self.jpeg = None
+        self.version = 0
+        self.source = 0  # raw frame version the current JPEG was made from
+        self.clients = 0
+        self.next_due = 0.0
+        self.thread = None
+
+
+class FrameBroadcaster:
+    """
+    Encode-once, fan-out MJPEG source for the /video_feed clients.
+
+    The capture side publishes processed frames. Clients pick a variant
+    (output width, JPEG quality, maximum frame rate); each distinct variant
+    has one encoder thread that encodes every new frame for it exactly once
+    into a versioned byte buffer, and every client generator of that
+    variant waits on a condition variable until a newer version than the
+    one it last sent is available. A variant without clients is evicted
+    after ``idle_timeout`` seconds; the default variant (full size, default
+    quality, unthrottled) always exists.
+    """
+
+    MIN_WIDTH = 160
+
+    def __init__(self, jpeg_quality=None, client_timeout=1.0, name="default", idle_timeout=10.0,
+                 max_variants=8):
+        """
+        Args:
+            jpeg_quality (int): Default JPEG quality (0-100), None for the OpenCV default
+            client_timeout (float): Seconds a client waits for a new frame before
+                re-checking whether the broadcaster is still running
+            name (str): Camera label on the exported metrics
+            idle_timeout (float): Seconds an unwatched variant is kept before eviction
+            max_variants (int): Most variants encoded at once; further requests get
+                the default variant
+        """
+        self.jpeg_quality = jpeg_quality
+        self.client_timeout = client_timeout
+        self.name = name
+        self.idle_timeout = idle_timeout
+        self.max_variants = max_variants
+
+        self._cond = threading.Condition()
+        self._raw_frame = None  # _Frame
+        self._raw_jpeg = None
+        self._raw_version = 0
+        self._default_key = (None, jpeg_quality, None)
+        self._variants = {self._default_key: _Variant(*self._default_key)}
+        self._running = False
+
+    @property
+    def clients(self):
+        """Number of currently connected stream clients, over all variants"""
+        return sum(variant.clients for variant in list(self._variants.values()))
+
+    @property
+    def variants(self):
+        """Keys (width, quality, max_fps) of the variants currently encoded"""
+        return list(self._variants)
+
+    def start(self):
+        """Start the default variant's encoder thread"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._start_variant(self._variants[self._default_key])
+        # Registered on start so an unused broadcaster (e.g. in a camera process) exports nothing
+        metrics.STREAM_CLIENTS.labels(self.name).set_function(lambda: self.clients)
+
+    def stop(self):
+        """Stop the encoder threads and release any waiting clients"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+            threads = [v.thread for v in self._variants.values() if v.thread is not None]
+        for thread in threads:
+            thread.join()
+        for variant in self._variants.values():
+            variant.thread = None
+
+    def publish(self, frame, release=None):
+        """
+        Hand a new processed frame to the encoders.
+
+        The frame is referenced, not copied, so the caller must not modify
+        it afterwards. Only the newest frame is kept; if an encoder is
+        still busy with an older one, intermediate frames are skipped.
+
+        Args:
+            frame (numpy.ndarray): Processed frame
+            release (callable): Called with the frame once it has been
+                superseded and no encoder is reading it (e.g. FramePool.release)
+        """
+        with self._cond:
+            previous = self._raw_frame
+            self._raw_frame = _Frame(frame, release)
+            self._raw_jpeg = None
+            self._raw_version += 1
+            self._cond.notify_all()
+            expired = previous is not None and previous.retire()
+        if expired:
+            previous.release(previous.image)
+
+    def publish_jpeg(self, jpeg):
+        """
+        Hand out an already encoded JPEG (e.g. from a camera process). The
+        default variant sends it as is; other variants decode and re-encode it.
+        """
+        with self._cond:
+            previous = self._raw_frame
+            self._raw_frame = None
+            self._raw_jpeg = jpeg
+            self._raw_version += 1
+            default = self._variants[self._default_key]
+            default.jpeg = jpeg
+            default.version += 1
+            default.source = self._raw_version
+            self._cond.notify_all()
+            expired = previous is not None and previous.retire()
+        if expired:
+            previous.release(previous.image)
+
+    def latest(self):
+        """
+        Returns:
+            tuple: (version, jpeg_bytes) of the most recent default-variant frame
+        """
+        with self._cond:
+            default = self._variants[self._default_key]
+            return default.version, default.jpeg
+
+    def _variant_key(self, width, quality, max_fps):
+        # Snap requests onto a coarse grid so similar clients share one encoding
+        if width is not None:
+            width = max(self.MIN_WIDTH, width) // 16 * 16
+        quality = self.jpeg_quality if quality is None else max(10, min(quality, 95)) // 5 * 5
+        if max_fps is not None:
+            max_fps = max(1, min(max_fps, 60))
+        return width, quality, max_fps
+
+    def _start_variant(self, variant):
+        variant.thread = threading.Thread(target=self._encode_loop, args=(variant,),
+                                          name=f"stream-{self.name}", daemon=True)
+        variant.thread.start()
+
+    def _encode(self, frame, variant):
+        if variant.width is not None and variant.width < frame.shape[1]:
+            height = max(1, round(frame.shape[0] * variant.width / frame.shape[1]))
+            frame = cv2.resize(frame, (variant.width, height), interpolation=cv2.INTER_AREA)
+        params = []
+        if variant.quality is not None:
+            params = [cv2.IMWRITE_JPEG_QUALITY, int(variant.quality)]
+        ret, encoded = cv2.imencode(".jpg", frame, params)
+        return encoded.tobytes() if ret else None
+
+    def _encode_loop(self, variant):
+        latency = metrics.STAGE_SECONDS.labels(self.name, "encode")
+        is_default = variant is self._variants.get(self._default_key)
+        while True:
+            with self._cond:
+                # Nothing to do until there is a newer frame, someone to watch
+                # it and (with a frame rate cap) the next frame is due
+                while True:
+                    if not self._running:
+                        return
+                    if variant.clients > 0:
+                        if self._raw_version != variant.source:
+                            delay = variant.next_due - time.monotonic()
+                            if delay <= 0:
+                                break
+                            self._cond.wait(delay)
+                        else:
+                            self._cond.wait()
+                    elif is_default:
+                        self._cond.wait()
+                    elif not self._cond.wait_for(lambda: variant.clients > 0 or not self._running,
+                                                 timeout=self.idle_timeout):
+                        # Unwatched for idle_timeout seconds: evict
+                        del self._variants[(variant.width, variant.quality, variant.max_fps)]
+                        variant.thread = None
+                        return
+                raw, jpeg = self._raw_frame, self._raw_jpeg
+                source = self._raw_version
+                if raw is not None:
+                    raw.readers += 1
+
+            # Encode outside the lock so publish() never waits on imencode
+            if raw is None:
+                frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+            else:
+                frame = raw.image
+            with latency.time():
+                encoded = self._encode(frame, variant)
+            if variant.max_fps is not None:
+                variant.next_due = time.monotonic() + 1.0 / variant.max_fps
+
+            expired = False
+            if raw is not None:
+                with self._cond:
+                    raw.readers -= 1
+                    expired = raw.superseded and raw.readers == 0 and raw.release is not None
+                if expired:
+                    raw.release(raw.image)
+
+            with self._cond:
+                variant.source = source
+                if encoded is None:
+                    continue
+                variant.jpeg = encoded
+                variant.version += 1
+                self._cond.notify_all()
+
+    def stream(self, width=None, quality=None, max_fps=None):
+        """
+        Generator yielding multipart MJPEG parts for one client.
+
+        Args:
+            width (int): Downscale frames to this width (never upscaled)
+            quality (int): JPEG quality (10-95)
+            max_fps (int): Send at most this many frames per second
+
+        Blocks until a frame of the variant newer than the last one sent is
+        available, so each client receives every encoded version at most once.
+        """
+        with self._cond:
+            key = self._variant_key(width, quality, max_fps)
+            variant = self._variants.get(key)
+            if variant is None:
+                if len(self._variants) < self.max_variants:
+                    variant = self._variants[key] = _Variant(*key)
+                    if self._running:
+                        self._start_variant(variant)
+                else:
+                    variant = self._variants[self._default_key]
+            variant.clients += 1
+            # Wake the encoder in case a frame arrived while nobody was watching
+            self._cond.notify_all()
+            # Send the current JPEG right away unless it predates the newest frame
+            if variant.source == self._raw_version:
+                last_version = 0
+            else:
+                last_version = variant.version
+        latency = metrics.STAGE_SECONDS.labels(self.name, "stream")
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(
+                        lambda: not self._running or variant.version != last_version,
+                        timeout=self.client_timeout,
+                    )
+                    if not self._running:
+                        return
+                    if variant.version == last_version:
+                        continue
+                    last_version = variant.version
+                    jpeg = variant.jpeg
+                # Time until the server asks for the next part: how long writing this one took
+                start = time.perf_counter()
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+                latency.observe(time.perf_counter() - start)
+        finally:
+            with self._cond:
+                variant.clients -= 1
+                self._cond.notify_all()
+
+
+def _sse(event, version, data):
+    return f"event: {event}\nid: {version}\ndata: {json.dumps(data)}\n\n"
+
+
+def status_events(board, sensor_interval=1.0, keepalive=15.0):
+    """
+    Generator yielding Server-Sent Events for one dashboard client.
+
+    Sends the full state on connect, then a ``detection`` event whenever a
+    detection field changes and a ``sensors`` event when the sensor
+    readings change, at most once per ``sensor_interval`` seconds. Nothing
+    is sent for frames that leave the status as it was, apart from a
+    comment every ``keepalive`` seconds so dead connections are noticed.
+
+    Args:
+        board (snapshots.StatusBoard): Status to follow
+    """
+    snapshot = board.current()
+    version = snapshot.version
+    detection = {k: snapshot.status.get(k) for k in HISTORY_FIELDS}
+    sensors = {k: v for k, v in snapshot.status.items() if k not in HISTORY_FIELDS}
+    yield _sse("detection", version, detection)
+    yield _sse("sensors", version, sensors)
+    sensors_sent = last_sent = time.monotonic()
+
+    pending_sensors = None
+    while True:
+        # Wake up by the time a throttled sensor update or a keepalive is due
+        due = last_sent + keepalive
+        if pending_sensors is not None:
+            due = min(due, sensors_sent + sensor_interval)
+        snapshot = board.wait(version, max(0.0, due - time.monotonic()))
+
+        if snapshot is not None:
+            version = snapshot.version
+            current = {k: snapshot.status.get(k) for k in HISTORY_FIELDS}
+            if current != detection:
+                detection = current
+                last_sent = time.monotonic()
+                yield _sse("detection", version, detection)
+            current = {k: v for k, v in snapshot.status.items() if k not in HISTORY_FIELDS}
+            if current != sensors:
+                pending_sensors = current
+
+        now = time.monotonic()
+        if pending_sensors is not None and now - sensors_sent >= sensor_interval:
+            sensors, pending_sensors = pending_sensors, None
+            sensors_sent = last_sent = now
+            yield _sse("sensors", version, sensors)
+        elif now - last_sent >= keepalive:
+            last_sent = now
+            yield ": keepalive\n\n"
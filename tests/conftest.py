@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app_client(monkeypatch):
+    """Test client of the web app that does not open the cameras"""
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "cameras_started", True)
+    return app_module.app.test_client()
@@ -0,0 +1,58 @@
+from analytics import AnalyticsRollups, connect
+
+PASS = {"overall": "PASS", "fuel_cell_holes": "detected", "pipette": "detected", "flaps": "Closed",
+        "overflow": "Normal"}
+FAIL = dict(PASS, overall="FAIL", flaps="Open")
+
+
+def publish(rollups, statuses, start=600.0):
+    previous = {}
+    for i, status in enumerate(statuses):
+        rollups.add("main", start + i, status, previous)
+        previous = status
+
+
+def test_inspections_count_verdict_changes_and_frames_count_frames(tmp_path):
+    rollups = AnalyticsRollups(str(tmp_path / "events.db"), flush_interval=60)
+    rollups.start()
+    publish(rollups, [PASS] * 10 + [FAIL] * 5 + [PASS] * 10)
+    rollups.close()
+
+    totals = rollups.query(0, 3600, "minute")["totals"]
+    assert (totals["frames"], totals["pass_frames"], totals["fail_frames"]) == (25, 20, 5)
+    assert (totals["inspections"], totals["passes"], totals["fails"]) == (3, 2, 1)
+    assert totals["failures"]["flaps"] == 1
+    assert totals["success_rate"] == round(100 * 2 / 3, 2)
+
+
+def test_sensor_statistics_come_from_samples(tmp_path):
+    rollups = AnalyticsRollups(str(tmp_path / "events.db"), flush_interval=60)
+    rollups.start()
+    for i, value in enumerate([20.0, 22.0, 24.0]):
+        rollups.add_sample("temperature", 600.0 + i, value)
+    rollups.add_sample("motion", 600.0, 1.0)
+    rollups.add_sample("motion", 601.0, 0.0)
+    rollups.close()
+
+    result = rollups.query(0, 3600, "hour")
+    sensors = result["totals"]["sensors"]
+    assert sensors["temperature"] == {"min": 20.0, "mean": 22.0, "max": 24.0}
+    assert sensors["motion"]["mean"] == 0.5
+    assert sensors["pressure"] is None
+    # Sensor-only buckets are reported even without camera results
+    assert [bucket["bucket"] for bucket in result["buckets"]] == [0]
+
+
+def test_expired_minute_rows_are_pruned(tmp_path):
+    path = str(tmp_path / "events.db")
+    rollups = AnalyticsRollups(path, flush_interval=60, retention={"minute": 3600})
+    rollups.start()
+    publish(rollups, [PASS], start=600.0)
+    publish(rollups, [FAIL], start=10000.0)
+    rollups.close()
+
+    conn = connect(path)
+    rollups._prune(conn, 10000.0)
+    conn.close()
+    assert [b["bucket"] for b in rollups.query(0, 20000, "minute")["buckets"]] == [9960]
+    assert rollups.query(0, 20000, "hour")["totals"]["frames"] == 2
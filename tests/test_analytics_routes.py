@@ -0,0 +1,26 @@
+import pytest
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    import app as app_module
+
+    calls = []
+    monkeypatch.setattr(app_module.rollups, "query",
+                        lambda start, end, resolution, camera: calls.append((start, end)) or {})
+    return calls
+
+
+def test_zero_timestamps_are_not_replaced_by_defaults(app_client, queries):
+    assert app_client.get("/analytics/rollups?start=0&end=0").status_code == 200
+    assert queries == [(0.0, 0.0)]
+
+
+def test_missing_start_defaults_to_a_day_before_end(app_client, queries):
+    assert app_client.get("/analytics/rollups?end=100000").status_code == 200
+    assert queries == [(100000.0 - 86400, 100000.0)]
+
+
+def test_start_after_end_is_rejected(app_client, queries):
+    assert app_client.get("/analytics/rollups?start=10&end=5").status_code == 400
+    assert queries == []
@@ -0,0 +1,55 @@
+import hashlib
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from batch import plan_tasks, read_segment, run_batch
+
+
+@pytest.fixture
+def video(tmp_path):
+    # MPEG-4 Part 2 has inter frames, so a segment rarely starts on a keyframe
+    for fourcc, name in [("mp4v", "sample.mp4"), ("MJPG", "sample.avi")]:
+        path = str(tmp_path / name)
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), 30, (160, 120))
+        if writer.isOpened():
+            break
+    else:
+        pytest.skip("No video encoder available")
+    rng = np.random.default_rng(0)
+    for i in range(47):
+        frame = np.full((120, 160, 3), i * 5, np.uint8)
+        frame[rng.integers(0, 120), :] = 255
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def frame_keys(frames):
+    return [(index, timestamp, hashlib.sha1(frame.tobytes()).hexdigest()) for index, timestamp, frame in frames]
+
+
+def test_segments_cover_every_frame_exactly_once(video):
+    sequential = frame_keys(read_segment(video, 0))
+    assert len(sequential) == 47
+    assert len({key for _, _, key in sequential}) == 47
+
+    tasks = plan_tasks(video, 10)
+    segmented = []
+    for _, (path, start, count) in tasks:
+        segmented += frame_keys(read_segment(path, start, count))
+    assert segmented == sequential
+    # The last segment reads to the end rather than to the estimated count
+    assert tasks[-1][1][2] is None
+
+
+def test_segmented_batch_matches_a_sequential_run(video, tmp_path):
+    outputs = []
+    for name, workers, segment in [("sequential", 1, 1000), ("segmented", 3, 7)]:
+        output = str(tmp_path / f"{name}.jsonl")
+        assert run_batch(video, output, workers=workers, segment=segment) == 47
+        with open(output) as f:
+            outputs.append([json.loads(line) for line in f])
+    assert outputs[0] == outputs[1]
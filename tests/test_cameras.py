@@ -0,0 +1,15 @@
+import pytest
+
+import app as app_module
+
+
+@pytest.mark.parametrize("name", app_module.RESERVED_CAMERA_NAMES)
+def test_camera_names_shadowed_by_detection_routes_are_rejected(name):
+    with pytest.raises(ValueError, match=name):
+        app_module.check_camera_names({"main": 0, name: 1})
+
+
+def test_default_camera_detection_sub_paths(app_client):
+    assert "entries" in app_client.get("/detection/history").get_json()
+    assert app_client.get("/detection/main/history").status_code == 200
+    assert app_client.get("/detection/history/history").status_code == 404
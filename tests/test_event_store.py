@@ -0,0 +1,70 @@
+import sqlite3
+
+from event_store import EventStore, connect, _SCHEMA
+
+
+def make_store(tmp_path, rows):
+    path = str(tmp_path / "events.db")
+    conn = connect(path)
+    conn.executescript(_SCHEMA)
+    with conn:
+        conn.executemany(
+            "INSERT INTO events (timestamp, camera, event_type, component, status, description) "
+            "VALUES (?, 'main', 'status', 'Flaps', 'PASS', 'Flaps Closed')", rows)
+    conn.close()
+    return EventStore(path)
+
+
+def test_iter_events_returns_every_row_in_order(tmp_path):
+    # Several events share each timestamp, so chunks end in the middle of a tie
+    store = make_store(tmp_path, [(float(i // 3),) for i in range(20000)])
+    events = list(store.iter_events(chunk_size=1000))
+    assert len(events) == 20000
+    keys = [(e["timestamp"], e["id"]) for e in events]
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+
+
+def test_iter_events_chunks_search_the_timestamp_index(tmp_path):
+    store = make_store(tmp_path, [(float(i),) for i in range(1000)])
+    for where, params in [([], []), (["timestamp >= ?", "camera = ?"], [10.0, "main"])]:
+        sql, chunk_params = EventStore._keyset_query(where, params, (500.0, 501), 100)
+        conn = sqlite3.connect(store.path)
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, chunk_params))
+        conn.close()
+        assert "SEARCH events USING INDEX events_timestamp" in plan, plan
+
+
+def test_query_pages_follow_the_cursor(tmp_path):
+    store = make_store(tmp_path, [(float(i // 3),) for i in range(1000)])
+    seen, before = [], None
+    while True:
+        page = store.query(before=before, per_page=70, max_count=500)
+        assert page["total"] == 500 and page["total_capped"]
+        seen += [(e["timestamp"], e["id"]) for e in page["events"]]
+        before = page["next"]
+        if before is None:
+            break
+    assert len(seen) == 1000
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_query_pages_search_the_timestamp_index(tmp_path):
+    store = make_store(tmp_path, [(float(i),) for i in range(1000)])
+    sql, params = EventStore._keyset_query([], [], (500.0, 501), 50, descending=True)
+    conn = sqlite3.connect(store.path)
+    plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+    conn.close()
+    assert "SEARCH events USING INDEX events_timestamp" in plan, plan
+
+
+def test_history_events_route_pages_by_cursor(tmp_path, app_client, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "event_store", make_store(tmp_path, [(float(i),) for i in range(25)]))
+    first = app_client.get("/history/events?per_page=10").get_json()
+    second = app_client.get(f"/history/events?per_page=10&before={first['next']}").get_json()
+    assert [e["timestamp"] for e in first["events"]] == [float(i) for i in range(24, 14, -1)]
+    assert [e["timestamp"] for e in second["events"]] == [float(i) for i in range(14, 4, -1)]
+    assert first["total"] == 25
+    assert app_client.get("/history/events?before=bad").status_code == 400
@@ -0,0 +1,38 @@
+import pytest
+
+import inspection_profile
+from inspection_profile import SettingsFile, Settings, compile_profile, make_settings
+
+
+@pytest.fixture
+def client(app_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(inspection_profile, "SETTINGS", SettingsFile(str(tmp_path / "settings.json")))
+    return app_client
+
+
+@pytest.mark.parametrize("changes", [
+    {"overflow_percent": None},
+    {"flap_gray_threshold": True},
+    {"overflow_roi": 5},
+    {"overflow_roi": [0.1, 0.5, None, 0.9]},
+    {"overflow_roi": [0.1, 0.5, 0.9]},
+    {"priming_roi": [0.2, 0.3, 0.201, 0.7]},
+])
+def test_invalid_settings_are_rejected(client, changes):
+    response = client.post("/settings/inspection", json=changes)
+    assert response.status_code == 400
+    assert inspection_profile.SETTINGS.current() == Settings()
+
+
+def test_settings_are_saved(client):
+    response = client.post("/settings/inspection", json={"overflow_percent": 7, "overflow_roi": [0, 0.5, 1, 1]})
+    assert response.status_code == 200
+    assert response.get_json()["overflow_percent"] == 7.0
+    assert inspection_profile.SETTINGS.current().overflow_roi == (0.0, 0.5, 1.0, 1.0)
+
+
+def test_accepted_regions_cover_pixels_of_the_smallest_frame():
+    settings = make_settings({"spoton_roi": [0.5, 0.5, 0.51, 0.51]})
+    profile = compile_profile(*inspection_profile.MIN_FRAME_SIZE, settings)
+    x1, y1, x2, y2 = profile.spoton_roi
+    assert x2 > x1 and y2 > y1
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import numpy as np
+
+from pipeline import FramePool, InspectionPipeline, LatestSlot
+
+
+def finite_read(count):
+    frames = iter(range(count))
+
+    def read(image=None):
+        i = next(frames, None)
+        if i is None:
+            return False, None
+        frame = image if image is not None else np.empty((4, 4, 3), np.uint8)
+        frame[:] = i % 256
+        return True, frame
+    return read
+
+
+def test_finite_source_with_block_policy_publishes_every_frame():
+    published = []
+
+    def process(frame):
+        time.sleep(0.001)
+        return int(frame[0, 0, 0])
+
+    pipeline = InspectionPipeline(finite_read(60), process, published.append, drop_policy="block",
+                                  frame_pool=FramePool())
+    pipeline.start()
+    pipeline.join(timeout=10)
+    assert published == list(range(60))
+    assert not pipeline.running
+    assert pipeline.frame_pool.stats()["in_use"] == 0
+
+
+def test_stop_drops_pending_items():
+    dropped = []
+    slot = LatestSlot("latest", on_drop=dropped.append)
+    slot.put(1)
+    slot.close()
+    assert slot.get() is None
+    assert dropped == [1]
+
+
+def test_drained_close_hands_over_the_pending_item():
+    slot = LatestSlot("block")
+    slot.put(1)
+    blocked = threading.Thread(target=slot.put, args=(2,))
+    blocked.start()
+    slot.close(drain=True)
+    blocked.join(timeout=1)
+    assert slot.get() == 1
+    assert slot.get() is None
+
+
+def test_failing_frames_are_skipped_and_released(capsys):
+    published = []
+
+    def process(frame):
+        value = int(frame[0, 0, 0])
+        if value % 3 == 0:
+            raise RuntimeError(f"bad frame {value}")
+        return value
+
+    pool = FramePool()
+    pipeline = InspectionPipeline(finite_read(30), process, published.append, drop_policy="block",
+                                  frame_pool=pool)
+    pipeline.start()
+    pipeline.join(timeout=10)
+    assert published == [i for i in range(30) if i % 3]
+    stats = pipeline.stats()
+    assert stats["detect"]["errors"] == 10
+    assert stats["frame_pool"]["in_use"] == 0
+    assert not pipeline.running
+    assert capsys.readouterr().out.count("RuntimeError: bad frame 0") == 1
+
+
+def test_failing_publish_does_not_stop_the_stage():
+    published = []
+
+    def publish(result):
+        if result == 5:
+            raise ValueError("cannot publish")
+        published.append(result)
+
+    pipeline = InspectionPipeline(finite_read(10), lambda frame: int(frame[0, 0, 0]), publish,
+                                  drop_policy="block")
+    pipeline.start()
+    pipeline.join(timeout=10)
+    assert published == [0, 1, 2, 3, 4, 6, 7, 8, 9]
+    assert pipeline.stats()["publish"]["errors"] == 1
+
+
+def test_end_of_a_finite_source_is_not_an_error(capsys):
+    for finite, message in [(True, "end of stream after 3 frames"), (False, "Error: Unable to fetch frame")]:
+        pipeline = InspectionPipeline(finite_read(3), lambda frame: None, lambda result: None,
+                                      name="cam", finite=finite)
+        pipeline.start()
+        pipeline.join(timeout=10)
+        out = capsys.readouterr().out
+        assert message in out
+        assert finite != ("Error" in out)
@@ -0,0 +1,71 @@
+import numpy as np
+
+from recording import FrameRecorder, ReplayCapture, is_recording
+
+
+def frame(i):
+    return np.full((2, 3, 3), i, np.uint8)
+
+
+def record(path, count, max_frames):
+    recorder = FrameRecorder(str(path), max_frames=max_frames)
+    for i in range(count):
+        assert recorder.write(frame(i), timestamp=100.0 + i)
+    recorder.close()
+    return recorder
+
+
+def replay(path):
+    capture = ReplayCapture(str(path), speed=0)
+    values = []
+    while True:
+        ret, image = capture.read()
+        if not ret:
+            return values
+        values.append(int(image[0, 0, 0]))
+
+
+def test_ring_keeps_the_latest_frames_in_order(tmp_path):
+    recorder = record(tmp_path, 25, max_frames=10)
+    assert replay(recorder.directory) == list(range(15, 25))
+
+
+def test_each_run_gets_its_own_directory(tmp_path):
+    first = record(tmp_path, 5, max_frames=10)
+    second = record(tmp_path, 3, max_frames=10)
+    assert first.directory != second.directory
+    assert replay(first.directory) == list(range(5))
+    # The recorder's directory plays its latest run
+    assert is_recording(str(tmp_path))
+    assert replay(tmp_path) == list(range(3))
+
+
+def test_recording_stops_once_on_a_new_frame_size(tmp_path, capsys):
+    recorder = FrameRecorder(str(tmp_path), max_frames=10)
+    recorder.write(frame(0))
+    assert not recorder.write(np.zeros((4, 4, 3), np.uint8))
+    assert not recorder.write(frame(1))
+    recorder.close()
+    assert capsys.readouterr().out.count("stopped") == 1
+    assert replay(recorder.directory) == [0]
+
+
+def test_ring_is_sized_to_the_byte_budget(tmp_path):
+    recorder = FrameRecorder(str(tmp_path), max_bytes=frame(0).nbytes * 4)
+    for i in range(6):
+        recorder.write(frame(i))
+    recorder.close()
+    assert recorder.capacity == 4
+    assert replay(recorder.directory) == [2, 3, 4, 5]
+
+
+def test_old_runs_are_deleted(tmp_path):
+    directories = []
+    for run in range(4):
+        recorder = FrameRecorder(str(tmp_path), max_frames=10, keep_runs=2)
+        recorder.write(frame(run))
+        recorder.close()
+        directories.append(recorder.directory)
+    remaining = sorted(str(p) for p in tmp_path.iterdir())
+    assert remaining == directories[-2:]
+    assert replay(tmp_path) == [3]
@@ -0,0 +1,33 @@
+import pytest
+
+from benchmark import CLUTTER_LEVELS, synthetic_scene
+from inspection_profile import MIN_FRAME_SIZE
+from vision import pyramid_levels, run_detectors, run_detectors_pyramid
+
+
+@pytest.mark.parametrize("shape, levels, usable", [
+    ((2160, 3840, 3), 2, 2),
+    ((480, 640, 3), 2, 2),
+    ((470, 640, 3), 2, 1),
+    ((300, 400, 3), 3, 1),
+    ((MIN_FRAME_SIZE[0], MIN_FRAME_SIZE[1], 3), 1, 0),
+])
+def test_pyramid_levels_stop_at_min_frame_size(shape, levels, usable):
+    assert pyramid_levels(shape, levels) == usable
+
+
+@pytest.mark.parametrize("height, width, clutter, levels", [
+    (480, 640, "low", 2),
+    (1080, 1920, "low", 2),
+    (2160, 3840, "medium", 1),
+    (2160, 3840, "medium", 2),
+])
+def test_pyramid_keeps_detections_full_resolution_finds(height, width, clutter, levels):
+    frame = synthetic_scene(height, width, CLUTTER_LEVELS[clutter])
+    names = ["fuel_cell_holes", "pipette"]
+    full = run_detectors(frame, names=names)
+    coarse = run_detectors_pyramid(frame, levels, names)
+
+    assert len(full["fuel_cell_holes"]) and len(full["pipette"])
+    assert len(coarse["fuel_cell_holes"])
+    assert len(coarse["pipette"])
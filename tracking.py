@@ -0,0 +1,86 @@
+class RoiTracker:
+    """
+    Restricts detectors to a padded window around their previous detection.
+
+    A detector without a track, or whose track is due for its periodic
+    full-frame rescan, gets no window and must scan the whole frame. A
+    windowed detection that comes back empty counts as track loss; the
+    caller then rescans the full frame straight away.
+    """
+
+    def __init__(self, adapters, padding=0.25, min_padding=24, full_scan_interval=30):
+        """
+        Args:
+            adapters (dict): name -> (bounds, shift) where ``bounds(result)`` returns the
+                (x1, y1, x2, y2) box around a detection (None when empty) and
+                ``shift(result, dx, dy)`` moves a result from window to frame coordinates
+            padding (float): Window padding as a fraction of the detection box size
+            min_padding (int): Minimum window padding in pixels
+            full_scan_interval (int): Tracked frames between forced full-frame scans
+        """
+        self.adapters = adapters
+        self.padding = padding
+        self.min_padding = min_padding
+        self.full_scan_interval = full_scan_interval
+
+        # name -> [window or None, tracked frames since the last full scan]
+        self._tracks = {name: [None, 0] for name in adapters}
+        self.full_scans = 0
+        self.tracked_scans = 0
+        self.losses = 0
+
+    def tracks(self, name):
+        return name in self._tracks
+
+    def window(self, name):
+        """
+        Returns:
+            tuple: (x1, y1, x2, y2) search window, or None when a full scan is due
+        """
+        window, since_full = self._tracks[name]
+        if window is None or since_full >= self.full_scan_interval:
+            return None
+        return window
+
+    def record(self, name, result, shape, window=None):
+        """
+        Store a detection result and move the track.
+
+        Args:
+            result: Detector output, in window coordinates when ``window`` is given
+            shape (tuple): Full frame shape, used to clip the next window
+            window (tuple): Window the detector ran on, None for a full scan
+
+        Returns:
+            The result in full-frame coordinates, or None when a windowed
+            detection lost the track and the full frame needs scanning
+        """
+        bounds, shift = self.adapters[name]
+        track = self._tracks[name]
+        if window is not None:
+            result = shift(result, window[0], window[1])
+            self.tracked_scans += 1
+        else:
+            self.full_scans += 1
+
+        box = bounds(result)
+        if box is None:
+            track[0] = None
+            if window is not None:
+                self.losses += 1
+                return None
+            return result
+
+        x1, y1, x2, y2 = box
+        pad_x = max(self.min_padding, int((x2 - x1) * self.padding))
+        pad_y = max(self.min_padding, int((y2 - y1) * self.padding))
+        h, w = shape[:2]
+        track[0] = (max(0, x1 - pad_x), max(0, y1 - pad_y), min(w, x2 + pad_x), min(h, y2 + pad_y))
+        track[1] = 0 if window is None else track[1] + 1
+        return result
+
+    def reset(self):
+        """Forget every track so the next frame is scanned in full"""
+        for track in self._tracks.values():
+            track[0] = None
+            track[1] = 0
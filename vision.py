@@ -0,0 +1,561 @@
+import time
+
+import cv2
+import numpy as np
+
+from inspection_profile import MIN_FRAME_SIZE, current_profile
+
+
+class FrameContext:
+    """
+    Per-frame cache of the derived image planes shared by the detectors.
+
+    Every plane is computed on first access and reused by every later
+    detector that asks for it, so a frame is converted to grayscale / HSV,
+    blurred or thresholded at most once no matter how many detectors run.
+
+    ``scale`` is the frame's size relative to the full-resolution camera
+    frame (e.g. 0.5 for one pyramid level down); detectors scale their
+    pixel area and length thresholds by it.
+    """
+
+    def __init__(self, frame, scale=1.0):
+        self.frame = frame
+        self.scale = scale
+        self.height, self.width = frame.shape[:2]
+        self._planes = {}
+
+    def _cached(self, key, compute):
+        plane = self._planes.get(key)
+        if plane is None:
+            plane = compute()
+            self._planes[key] = plane
+        return plane
+
+    @property
+    def gray(self):
+        """Grayscale version of the frame"""
+        return self._cached("gray", lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def blurred(self):
+        """5x5 Gaussian blur of the grayscale plane"""
+        return self._cached("blurred", lambda: cv2.GaussianBlur(self.gray, (5, 5), 0))
+
+    def hsv(self, roi=None):
+        """
+        HSV version of the frame, or of the (x1, y1, x2, y2) region ``roi``.
+
+        A region is sliced out of the full-frame plane when that has already
+        been computed, otherwise only the region itself is converted.
+        """
+        if roi is None:
+            return self._cached("hsv", lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV))
+        x1, y1, x2, y2 = roi
+        full = self._planes.get("hsv")
+        if full is not None:
+            return full[y1:y2, x1:x2]
+        return self._cached(
+            ("hsv", roi),
+            lambda: cv2.cvtColor(self.frame[y1:y2, x1:x2], cv2.COLOR_BGR2HSV),
+        )
+
+    def threshold(self, thresh, mode=cv2.THRESH_BINARY, source="gray"):
+        """
+        Global binary threshold of the ``"gray"`` or ``"blurred"`` plane
+        """
+        def compute():
+            _, binary = cv2.threshold(getattr(self, source), thresh, 255, mode)
+            return binary
+        return self._cached(("threshold", source, thresh, mode), compute)
+
+    def edges(self, low, high, thresh):
+        """Canny edges of the global binary threshold plane at ``thresh``"""
+        return self._cached(
+            ("edges", low, high, thresh),
+            lambda: cv2.Canny(self.threshold(thresh), low, high),
+        )
+
+    @property
+    def adaptive_threshold(self):
+        """Inverted Gaussian adaptive threshold (11x11 block, C=2) of the gray plane"""
+        return self._cached(
+            "adaptive_threshold",
+            lambda: cv2.adaptiveThreshold(
+                self.gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2
+            ),
+        )
+
+
+# Share of the frame the syringe candidate boxes must cover before the barrel
+# edge map is computed once for the whole frame instead of per candidate
+SYRINGE_FULL_EDGE_FRACTION = 0.25
+
+
+def contour_stats(contours):
+    """
+    Area, perimeter and bounding box of every contour in one vectorized pass.
+
+    Matches cv2.contourArea (shoelace formula over the contour points),
+    cv2.arcLength(closed=True) and cv2.boundingRect without a Python-level
+    call per contour.
+
+    Returns:
+        tuple: (areas, perimeters, boxes) as float64 (N,), float64 (N,) and
+            int64 (N, 4) [x, y, w, h] arrays
+    """
+    if len(contours) == 0:
+        return np.zeros(0), np.zeros(0), np.zeros((0, 4), np.int64)
+    lengths = np.fromiter((len(c) for c in contours), np.int64, count=len(contours))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    pts = np.concatenate(contours).reshape(-1, 2).astype(np.int64)
+    x, y = pts[:, 0], pts[:, 1]
+
+    # Index of the next point of each point's own (closed) contour
+    nxt = np.arange(1, len(pts) + 1)
+    nxt[starts + lengths - 1] = starts
+    cross = x * y[nxt] - x[nxt] * y
+    areas = np.abs(np.add.reduceat(cross, starts)) / 2.0
+    perimeters = np.add.reduceat(np.hypot(x[nxt] - x, y[nxt] - y), starts)
+
+    x0 = np.minimum.reduceat(x, starts)
+    y0 = np.minimum.reduceat(y, starts)
+    w = np.maximum.reduceat(x, starts) - x0 + 1
+    h = np.maximum.reduceat(y, starts) - y0 + 1
+    return areas, perimeters, np.stack([x0, y0, w, h], axis=1)
+
+
+# Compact record for one detected hole: centre and approximate radius in pixels
+HOLE_DTYPE = np.dtype([("x", np.int32), ("y", np.int32), ("radius", np.int32)])
+
+
+def find_fuel_cell_holes(frame, ctx=None):
+    """
+    Array-based fuel cell hole detector.
+
+    Same contour/circularity criteria as detect_fuel_cell_holes, but the
+    blob properties are computed for all contours at once and filtered with
+    vectorized masks.
+
+    Returns:
+        numpy.ndarray: Structured HOLE_DTYPE array with one row per hole
+    """
+    if ctx is None:
+        ctx = FrameContext(frame)
+    
+    # Threshold the blurred grayscale plane to create binary image
+    thresh = ctx.threshold(80, cv2.THRESH_BINARY_INV, source="blurred")
+    
+    # Find contours
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    areas, perimeters, boxes = contour_stats(contours)
+    
+    # Filter by size (scaled to the pyramid level) and circularity
+    # (a circle has circularity close to 1)
+    area_scale = ctx.scale ** 2
+    keep = (areas > 100 * area_scale) & (areas < 5000 * area_scale) & (perimeters > 0)
+    circularity = np.zeros_like(areas)
+    circularity[keep] = 4 * np.pi * areas[keep] / (perimeters[keep] ** 2)
+    keep &= circularity > 0.7
+    
+    # Centre and "radius" from the bounding rectangle
+    x, y, w, h = boxes[keep].T
+    holes = np.empty(len(x), dtype=HOLE_DTYPE)
+    holes["x"] = (2 * x + w) // 2
+    holes["y"] = (2 * y + h) // 2
+    holes["radius"] = (w + h) // 4  # Approximate radius
+    return holes
+
+
+def detect_fuel_cell_holes(frame, ctx=None):
+    """
+    Detect if the fuel cell holes are open using contour detection
+    and shape analysis rather than simple circle detection.
+
+    Returns a list of ((x, y), radius) tuples; see find_fuel_cell_holes for
+    the array form.
+    """
+    return [((x, y), radius) for x, y, radius in find_fuel_cell_holes(frame, ctx).tolist()]
+
+def detect_syringe(frame, ctx=None):
+    """
+    Detect a syringe/pipette like the one in the reference image (clear with measurement markings).
+    Specifically looks for the characteristics of a medical syringe with plunger.
+    """
+    if frame is None:
+        return []
+    if ctx is None:
+        ctx = FrameContext(frame)
+        
+    # Adaptive thresholding highlights edges and text markings
+    # This will help detect the measurement lines on the syringe
+    thresh = ctx.adaptive_threshold
+    
+    # Apply morphological operations to enhance the structure
+    kernel = np.ones((3, 3), np.uint8)
+    morph = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel, iterations=1)
+    
+    # Find contours
+    contours, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return []
+    
+    # Batched pre-filter: area, bounding box and aspect ratio for every contour
+    # at once, computed over the concatenated contour points
+    areas, _, boxes = contour_stats(contours)
+    bw, bh = boxes[:, 2], boxes[:, 3]
+    
+    # Ignore small contours; syringes are elongated, so look for tall, narrow objects
+    # Area and length thresholds are in full-resolution pixels, scaled to this level
+    area_scale = ctx.scale ** 2
+    candidates = np.flatnonzero((areas >= 500 * area_scale) & (bh >= 2 * bw))
+    
+    # Check if each contour is mostly straight lines (like a syringe body)
+    shaped = []
+    for i in candidates:
+        cnt = contours[i]
+        epsilon = 0.04 * cv2.arcLength(cnt, True)
+        approx = cv2.approxPolyDP(cnt, epsilon, True)
+        
+        # A syringe shape typically has 4-8 vertices when approximated
+        if 4 <= len(approx) <= 12:
+            shaped.append(i)
+    if not shaped:
+        return []
+    
+    # Edge maps for the barrel check: when the remaining boxes cover a large
+    # share of the frame, run Canny once on the whole binary plane and slice
+    # it; otherwise edge-detect just the boxes
+    binary = ctx.threshold(100)
+    box_area = int((bw[shaped] * bh[shaped]).sum())
+    full_edges = box_area > SYRINGE_FULL_EDGE_FRACTION * binary.size
+    
+    # Filter the surviving candidates to find potential syringes
+    syringe_contours = []
+    for i in shaped:
+        cnt = contours[i]
+        area = float(areas[i])
+        x, y, w, h = (int(v) for v in boxes[i])
+            
+        # Additional check: Look for parallel lines that would be the syringe barrel
+        if full_edges:
+            edges = ctx.edges(50, 150, 100)[y:y+h, x:x+w]
+        else:
+            edges = cv2.Canny(binary[y:y+h, x:x+w], 50, 150)
+        
+        # Apply Hough transform to detect lines
+        lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=max(1, round(50 * ctx.scale)),
+                                minLineLength=h/3, maxLineGap=20 * ctx.scale)
+        
+        if lines is None or len(lines) < 2:
+            continue
+            
+        # Check for text markings (like measurements)
+        # Count small contours that could be measurement lines
+        roi_thresh = thresh[y:y+h, x:x+w]
+        marking_contours, _ = cv2.findContours(roi_thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        small_markings = [c for c in marking_contours
+                          if 5 * area_scale < cv2.contourArea(c) < 100 * area_scale]
+        
+        # Syringes typically have multiple small marking lines
+        if len(small_markings) < 3:
+            continue
+        
+        # If all checks pass, this is likely a syringe
+        syringe_contours.append({
+            'contour': cnt,
+            'rect': (x, y, w, h),
+            'confidence': min(100, area / 100)  # Basic confidence metric
+        })
+    
+    # Sort by confidence
+    syringe_contours.sort(key=lambda x: x['confidence'], reverse=True)
+    
+    # Return contours of detected syringes (highest confidence first)
+    return [s['contour'] for s in syringe_contours]
+
+def flap_rois(h, w):
+    """
+    (x1, y1, x2, y2) regions of the Priming and SpotON ports in an h x w frame,
+    from the current inspection profile.
+    """
+    profile = current_profile(h, w)
+    return profile.priming_roi, profile.spoton_roi
+
+def overflow_roi(h, w):
+    """(x1, y1, x2, y2) region of an h x w frame where overflow would be visible"""
+    return current_profile(h, w).overflow_roi
+
+def detect_flaps(frame, ctx=None, profile=None):
+    """
+    Detect if the Priming port cover and SpotON port cover are closed or open
+    based on the image of the fuel cell provided.
+    """
+    if ctx is None:
+        ctx = FrameContext(frame)
+    if profile is None:
+        profile = current_profile(*frame.shape[:2])
+    
+    # Regions of interest for the Priming port and SpotON port,
+    # sliced from the shared gray plane
+    priming_gray = ctx.gray[profile.priming_slice]
+    spoton_gray = ctx.gray[profile.spoton_slice]
+    
+    # Apply thresholding
+    _, priming_thresh = cv2.threshold(priming_gray, profile.flap_gray_threshold, 255, cv2.THRESH_BINARY)
+    _, spoton_thresh = cv2.threshold(spoton_gray, profile.flap_gray_threshold, 255, cv2.THRESH_BINARY)
+    
+    # Calculate the percentage of white pixels (indicating an open port)
+    priming_white_percent = (cv2.countNonZero(priming_thresh) / profile.priming_pixels) * 100
+    spoton_white_percent = (cv2.countNonZero(spoton_thresh) / profile.spoton_pixels) * 100
+    
+    # Check if ports are closed based on the percentage of white pixels
+    # When closed, the dark covers will result in fewer white pixels
+    priming_closed = priming_white_percent < profile.flap_open_percent
+    spoton_closed = spoton_white_percent < profile.flap_open_percent
+    
+    # Overall flap state - both need to be in same state for simplicity
+    flaps_closed = priming_closed and spoton_closed
+    
+    return {
+        "flaps_closed": flaps_closed,
+        "priming_closed": priming_closed,
+        "spoton_closed": spoton_closed,
+        "priming_white_percent": priming_white_percent,
+        "spoton_white_percent": spoton_white_percent,
+        "priming_roi": profile.priming_roi,
+        "spoton_roi": profile.spoton_roi
+    }
+
+def detect_overflow(frame, ctx=None, profile=None):
+    """
+    Detect liquid overflow using color detection for liquids.
+    This looks for any liquid outside the expected regions.
+    """
+    if ctx is None:
+        ctx = FrameContext(frame)
+    if profile is None:
+        profile = current_profile(*frame.shape[:2])
+    
+    # Region where overflow would be visible; HSV gives better color detection
+    hsv = ctx.hsv(profile.overflow_roi)
+    
+    # Detect liquid-coloured (by default blue-ish) pixels
+    mask = cv2.inRange(hsv, profile.liquid_lower, profile.liquid_upper)
+    
+    # Calculate percentage of liquid pixels
+    liquid_percent = (cv2.countNonZero(mask) / profile.overflow_pixels) * 100
+    
+    # Determine if overflow is present
+    is_overflowing = liquid_percent > profile.overflow_percent
+    
+    return {
+        "is_overflowing": is_overflowing,
+        "liquid_percent": liquid_percent,
+        "overflow_roi": profile.overflow_roi
+    }
+
+
+def hole_bounds(holes):
+    """(x1, y1, x2, y2) box around all holes, None when there are none"""
+    if len(holes) == 0:
+        return None
+    x, y, r = holes["x"], holes["y"], holes["radius"]
+    return (int((x - r).min()), int((y - r).min()), int((x + r).max()) + 1, int((y + r).max()) + 1)
+
+
+def shift_holes(holes, dx, dy):
+    """Hole array moved by (dx, dy), e.g. from ROI to frame coordinates"""
+    holes = holes.copy()
+    holes["x"] += dx
+    holes["y"] += dy
+    return holes
+
+
+def contour_bounds(contours):
+    """(x1, y1, x2, y2) box around all contours, None when there are none"""
+    if len(contours) == 0:
+        return None
+    x, y, w, h = cv2.boundingRect(np.concatenate(contours))
+    return (x, y, x + w, y + h)
+
+
+def shift_contours(contours, dx, dy):
+    """Contours moved by (dx, dy), e.g. from ROI to frame coordinates"""
+    offset = np.array([dx, dy], dtype=np.int32)
+    return [cnt + offset for cnt in contours]
+
+
+# (bounds, shift) adapters for the detectors that support ROI tracking
+TRACKABLE = {
+    "fuel_cell_holes": (hole_bounds, shift_holes),
+    "pipette": (contour_bounds, shift_contours),
+}
+
+# Detectors keyed by the detection_status field they feed
+DETECTORS = {
+    "fuel_cell_holes": find_fuel_cell_holes,
+    "pipette": detect_syringe,
+    "flaps": detect_flaps,
+    "overflow": detect_overflow,
+}
+
+
+def run_detectors(frame, ctx=None, names=None, timings=None):
+    """
+    Run detectors on one frame, sharing a single FrameContext.
+
+    Args:
+        names (list): Subset of DETECTORS to run, all of them by default
+        timings (dict): If given, each detector's run time in seconds is
+            added to ``timings[name]``
+
+    Returns:
+        dict: Raw detector output keyed like DETECTORS
+    """
+    if ctx is None:
+        ctx = FrameContext(frame)
+    if names is None:
+        names = DETECTORS
+    if timings is None:
+        return {name: DETECTORS[name](frame, ctx) for name in names}
+
+    results = {}
+    for name in names:
+        start = time.perf_counter()
+        results[name] = DETECTORS[name](frame, ctx)
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+    return results
+
+
+# ----------------- Multi-resolution (pyramid) detection -----------------
+# Percentage points around the flap / overflow thresholds within which a
+# coarse-level decision is re-checked at full resolution
+PYRAMID_REFINE_MARGIN = 5
+
+# Padding, in full-resolution pixels, around coarse detections before refinement
+PYRAMID_REFINE_PADDING = 16
+
+
+def _scale_box(box, factor, padding, shape):
+    """Coarse (x1, y1, x2, y2) box to a padded, clipped full-resolution box"""
+    h, w = shape[:2]
+    x1, y1, x2, y2 = box
+    return (max(0, int(x1 * factor) - padding), max(0, int(y1 * factor) - padding),
+            min(w, int(np.ceil(x2 * factor)) + padding), min(h, int(np.ceil(y2 * factor)) + padding))
+
+
+def _merge_boxes(boxes):
+    """Merge overlapping (x1, y1, x2, y2) boxes so no region is refined twice"""
+    merged = []
+    for box in sorted(boxes):
+        for i, other in enumerate(merged):
+            if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+                merged[i] = (min(box[0], other[0]), min(box[1], other[1]),
+                             max(box[2], other[2]), max(box[3], other[3]))
+                break
+        else:
+            merged.append(box)
+    return merged
+
+
+def _refine_holes(frame, coarse, factor):
+    # Holes are searched at full resolution inside the padded area the coarse holes span;
+    # small holes can vanish at a coarse level, so nothing found means a full-frame search
+    box = hole_bounds(coarse)
+    if box is not None:
+        x1, y1, x2, y2 = _scale_box(box, factor, PYRAMID_REFINE_PADDING, frame.shape)
+        refined = shift_holes(find_fuel_cell_holes(frame[y1:y2, x1:x2]), x1, y1)
+        if len(refined):
+            return refined
+    return find_fuel_cell_holes(frame)
+
+
+def _refine_syringe(frame, coarse, factor):
+    # Each coarse syringe candidate is re-checked at full resolution; the tick marks
+    # blur away at coarse levels, so no confirmed candidate means a full-frame pass
+    boxes = [_scale_box(contour_bounds([cnt]), factor, PYRAMID_REFINE_PADDING, frame.shape)
+             for cnt in coarse]
+    refined = []
+    for x1, y1, x2, y2 in _merge_boxes(boxes):
+        refined.extend(shift_contours(detect_syringe(frame[y1:y2, x1:x2]), x1, y1))
+    if not refined:
+        return detect_syringe(frame)
+    refined.sort(key=cv2.contourArea, reverse=True)
+    return refined
+
+
+def _refine_flaps(frame, coarse, factor):
+    # Ratio measurements carry over between levels; only borderline ones are re-measured
+    profile = current_profile(*frame.shape[:2])
+    percents = (coarse["priming_white_percent"], coarse["spoton_white_percent"])
+    if any(abs(p - profile.flap_open_percent) < PYRAMID_REFINE_MARGIN for p in percents):
+        return detect_flaps(frame, profile=profile)
+    refined = dict(coarse)
+    refined["priming_roi"], refined["spoton_roi"] = profile.priming_roi, profile.spoton_roi
+    return refined
+
+
+def _refine_overflow(frame, coarse, factor):
+    profile = current_profile(*frame.shape[:2])
+    if abs(coarse["liquid_percent"] - profile.overflow_percent) < PYRAMID_REFINE_MARGIN:
+        return detect_overflow(frame, profile=profile)
+    refined = dict(coarse)
+    refined["overflow_roi"] = profile.overflow_roi
+    return refined
+
+
+# Per-detector refinement of a coarse result: (frame, coarse result, coarse-to-full factor)
+PYRAMID_REFINERS = {
+    "fuel_cell_holes": _refine_holes,
+    "pipette": _refine_syringe,
+    "flaps": _refine_flaps,
+    "overflow": _refine_overflow,
+}
+
+
+def pyramid_levels(shape, levels):
+    """Number of the requested pyramid levels that keep a frame of this shape within MIN_FRAME_SIZE"""
+    h, w = shape[:2]
+    usable = 0
+    while usable < levels and (h + 1) // 2 >= MIN_FRAME_SIZE[0] and (w + 1) // 2 >= MIN_FRAME_SIZE[1]:
+        h, w = (h + 1) // 2, (w + 1) // 2
+        usable += 1
+    return usable
+
+
+def run_detectors_pyramid(frame, levels=1, names=None, timings=None):
+    """
+    Coarse-to-fine detection: run the detectors on a frame downscaled by
+    2**levels (thresholds scaled to match), then refine only the candidate
+    regions at full resolution.
+
+    Levels that would shrink the frame below MIN_FRAME_SIZE are skipped; with
+    none left every detector runs at full resolution.
+
+    Args:
+        timings (dict): As for run_detectors; covers the coarse pass and refinement
+
+    Returns:
+        dict: Full-resolution detector output keyed like DETECTORS
+    """
+    if names is None:
+        names = DETECTORS
+    levels = pyramid_levels(frame.shape, levels)
+    if levels == 0:
+        return run_detectors(frame, None, names, timings)
+    coarse_frame = frame
+    for _ in range(levels):
+        coarse_frame = cv2.pyrDown(coarse_frame)
+    scale = coarse_frame.shape[1] / frame.shape[1]
+    coarse = run_detectors(coarse_frame, FrameContext(coarse_frame, scale), names, timings)
+    if timings is None:
+        return {name: PYRAMID_REFINERS[name](frame, coarse[name], 1 / scale) for name in names}
+
+    results = {}
+    for name in names:
+        start = time.perf_counter()
+        results[name] = PYRAMID_REFINERS[name](frame, coarse[name], 1 / scale)
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+    return results
+